@@ -1,30 +1,32 @@
-from copy import deepcopy
+import time
+from contextlib import contextmanager
 from datetime import timedelta
+from threading import Thread
 
 from dmcontent.errors import ContentNotFoundError
-from flask import Flask, request, redirect, session
+from flask import Flask, request, redirect
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from werkzeug.local import Local, LocalProxy
+from werkzeug.local import LocalProxy
 
-import dmapiclient
+from dmapiclient import APIError
 from dmcontent.content_loader import ContentLoader
 from dmutils import init_app, formats
 from dmutils.timing import logged_duration
-from dmutils.user import User
 from govuk_frontend_jinja.flask_ext import init_govuk_frontend
 
 from config import configs
+from .content_store import LazyContentLoader, SharedContentLoader
+from .api_client import PooledDataAPIClient
+from .instrumentation import init_instrumentation, instrumented_client_class
+from .sessions import init_session_refresh
+from .templating import init_bytecode_cache, precompile_templates, timed_compile_environment
 
 
 csrf = CSRFProtect()
-data_api_client = dmapiclient.DataAPIClient()
+data_api_client = instrumented_client_class(PooledDataAPIClient, "api")()
 login_manager = LoginManager()
 
-# we use our own Local for objects we explicitly want to be able to retain between requests but shouldn't
-# share a common object between concurrent threads/contexts
-_local = Local()
-
 # These frameworks pre-date the introduction of the edit_service_as_admin and declaration manifests.
 OLD_FRAMEWORKS_WITH_MISSING_MANIFESTS = ['g-cloud-4', 'g-cloud-5', 'g-cloud-6']
 
@@ -40,22 +42,70 @@ def _log_missing_manifest(application, manifest_name, framework_slug):
     )
 
 
+# the order in which frameworks' content is preloaded when DM_LAZY_CONTENT_LOADING is set, by framework status
+CONTENT_PRELOAD_STATUS_ORDER = ('live', 'open', 'standstill', 'pending', 'coming', 'expired')
+
+
+def _load_framework_manifests(application, content_loader, framework_slug):
+    try:
+        content_loader.load_manifest(framework_slug, 'services', 'edit_service_as_admin')
+    except ContentNotFoundError:
+        _log_missing_manifest(application, "edit_service_as_admin", framework_slug)
+    try:
+        content_loader.load_manifest(framework_slug, 'declaration', 'declaration')
+    except ContentNotFoundError:
+        _log_missing_manifest(application, "declaration", framework_slug)
+
+
 def _make_content_loader_factory(application, frameworks, initial_instance=None):
     # for testing purposes we allow an initial_instance to be provided
     primary_cl = initial_instance if initial_instance is not None else ContentLoader('app/content')
     for framework_data in frameworks:
-        try:
-            primary_cl.load_manifest(framework_data['slug'], 'services', 'edit_service_as_admin')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "edit_service_as_admin", framework_data['slug'])
-        try:
-            primary_cl.load_manifest(framework_data['slug'], 'declaration', 'declaration')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "declaration", framework_data['slug'])
-
-    # seal primary_cl in a closure by returning a function which will only ever return an independent copy of it.
-    # this is of course only guaranteed when the initial_instance argument wasn't used.
-    return lambda: deepcopy(primary_cl)
+        _load_framework_manifests(application, primary_cl, framework_data['slug'])
+
+    # primary_cl is only ever read from after this point, so rather than giving each thread its own deepcopy of it we
+    # take a single frozen snapshot which all threads share. see SharedContentLoader for why this is safe.
+    shared_cl = SharedContentLoader(primary_cl)
+    return lambda: shared_cl
+
+
+def _preload_content(application, lazy_cl):
+    with application.app_context():
+        for attempt in range(1, application.config['DM_CONTENT_PRELOAD_ATTEMPTS'] + 1):
+            try:
+                frameworks = data_api_client.find_frameworks().get('frameworks')
+                break
+            except APIError as e:
+                application.logger.warning(
+                    "Failed to find frameworks to preload content for (attempt {attempt}): {error}",
+                    extra={"attempt": attempt, "error": str(e)},
+                )
+                time.sleep(application.config['DM_CONTENT_PRELOAD_RETRY_INTERVAL'])
+        else:
+            application.logger.error("Gave up preloading content, frameworks' content will be loaded as it is used")
+            frameworks = []
+
+        status_order = {status: i for i, status in enumerate(CONTENT_PRELOAD_STATUS_ORDER)}
+        lazy_cl.preload(
+            framework['slug'] for framework in sorted(
+                frameworks,
+                key=lambda framework: status_order.get(framework['status'], len(status_order)),
+            )
+        )
+
+
+def _make_lazy_content_loader_factory(application):
+    """Like _make_content_loader_factory, but returning immediately: each framework's content is loaded the first time
+    it is used, while a background thread loads all the frameworks' content in order of CONTENT_PRELOAD_STATUS_ORDER.
+    """
+    def load_framework(framework_slug):
+        content_loader = ContentLoader('app/content')
+        _load_framework_manifests(application, content_loader, framework_slug)
+        return content_loader
+
+    lazy_cl = LazyContentLoader(load_framework)
+    Thread(target=_preload_content, args=(application, lazy_cl), name="content-preload", daemon=True).start()
+    return lambda: lazy_cl
 
 
 def _content_loader_factory():
@@ -67,13 +117,26 @@ def _content_loader_factory():
 
 @logged_duration(message="Spent {duration_real}s in get_content_loader")
 def get_content_loader():
-    if not hasattr(_local, "content_loader"):
-        _local.content_loader = _content_loader_factory()
-    return _local.content_loader
+    return _content_loader_factory()
 
 
 content_loader = LocalProxy(get_content_loader)
+from app.main.helpers.caching import clear_all_caches
 from app.main.helpers.service import parse_document_upload_time
+from app.main.helpers.users import load_user as load_cached_user
+
+
+@contextmanager
+def _startup_phase(application, phase):
+    """Time a phase of create_app, recording it in `application.extensions["startup_phases"]`"""
+    with logged_duration(
+        logger=application.logger,
+        message="Startup phase {phase} took {duration_real}s",
+        condition=True,
+    ) as log_context:
+        log_context["phase"] = phase
+        yield
+    application.extensions.setdefault("startup_phases", []).append((phase, log_context["duration_real"]))
 
 
 def create_app(config_name):
@@ -84,35 +147,50 @@ def create_app(config_name):
 
     # allow using govuk-frontend Nunjucks templates
     init_govuk_frontend(application)
+    # this must be set before the jinja environment is first used, which init_app does
+    application.jinja_environment = timed_compile_environment(application.jinja_environment)
 
-    init_app(
-        application,
-        configs[config_name],
-        data_api_client=data_api_client,
-        login_manager=login_manager,
-    )
+    with _startup_phase(application, "init_app"):
+        init_app(
+            application,
+            configs[config_name],
+            data_api_client=data_api_client,
+            login_manager=login_manager,
+        )
+        init_bytecode_cache(application)
 
-    # replace placeholder _content_loader_factory with properly initialized one
-    global _content_loader_factory
-    _content_loader_factory = _make_content_loader_factory(
-        application,
-        data_api_client.find_frameworks().get('frameworks'),
-    )
+    # registered ahead of the app's own request hooks, so that the time they take counts towards requests' durations
+    init_instrumentation(application)
 
-    from .metrics import metrics as metrics_blueprint, gds_metrics
-    from .main import main as main_blueprint
-    from .main import public as public_blueprint
-    from .status import status as status_blueprint
-    from dmutils.external import external as external_blueprint
+    # don't carry over any cached data from a previously created app
+    clear_all_caches()
 
-    application.register_blueprint(metrics_blueprint, url_prefix='/admin')
-    application.register_blueprint(status_blueprint, url_prefix='/admin')
-    application.register_blueprint(main_blueprint, url_prefix='/admin')
-    application.register_blueprint(public_blueprint, url_prefix='/admin')
-
-    # Must be registered last so that any routes declared in the app are registered first (i.e. take precedence over
-    # the external NotImplemented routes in the dm-utils external blueprint).
-    application.register_blueprint(external_blueprint)
+    # replace placeholder _content_loader_factory with properly initialized one
+    global _content_loader_factory
+    with _startup_phase(application, "content_loader"):
+        if application.config["DM_LAZY_CONTENT_LOADING"]:
+            _content_loader_factory = _make_lazy_content_loader_factory(application)
+        else:
+            _content_loader_factory = _make_content_loader_factory(
+                application,
+                data_api_client.find_frameworks().get('frameworks'),
+            )
+
+    with _startup_phase(application, "blueprints"):
+        from .metrics import metrics as metrics_blueprint, gds_metrics
+        from .main import main as main_blueprint
+        from .main import public as public_blueprint
+        from .status import status as status_blueprint
+        from dmutils.external import external as external_blueprint
+
+        application.register_blueprint(metrics_blueprint, url_prefix='/admin')
+        application.register_blueprint(status_blueprint, url_prefix='/admin')
+        application.register_blueprint(main_blueprint, url_prefix='/admin')
+        application.register_blueprint(public_blueprint, url_prefix='/admin')
+
+        # Must be registered last so that any routes declared in the app are registered first (i.e. take precedence
+        # over the external NotImplemented routes in the dm-utils external blueprint).
+        application.register_blueprint(external_blueprint)
 
     login_manager.login_message = None  # don't flash message to user
     login_manager.login_view = '/user/login'
@@ -127,16 +205,24 @@ def create_app(config_name):
         if request.path != '/' and request.path.endswith('/'):
             return redirect(request.path[:-1], code=301)
 
-    @application.before_request
-    def refresh_session():
-        session.permanent = True
-        session.modified = True
+    init_session_refresh(
+        application,
+        exempt_path_prefixes=(
+            application.static_url_path,
+            '/admin/_status',
+            f'/admin{gds_metrics.metrics_path}',
+        ),
+    )
 
     application.add_template_filter(parse_document_upload_time)
 
+    if application.config["DM_PRECOMPILE_TEMPLATES"]:
+        with _startup_phase(application, "precompile_templates"):
+            precompile_templates(application)
+
     return application
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.load_user(data_api_client, user_id)
+    return load_cached_user(data_api_client, user_id)
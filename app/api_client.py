@@ -0,0 +1,114 @@
+import os
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock
+
+import requests
+from dmapiclient import DataAPIClient
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .metric_definitions import (
+    DATA_API_CONNECTIONS_OPENED_TOTAL,
+    DATA_API_POOL_CONNECTIONS_IN_USE,
+    DATA_API_POOL_SATURATED_TOTAL,
+)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        DATA_API_CONNECTIONS_OPENED_TOTAL.inc()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        DATA_API_CONNECTIONS_OPENED_TOTAL.inc()
+        return super()._new_conn()
+
+
+class PoolMetricsHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter which counts the connections it opens and how often all of its pooled connections are in use.
+
+    Once they are, further concurrent requests each open a connection of their own, which is closed afterwards rather
+    than being kept alive.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._in_use = 0
+        self._in_use_lock = Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, *args, **kwargs):
+        with self._in_use_lock:
+            self._in_use += 1
+            if self._in_use > self._pool_maxsize:
+                DATA_API_POOL_SATURATED_TOTAL.inc()
+        DATA_API_POOL_CONNECTIONS_IN_USE.inc()
+        try:
+            return super().send(*args, **kwargs)
+        finally:
+            DATA_API_POOL_CONNECTIONS_IN_USE.dec()
+            with self._in_use_lock:
+                self._in_use -= 1
+
+
+class PooledDataAPIClient(DataAPIClient):
+    """A DataAPIClient which keeps its connections to the API alive between requests.
+
+    DataAPIClient makes every request through a new requests Session, and so over a new connection. This client shares
+    one Session (and its pool of connections) between all the threads of a process. Sessions are never shared with
+    forked processes, as their connections' sockets would be. The pool's size and whether responses may be compressed
+    are configured by `init_app`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool_size = 10
+        self._compression = True
+        self._sessions = {}
+        self._sessions_lock = Lock()
+
+    def init_app(self, app):
+        super().init_app(app)
+        # each thread which may use the client at once (those serving requests, those making API calls for them
+        # concurrently and those making background jobs' API calls) gets a connection of its own
+        self._pool_size = app.config["DM_DATA_API_POOL_SIZE"] or (
+            app.config["DM_WEB_SERVER_THREADS"]
+            + app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"]
+            + app.config["DM_BACKGROUND_JOB_MAX_WORKERS"]
+        )
+        self._compression = app.config["DM_DATA_API_COMPRESSION"]
+        with self._sessions_lock:
+            self._sessions.clear()
+
+    def _new_session(self, retry_read_timeouts):
+        session = requests.Session()
+        # the same session is used on behalf of every user, so mustn't carry cookies from one request to the next
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        if not self._compression:
+            session.headers["Accept-Encoding"] = "identity"
+        # take dmapiclient's retry policy from the adapter of the session it would otherwise have used
+        retry = super()._requests_retry_session(retry_read_timeouts=retry_read_timeouts).get_adapter(
+            "https://"
+        ).max_retries
+        adapter = PoolMetricsHTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _requests_retry_session(self, *, retry_read_timeouts=True):
+        key = (os.getpid(), retry_read_timeouts)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._sessions[key] = self._new_session(retry_read_timeouts)
+        return session
@@ -0,0 +1,181 @@
+from dmcontent.questions import Date, DynamicList, Hierarchy, List, Multiquestion, Pricing, Question
+from dmcontent.utils import get_option_value
+
+
+# the values dmcontent's QuestionSummary.is_empty considers unanswered
+_EMPTY_VALUES = ('', [], None)
+
+
+def _compile_depends(question):
+    return tuple((depends["on"], depends["being"]) for depends in question.get("depends", ()))
+
+
+def _is_shown(depends, service_data):
+    return all(on in service_data and service_data[on] in being for on, being in depends)
+
+
+def _raw_options(question):
+    # the options as written in the content. Question.options renders their descriptions with the question's context,
+    # which a question being compiled doesn't have
+    return question._data.get("options", ())
+
+
+def _iter_option_values(options):
+    for option in options:
+        yield get_option_value(option)
+        yield from _iter_option_values(option.get("options", ()))
+
+
+def _compile_raw_value(question):
+    question_id = question.id
+    if question.get("assuranceApproach"):
+        return lambda service_data: service_data.get(question_id, {}).get("value", "")
+    return lambda service_data: service_data.get(question_id, "")
+
+
+def _compile_is_empty(question):
+    """Return a function of the service data equivalent to `question.summary(service_data).is_empty`"""
+    question_id = question.id
+
+    if isinstance(question, Multiquestion):
+        sub_questions = tuple(
+            (_compile_depends(sub_question), _compile_is_empty(sub_question)) for sub_question in question.questions
+        )
+        return lambda service_data: all(
+            is_empty(service_data) for depends, is_empty in sub_questions if _is_shown(depends, service_data)
+        )
+
+    if isinstance(question, Pricing):
+        price_fields = tuple(question.fields.get(field) for field in ("price", "minimum_price", "maximum_price"))
+        return lambda service_data: not any(service_data.get(field) for field in price_fields)
+
+    if isinstance(question, Hierarchy):
+        # an option is only shown if it or one of its descendants was selected, so the summary is empty exactly when
+        # nothing anywhere in the tree was
+        option_values = frozenset(_iter_option_values(_raw_options(question)))
+        return lambda service_data: option_values.isdisjoint(service_data.get(question_id, []))
+
+    if isinstance(question, Date):
+        return lambda service_data: service_data.get(question_id, "") in _EMPTY_VALUES
+
+    if isinstance(question, List) and question.get("before_summary_value"):
+        return lambda service_data: False
+
+    raw_value = _compile_raw_value(question)
+    if not isinstance(question, List) and question.get("type") == "number" and question.get("unit"):
+        # any value other than '' is formatted with its unit
+        return lambda service_data: raw_value(service_data) == ""
+    return lambda service_data: raw_value(service_data) in _EMPTY_VALUES
+
+
+def _compile_value(question):
+    """Return a function of the service data equivalent to `question.summary(service_data).value`, for the questions
+    whose answers can trigger followups"""
+    is_list = type(question) is List
+    if not (type(question) is Question or is_list) or question.get("before_summary_value") or (
+        question.get("type") == "number" and question.get("unit")
+    ):
+        # followups only ever hang off plain radios and checkboxes, so we don't bother compiling anything else
+        return lambda service_data: question.filter(service_data).summary(service_data).value
+
+    raw_value = _compile_raw_value(question)
+    labels = tuple(
+        (option["value"], option["label"])
+        for option in _raw_options(question) if "label" in option and "value" in option
+    )
+
+    def label_for(value):
+        return next((label for option_value, label in labels if option_value == value), value)
+
+    def value(service_data):
+        value = raw_value(service_data)
+        if not (labels and value):
+            return value
+        return [label_for(v) for v in value] if is_list else label_for(value)
+    return value
+
+
+def _compile_answer_required(question):
+    """Return a function of the service data equivalent to `question.summary(service_data).answer_required` for a
+    question which has already been found to be shown"""
+    if question.is_optional:
+        return lambda service_data: False
+
+    if isinstance(question, DynamicList):
+        # the questions of a dynamic list depend on the service data in ways we don't attempt to compile
+        return lambda service_data: question.filter(service_data).summary(service_data).answer_required
+
+    if isinstance(question, Multiquestion):
+        return _compile_multiquestion_answer_required(question)
+
+    return _compile_is_empty(question)
+
+
+def _compile_multiquestion_answer_required(question):
+    sub_questions = tuple(
+        (
+            sub_question.id,
+            _compile_depends(sub_question),
+            _compile_answer_required(sub_question),
+            tuple(sub_question.get("followup", {}).items()),
+            _compile_value(sub_question) if sub_question.get("followup") else None,
+        )
+        for sub_question in question.questions
+    )
+
+    def answer_required(service_data):
+        # this follows MultiquestionSummary.answer_required, only considering the sub-questions that are shown
+        shown = [sub_question for sub_question in sub_questions if _is_shown(sub_question[1], service_data)]
+        answer_required_by_id = {sub_question_id: required for sub_question_id, _, required, _, _ in shown}
+        ignorable_ids = set()
+
+        for sub_question_id, _, required, followups, value in shown:
+            if not followups:
+                continue
+
+            if sub_question_id not in ignorable_ids:
+                if required(service_data):
+                    return True
+                ignorable_ids.add(sub_question_id)
+
+            answer = value(service_data)
+            answers_provided = frozenset(answer if isinstance(answer, list) else (answer,))
+            for followup_id, answers_triggering_followup in followups:
+                if answers_provided.intersection(answers_triggering_followup) and \
+                        answer_required_by_id[followup_id](service_data):
+                    return True
+                ignorable_ids.add(followup_id)
+
+        return any(
+            required(service_data)
+            for sub_question_id, _, required, _, _ in shown if sub_question_id not in ignorable_ids
+        )
+    return answer_required
+
+
+class CompiledManifest:
+    """A ContentManifest reduced to just what's needed to count the required questions a service hasn't answered.
+
+    `count_unanswered_questions(manifest.filter(service).summary(service))[0]` builds a filtered copy of every section
+    and question, then a summary object for each question, for every service it is asked about. Here each question's
+    `depends` and `answer_required` rules are worked out once, up front, into plain functions of the service data, so
+    counting becomes a single pass over the questions without building any manifests, sections or questions.
+
+    Dynamic lists, whose questions are generated from the service data itself, are still evaluated by dmcontent.
+    The rules compiled here follow those of the pinned version of dmcontent, and are checked against it by
+    tests/app/test_compiled_manifest.py, so must be revisited when it is upgraded.
+    """
+
+    def __init__(self, manifest):
+        self._questions = tuple(
+            (_compile_depends(question), _compile_answer_required(question))
+            for section in manifest.sections
+            for question in section.questions
+        )
+
+    def count_unanswered_required(self, service_data):
+        """Return the number of required questions shown for `service_data` which it hasn't answered"""
+        return sum(
+            1 for depends, answer_required in self._questions
+            if _is_shown(depends, service_data) and answer_required(service_data)
+        )
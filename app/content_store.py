@@ -0,0 +1,217 @@
+from threading import Event, Lock
+from types import MappingProxyType
+
+from dmcontent.content_loader import ContentLoader, ContentManifest
+from dmcontent.errors import ContentNotFoundError
+
+from .compiled_manifest import CompiledManifest, _compile_depends, _is_shown
+from .instrumentation import span
+
+
+def _freeze_manifest(sections):
+    return tuple(MappingProxyType(dict(section)) for section in sections)
+
+
+class _AssessedQuestion:
+    """A declaration question along with when it's shown and how its answer is assessed"""
+
+    def __init__(self, question):
+        self.question = question
+        self.depends = _compile_depends(question)
+        assessment = question.get("assessment") or {}
+        self.pass_values = tuple(assessment.get("passIfIn", ()))
+        self.discretionary = bool(assessment.get("discretionary"))
+        self.nested_questions = MappingProxyType({
+            nested_question.id: _AssessedQuestion(nested_question)
+            for nested_question in (question.questions if question.type == "multiquestion" else ())
+        })
+
+    def assess(self, value):
+        """Return "Pass", "Discretionary" or "Fail" for an answer's summary value, or None if it isn't assessed"""
+        if not self.pass_values:
+            return None
+        if value in self.pass_values:
+            return "Pass"
+        return "Discretionary" if self.discretionary else "Fail"
+
+
+class DeclarationAnswer:
+    """A question shown for a declaration: its number, its summary (the dmcontent QuestionSummary which the toolkit's
+    summary tables render) and the assessment of its answer, along with those of each of a multiquestion's shown
+    questions, in order"""
+
+    def __init__(self, number, summary, assessment, nested_assessments):
+        self.number = number
+        self.summary = summary
+        self.assessment = assessment
+        self.nested_assessments = nested_assessments
+
+
+class DeclarationLayout:
+    """The parts of a framework's declaration manifest which don't depend on a supplier's answers, worked out once.
+
+    Each section's name and each question's `depends` rules and assessment are kept in manifest order, so that a
+    declaration's summary is just a pass over the questions shown for it, without building a filtered manifest.
+    Section names are rendered without the answers, which none of them use.
+    """
+
+    def __init__(self, manifest):
+        self.sections = tuple(
+            (section.id, section.name, tuple(_AssessedQuestion(question) for question in section.questions))
+            for section in manifest.sections
+        )
+
+    def summary(self, declaration):
+        """Return a list of `(section_id, section_name, answers)` for the sections with questions shown for
+        `declaration`, where `answers` is a list of DeclarationAnswers numbered as `manifest.filter(declaration)`
+        would number its questions"""
+        sections = []
+        number = 0
+        for section_id, section_name, questions in self.sections:
+            answers = []
+            for assessed_question in questions:
+                if not _is_shown(assessed_question.depends, declaration):
+                    continue
+                number += 1
+                # the question's text and its multiquestion's shown questions may depend on the answers
+                summary = assessed_question.question.filter(declaration).summary(declaration)
+                answers.append(DeclarationAnswer(
+                    number,
+                    summary,
+                    assessed_question.assess(summary.value),
+                    [
+                        assessed_question.nested_questions[nested_summary.id].assess(nested_summary.value)
+                        for nested_summary in summary.questions
+                    ] if assessed_question.nested_questions else [],
+                ))
+            if answers:
+                sections.append((section_id, section_name, answers))
+        return sections
+
+
+class TimedContentManifest(ContentManifest):
+    """A ContentManifest which times its filtering as a span of the request it's filtered in"""
+
+    def filter(self, *args, **kwargs):
+        with span("content", "filter"):
+            return super().filter(*args, **kwargs)
+
+
+class SharedContentLoader(ContentLoader):
+    """A read-only snapshot of an already-populated ContentLoader, safe to share between all threads.
+
+    `ContentLoader.get_manifest` builds a brand new ContentManifest (and with it new ContentSection and Question
+    objects) every time it is called, and these per-call objects are the only things `.filter(inplace_allowed=True)`
+    and `.summary(inplace_allowed=True)` ever modify. The loaded manifest data they are built from is never written
+    to, so instead of giving each thread its own deepcopy of every manifest we freeze that data once and hand out the
+    same instance to everyone. Each `get_manifest` call is effectively the "copy" in copy-on-write.
+
+    Anything worked out from a manifest alone can be kept on the snapshot too: a DeclarationLayout of each loaded
+    declaration manifest is built along with it, and CompiledManifests are built as they are first needed.
+
+    Attempting to load further content into a SharedContentLoader raises a TypeError - load it into the source
+    ContentLoader and take a new snapshot instead.
+    """
+
+    def __init__(self, source):
+        super().__init__(source.content_path)
+        self._content = MappingProxyType({
+            framework_slug: MappingProxyType({
+                manifest_name: _freeze_manifest(sections)
+                for manifest_name, sections in manifests.items()
+            })
+            for framework_slug, manifests in source._content.items()
+        })
+        # messages and metadata are only ever read by ContentLoader once loaded, so these can be shared as they are
+        self._messages = source._messages
+        self._metadata = source._metadata
+        self._compiled_manifests = {}
+        self._declaration_layouts = MappingProxyType({
+            framework_slug: DeclarationLayout(self.get_manifest(framework_slug, "declaration"))
+            for framework_slug, manifests in self._content.items()
+            if "declaration" in manifests
+        })
+
+    def get_manifest(self, framework_slug, manifest_name):
+        with span("content", "get_manifest"):
+            try:
+                sections = self._content[framework_slug][manifest_name]
+            except KeyError:
+                raise ContentNotFoundError(f"Content not found for {framework_slug} and {manifest_name}")
+            return TimedContentManifest(sections)
+
+    get_builder = get_manifest
+
+    def get_compiled_manifest(self, framework_slug, manifest_name):
+        """Return a CompiledManifest of the named manifest, compiling it the first time it is asked for. Raises
+        ContentNotFoundError as `get_manifest` would."""
+        key = (framework_slug, manifest_name)
+        compiled_manifest = self._compiled_manifests.get(key)
+        if compiled_manifest is None:
+            # two threads may race to compile the same manifest, but it doesn't matter which of them wins
+            compiled_manifest = self._compiled_manifests.setdefault(
+                key,
+                CompiledManifest(self.get_manifest(framework_slug, manifest_name)),
+            )
+        return compiled_manifest
+
+    def get_declaration_layout(self, framework_slug):
+        """Return the DeclarationLayout of the framework's declaration manifest, raising ContentNotFoundError if it
+        wasn't loaded"""
+        try:
+            return self._declaration_layouts[framework_slug]
+        except KeyError:
+            raise ContentNotFoundError(f"Content not found for {framework_slug} and declaration")
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    load_manifest = lazy_load_manifests = load_messages = load_metadata = _read_only
+
+
+class LazyContentLoader:
+    """Stands in for a SharedContentLoader, loading each framework's content the first time it is asked for.
+
+    `load_framework(framework_slug)` should return a ContentLoader populated with that framework's manifests, which we
+    take a SharedContentLoader snapshot of. Each framework gets a snapshot of its own, so loading one framework never
+    waits for (or re-freezes) any other. `preload` loads a list of frameworks in order, typically in a background
+    thread, so that requests only have to load content themselves if they arrive before it gets to their framework.
+    """
+
+    def __init__(self, load_framework):
+        self._load_framework = load_framework
+        self._snapshots = {}
+        self._framework_locks = {}
+        self._lock = Lock()
+        # set once `preload` has finished, whether or not it loaded everything successfully
+        self.preloaded = Event()
+
+    def _get_snapshot(self, framework_slug):
+        snapshot = self._snapshots.get(framework_slug)
+        if snapshot is None:
+            with self._lock:
+                framework_lock = self._framework_locks.setdefault(framework_slug, Lock())
+            # only load each framework once, however many threads want it at the same time
+            with framework_lock:
+                snapshot = self._snapshots.get(framework_slug)
+                if snapshot is None:
+                    snapshot = self._snapshots[framework_slug] = SharedContentLoader(
+                        self._load_framework(framework_slug)
+                    )
+        return snapshot
+
+    def preload(self, framework_slugs):
+        try:
+            for framework_slug in framework_slugs:
+                self._get_snapshot(framework_slug)
+        finally:
+            self.preloaded.set()
+
+    def get_manifest(self, framework_slug, manifest_name):
+        return self._get_snapshot(framework_slug).get_manifest(framework_slug, manifest_name)
+
+    def get_compiled_manifest(self, framework_slug, manifest_name):
+        return self._get_snapshot(framework_slug).get_compiled_manifest(framework_slug, manifest_name)
+
+    def get_declaration_layout(self, framework_slug):
+        return self._get_snapshot(framework_slug).get_declaration_layout(framework_slug)
@@ -0,0 +1,141 @@
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock, local
+
+import boto3
+from flask import current_app, has_request_context, request
+
+from .metric_definitions import OUTBOUND_CALL_DURATION_SECONDS
+
+
+# the key in a request's WSGI environ of its RequestSpans. The environ (unlike flask.g) is shared with copies of the
+# request context, so calls made by fetch_concurrently's worker threads are counted against the request too
+REQUEST_SPANS_ENVIRON_KEY = "dm.request_spans"
+
+logger = logging.getLogger(__name__)
+
+# whether the current thread is already inside an instrumented client method, so that a method which calls another
+# isn't counted twice
+_in_client_call = local()
+
+
+class RequestSpans:
+    """The number of calls of each (kind, operation) made while serving a request, and the total time they took"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._lock = Lock()
+        self._totals = {}  # (kind, operation) -> [count, seconds]
+
+    def add(self, kind, operation, duration):
+        with self._lock:
+            totals = self._totals.setdefault((kind, operation), [0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+
+    def top(self, n):
+        """Return the `n` (kind, operation, count, seconds) which took longest in total, longest first"""
+        with self._lock:
+            spans = [(kind, operation, count, seconds) for (kind, operation), (count, seconds) in self._totals.items()]
+        return sorted(spans, key=lambda span: span[3], reverse=True)[:n]
+
+
+def _record(kind, operation, duration):
+    OUTBOUND_CALL_DURATION_SECONDS.labels(request.endpoint or "", kind, operation).observe(duration)
+    request_spans = request.environ.get(REQUEST_SPANS_ENVIRON_KEY)
+    if request_spans is not None:
+        request_spans.add(kind, operation, duration)
+
+
+@contextmanager
+def span(kind, operation):
+    """Time the enclosed block as a call of `operation` (of type `kind`), if it's made while serving a request"""
+    if not has_request_context():
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(kind, operation, time.perf_counter() - start)
+
+
+def _timed_method(kind, name, method):
+    @wraps(method)
+    def timed_method(*args, **kwargs):
+        if getattr(_in_client_call, "active", False):
+            return method(*args, **kwargs)
+        _in_client_call.active = True
+        try:
+            with span(kind, name):
+                return method(*args, **kwargs)
+        finally:
+            _in_client_call.active = False
+    return timed_method
+
+
+def instrumented_client_class(client_class, kind):
+    """Return a subclass of `client_class` which times each call of its public methods as a span of type `kind`.
+
+    Generator methods (such as the API client's `find_*_iter`) aren't timed themselves, but the calls they make are.
+    """
+    return type(f"Instrumented{client_class.__name__}", (client_class,), {
+        name: _timed_method(kind, name, method)
+        for name, method in inspect.getmembers(client_class, inspect.isfunction)
+        if not name.startswith("_") and name != "init_app" and not inspect.isgeneratorfunction(method)
+    })
+
+
+def _before_s3_call(context, **kwargs):
+    context["dm_started_at"] = time.perf_counter()
+
+
+def _after_s3_call(model, context, **kwargs):
+    started_at = context.get("dm_started_at")
+    if started_at is not None and has_request_context():
+        _record("s3", model.name, time.perf_counter() - started_at)
+
+
+def _log_slow_request(response):
+    request_spans = request.environ.get(REQUEST_SPANS_ENVIRON_KEY)
+    if request_spans is None:
+        return response
+
+    duration = time.perf_counter() - request_spans.started_at
+    if duration > current_app.config["DM_SLOW_REQUEST_THRESHOLD"]:
+        logger.warning(
+            "Slow request to {endpoint} took {duration_real}s, most of it in {top_spans}",
+            extra={
+                "endpoint": request.endpoint,
+                "duration_real": duration,
+                "top_spans": "; ".join(
+                    f"{operation} ({kind}) x{count} {seconds:.3f}s"
+                    for kind, operation, count, seconds in request_spans.top(
+                        current_app.config["DM_SLOW_REQUEST_TOP_SPANS"]
+                    )
+                ) or "no instrumented calls",
+            },
+        )
+    return response
+
+
+def init_instrumentation(application):
+    """Count the time each request spends in instrumented calls, and log those which take longest in slow requests.
+
+    S3 calls are timed through the events of boto3's default session, which `dmutils.s3.S3` creates its resources
+    from.
+    """
+    events = boto3._get_default_session().events
+    # the first event emitted for each call (before-call itself may be short-circuited by earlier handlers)
+    events.register("before-parameter-build.s3", _before_s3_call, unique_id="dm-instrumentation-before-s3-call")
+    events.register("after-call.s3", _after_s3_call, unique_id="dm-instrumentation-after-s3-call")
+
+    @application.before_request
+    def start_request_spans():
+        request.environ[REQUEST_SPANS_ENVIRON_KEY] = RequestSpans()
+
+    application.after_request(_log_slow_request)
@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from datetime import datetime, time, timedelta, timezone
+
+from dateutil.parser import parse as parse_date
+from dmutils.formats import datetimeformat
+
+from .caching import TTLCache
+
+
+agreements_index_cache = TTLCache("agreements_index", "DM_AGREEMENTS_INDEX_CACHE_TTL")
+# keyed by (framework slug, status filter)
+agreements_listing_cache = TTLCache("agreements_listing", "DM_AGREEMENTS_INDEX_CACHE_TTL")
+# keyed by (framework slug, lot slug)
+lot_suppliers_cache = TTLCache("agreements_lot_suppliers", "DM_AGREEMENTS_INDEX_CACHE_TTL")
+# keyed by (supplier id, framework slug)
+supplier_lot_names_cache = TTLCache("supplier_lot_names", "DM_SUPPLIER_LOT_NAMES_CACHE_TTL", maxsize=5000)
+
+
+def invalidate_agreements(framework_slug):
+    """Forget any cached agreement statuses for `framework_slug`, to be called when one of its agreements changes"""
+    agreements_index_cache.invalidate(framework_slug)
+    agreements_listing_cache.invalidate_where(lambda key: key[0] == framework_slug)
+
+
+def get_supplier_lot_names(client, supplier_id, framework):
+    """Return a (possibly cached) sorted tuple of the names of the lots on which `supplier_id` has a successful
+    service on `framework`, as shown alongside their agreement"""
+    def fetch():
+        if framework["status"] in ("live", "expired"):
+            # If the framework is live or expired we don't need to filter drafts, we only care about successful services
+            services = client.find_services_iter(supplier_id=supplier_id, framework=framework["slug"])
+        else:
+            # If the framework has not yet become live we need to filter out unsuccessful services
+            services = (
+                service
+                for service in client.find_draft_services_iter(supplier_id=supplier_id, framework=framework["slug"])
+                if service["status"] == "submitted"
+            )
+        return tuple(sorted({service["lotName"] for service in services}))
+
+    return supplier_lot_names_cache.get((supplier_id, framework["slug"]), fetch)
+
+
+def get_lot_supplier_ids(client, framework, lot_slug):
+    """Return a (possibly cached) frozenset of the ids of suppliers with a successful service on the given lot of
+    `framework`, using the same definition of successful as the agreement page"""
+    def fetch():
+        if framework["status"] in ("live", "expired"):
+            services = client.find_services_iter(framework=framework["slug"], lot=lot_slug)
+        else:
+            services = client.find_draft_services_by_framework_iter(framework["slug"], status="submitted", lot=lot_slug)
+        return frozenset(service["supplierId"] for service in services)
+
+    return lot_suppliers_cache.get((framework["slug"], lot_slug), fetch)
+
+
+class SupplierFrameworkIndex:
+    """An ordered list of a framework's supplier frameworks, indexed for finding the next one after a given supplier
+    which has one of a set of agreement statuses.
+
+    `status_filters` are the status filters (each a comma-separated list of agreement statuses) which will be used to
+    look up successors. For each of these, and for no filter at all, the successor of every position in the list is
+    precomputed, so lookups take constant time and the index is never modified once built.
+    """
+    def __init__(self, supplier_frameworks, status_filters):
+        self.supplier_frameworks = tuple(supplier_frameworks)
+        self._positions = {}
+        for position, supplier_framework in enumerate(self.supplier_frameworks):
+            # as with a linear scan, the first entry for a supplier wins
+            self._positions.setdefault(supplier_framework.get("supplierId"), position)
+
+        self._successors = {
+            status_filter: self._build_successors(status_filter.split(",") if status_filter else None)
+            for status_filter in (None, *status_filters)
+        }
+
+    def _build_successors(self, statuses):
+        successors = [None] * len(self.supplier_frameworks)
+        next_position = None
+        for position in reversed(range(len(self.supplier_frameworks))):
+            successors[position] = next_position
+            if statuses is None or self.supplier_frameworks[position].get("agreementStatus") in statuses:
+                next_position = position
+        return tuple(successors)
+
+    def __contains__(self, supplier_id):
+        return supplier_id in self._positions
+
+    def next_after(self, supplier_id, status_filter=None):
+        """Return the first supplier framework after `supplier_id`'s which matches `status_filter`, or None if there
+        isn't one. Raises KeyError if `supplier_id` isn't in the index."""
+        successor = self._successors[status_filter or None][self._positions[supplier_id]]
+        return None if successor is None else self.supplier_frameworks[successor]
+
+
+class AgreementsListing:
+    """A framework's returned agreements, with their return dates parsed and formatted once, indexed for sorting,
+    filtering by date and paging.
+
+    The supplier framework dicts this holds are copies, with `agreementReturnedAt` formatted for display.
+    """
+    # sort order name -> (key function on (supplier framework, returned at), reverse)
+    SORT_ORDERS = {
+        "name": (lambda entry: (entry[0].get("supplierName") or "").lower(), False),
+        "oldest": (lambda entry: entry[1], False),
+        "newest": (lambda entry: entry[1], True),
+    }
+
+    def __init__(self, supplier_frameworks):
+        entries = []
+        for supplier_framework in supplier_frameworks:
+            returned_at = parse_date(supplier_framework["agreementReturnedAt"])
+            if returned_at.tzinfo is None:
+                returned_at = returned_at.replace(tzinfo=timezone.utc)
+            entries.append((
+                {**supplier_framework, "agreementReturnedAt": datetimeformat(returned_at)},
+                returned_at,
+            ))
+        self._entries = tuple(entries)
+
+        self._orders = {None: tuple(range(len(self._entries)))}
+        for sort, (key, reverse) in self.SORT_ORDERS.items():
+            self._orders[sort] = tuple(sorted(
+                range(len(self._entries)), key=lambda position: key(self._entries[position]), reverse=reverse,
+            ))
+        self._returned_ats = tuple(self._entries[position][1] for position in self._orders["oldest"])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def select(self, sort=None, supplier_ids=None, returned_from=None, returned_to=None):
+        """Return the positions of the agreements matching the given filters in `sort` order (None meaning the order
+        the agreements were given in), to be passed to `page`.
+
+        `returned_from` and `returned_to` are inclusive dates, in UTC. If `supplier_ids` is given only agreements from
+        those suppliers are included.
+        """
+        positions = self._orders[sort]
+
+        if returned_from is not None or returned_to is not None:
+            start = 0 if returned_from is None else bisect_left(
+                self._returned_ats, datetime.combine(returned_from, time(), tzinfo=timezone.utc),
+            )
+            end = len(self._returned_ats) if returned_to is None else bisect_left(
+                self._returned_ats, datetime.combine(returned_to + timedelta(days=1), time(), tzinfo=timezone.utc),
+            )
+            in_range = frozenset(self._orders["oldest"][start:end])
+            positions = [position for position in positions if position in in_range]
+
+        if supplier_ids is not None:
+            positions = [
+                position for position in positions if self._entries[position][0].get("supplierId") in supplier_ids
+            ]
+
+        return positions
+
+    def page(self, positions, page, page_size):
+        """Return the supplier frameworks at `positions` on (1-indexed) page `page` of `page_size` items"""
+        return [self._entries[position][0] for position in positions[(page - 1) * page_size:page * page_size]]
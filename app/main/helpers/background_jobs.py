@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event, Lock, Thread
+
+from flask import current_app
+
+
+class BackgroundJob:
+    """Progress of a long-running operation over `total` items, updated by the thread running it"""
+    def __init__(self, description, total):
+        self.description = description
+        self.total = total
+        self.started_at = datetime.utcnow()
+        self.completed = 0
+        self.errors = {}  # item id -> exception
+        self._lock = Lock()
+        self._finished = Event()
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    @property
+    def succeeded(self):
+        return self.completed - len(self.errors)
+
+    def item_done(self, item_id, exception=None):
+        with self._lock:
+            self.completed += 1
+            if exception is not None:
+                self.errors[item_id] = exception
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    @property
+    def executor(self):
+        """The pool of worker threads for the job's concurrent API calls, which is shared by all background jobs but
+        not by requests"""
+        return _get_executor()
+
+
+_jobs = {}
+_jobs_lock = Lock()
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config["DM_BACKGROUND_JOB_MAX_WORKERS"],
+                thread_name_prefix="background-job-worker",
+            )
+        return _executor
+
+
+def start_background_job(key, description, total, func):
+    """Run `func(job)` in a new thread with an app context, returning its BackgroundJob.
+
+    Only one job may run for a given `key` at a time: if one is already running, that job is returned instead and
+    `func` is not called. Jobs are tracked in-process, so their progress is only visible to requests served by this
+    process.
+    """
+    app = current_app._get_current_object()
+
+    with _jobs_lock:
+        existing_job = _jobs.get(key)
+        if existing_job is not None and not existing_job.finished:
+            return existing_job
+        job = _jobs[key] = BackgroundJob(description, total)
+
+    def run():
+        with app.app_context():
+            app.logger.info(
+                "Background job {key} started: {description}", extra={"key": key, "description": description},
+            )
+            try:
+                func(job)
+            except Exception:
+                app.logger.exception("Background job {key} failed", extra={"key": key})
+            else:
+                app.logger.info(
+                    "Background job {key} finished",
+                    extra={"key": key, "completed": job.completed, "error_count": len(job.errors)},
+                )
+            finally:
+                job._finished.set()
+
+    Thread(target=run, name=f"background-job-{key}", daemon=True).start()
+    return job
+
+
+def get_background_job(key):
+    """Return the most recent BackgroundJob for `key`, forgetting it if it has finished so it's only reported once"""
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and job.finished:
+            del _jobs[key]
+        return job
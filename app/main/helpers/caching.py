@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from threading import Event, Lock
+from time import monotonic
+from weakref import WeakSet
+
+from flask import current_app, has_app_context
+
+from ...metric_definitions import CACHE_REQUESTS_TOTAL
+
+
+_all_caches = WeakSet()
+
+
+class _Flight:
+    """A fetch of a cache key which is currently in progress, for other requesters of the same key to wait on"""
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+        self.exception = None
+
+
+class TTLCache:
+    """Thread-safe, process-wide cache of values which expire `ttl` seconds after they were fetched.
+
+    The ttl (in seconds) is read from the app config key `ttl_config_key` on each lookup, so a ttl of zero (or no app
+    context) disables the cache entirely. If `maxsize` is given, the least recently used entries are evicted to keep
+    the cache at that size.
+
+    Concurrent lookups of the same missing key are "single-flight": only the first calls `fetch`, the rest wait for
+    and share its result (or exception). Hits and misses are counted in the `cache_requests_total` metric, labelled
+    with the cache's `name`.
+    """
+    def __init__(self, name, ttl_config_key, maxsize=None):
+        self.name = name
+        self.ttl_config_key = ttl_config_key
+        self.maxsize = maxsize
+
+        self._lock = Lock()
+        self._entries = OrderedDict()  # key -> (expiry time, value)
+        self._flights = {}
+        # incremented by every invalidation so that a fetch which was already in progress doesn't store a stale result
+        self._generation = 0
+
+        _all_caches.add(self)
+
+    @property
+    def ttl(self):
+        return (current_app.config.get(self.ttl_config_key) or 0) if has_app_context() else 0
+
+    def get(self, key, fetch):
+        ttl = self.ttl
+        if ttl <= 0:
+            return fetch()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > monotonic():
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS_TOTAL.labels(self.name, "hit").inc()
+                return entry[1]
+
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                is_leader = True
+            else:
+                is_leader = False
+
+        if not is_leader:
+            CACHE_REQUESTS_TOTAL.labels(self.name, "hit").inc()
+            flight.done.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return flight.value
+
+        CACHE_REQUESTS_TOTAL.labels(self.name, "miss").inc()
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.exception = e
+            raise
+        else:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, flight.value, ttl)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.value
+
+    def set(self, key, value):
+        ttl = self.ttl
+        if ttl > 0:
+            with self._lock:
+                self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Remove `key` from the cache, or all keys if `key` is None"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Remove all keys for which `predicate(key)` is true"""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+
+def clear_all_caches():
+    for cache in _all_caches:
+        cache.invalidate()
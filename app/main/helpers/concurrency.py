@@ -0,0 +1,121 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+from threading import Lock
+
+from flask import copy_current_request_context, current_app, has_app_context, has_request_context
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"],
+                thread_name_prefix="concurrent-fetch",
+            )
+        return _executor
+
+
+def _in_current_context(func):
+    """Wrap `func` so that it runs in (a copy of) the current request or app context when called in another thread"""
+    if has_request_context():
+        return copy_current_request_context(func)
+    if has_app_context():
+        app = current_app._get_current_object()
+
+        def func_in_app_context(*args, **kwargs):
+            with app.app_context():
+                return func(*args, **kwargs)
+        return func_in_app_context
+    return func
+
+
+def submit(func, *args, **kwargs):
+    """Schedule `func(*args, **kwargs)` to run on the shared, bounded pool of worker threads in the current flask
+    context, returning a concurrent.futures.Future.
+
+    Work submitted here must not itself wait on other work submitted here, as the pool may be exhausted.
+    """
+    return _get_executor().submit(_in_current_context(func), *args, **kwargs)
+
+
+def fetch_concurrently(*funcs):
+    """Call each of the argumentless callables `funcs` concurrently, returning a list of their results in the same
+    order.
+
+    Independent API calls made this way take as long as the slowest of them rather than the sum of them all. If any
+    call raises, the exception from the first such call (in argument order) is raised once all calls have finished,
+    much as it would have been had they been made one after the other.
+
+        supplier, framework = fetch_concurrently(
+            lambda: data_api_client.get_supplier(supplier_id)["suppliers"],
+            lambda: data_api_client.get_framework(framework_slug)["frameworks"],
+        )
+    """
+    futures = [submit(func) for func in funcs]
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def map_concurrently(func, items, batch_size, on_done=None, executor=None):
+    """Call `func(item)` for each of `items`, `batch_size` at a time, returning a list of `(result, exception)` pairs
+    in the same order as `items`.
+
+    Unlike `fetch_concurrently`, a failing call doesn't stop the others: its exception is returned rather than raised
+    so that the caller can report partial failures. If given, `on_done(item, exception)` is called (in the calling
+    thread) as each call finishes. Limiting the batch size stops one large operation from monopolising the pool.
+
+    Calls are made on the shared pool unless another `executor` is given, as long-running work outside a request
+    should do so that it doesn't hold up requests' calls.
+    """
+    if executor is None:
+        executor = _get_executor()
+    func = _in_current_context(func)
+    outcomes = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        futures = [executor.submit(func, item) for item in batch]
+        for item, future in zip(batch, futures):
+            exception = future.exception()
+            outcomes.append((None if exception else future.result(), exception))
+            if on_done is not None:
+                on_done(item, exception)
+    return outcomes
+
+
+def iter_prefetched(items, get_key, fetch, window, cache_size):
+    """Lazily yield `(item, fetch(get_key(item)))` for each of `items`, in order.
+
+    Fetches for up to `window` items ahead of the one being yielded are kept in flight concurrently, so a consumer
+    streaming the results waits for roughly one fetch per `window` items. Keys are looked up in a least recently used
+    cache of the last `cache_size` distinct keys' fetches first, so repeated keys are usually only fetched once.
+    Exceptions raised by `fetch` are raised when the corresponding item is reached.
+    """
+    items = iter(items)
+    futures = OrderedDict()  # key -> future, in least to most recently used order
+    pending = deque()
+
+    def schedule(item):
+        key = get_key(item)
+        future = futures.get(key)
+        if future is None:
+            future = futures[key] = submit(fetch, key)
+            if len(futures) > cache_size:
+                futures.popitem(last=False)
+        else:
+            futures.move_to_end(key)
+        pending.append((item, future))
+
+    for item in islice(items, max(window, 1)):
+        schedule(item)
+
+    while pending:
+        item, future = pending.popleft()
+        for next_item in islice(items, 1):
+            schedule(next_item)
+        yield item, future.result()
@@ -1,10 +1,19 @@
 import difflib
+import re
 from itertools import chain
 
 from dmcontent.questions import Multiquestion
-from flask import Markup, render_template
+from flask import Markup, escape, render_template
 from lxml import html
 
+from .caching import TTLCache
+
+
+# rendered diff tables, keyed by (archived service id, service revision, question id, table preamble template)
+diff_tables_cache = TTLCache("diff_tables", "DM_DIFF_TABLES_CACHE_TTL", maxsize=2000)
+
+_TRAILING_NON_SPACE_WHITESPACE = re.compile(r"[^\S ]+$")
+
 
 def _unpack_question(question):
     unpacked = []
@@ -29,22 +38,37 @@ def html_diff_tables_from_sections_iter(
         revision_1,
         revision_2,
         table_preamble_template=None,
+        renderer="direct",
+        cache_key=None,
 ):
-    html_diff = difflib.HtmlDiff()
+    """Yield (section slug, question id, table html) for each question in `sections` whose answer differs between
+    `revision_1` and `revision_2`.
+
+    `renderer` is a key of DIFF_TABLE_RENDERERS. If `cache_key` is given, it should identify both revisions (e.g. an
+    archived service id and the current service's revision) and rendered tables are cached under it.
+    """
+    render_table = DIFF_TABLE_RENDERERS[renderer]
 
     for section in sections:
         for question in chain.from_iterable(_question_iter(question) for question in section['questions']):
             q1, q2 = (r.get(question['id'], []) for r in (revision_1, revision_2,))
             if q1 != q2:
-                q1, q2 = (_get_value_for_difflib(q) for q in (q1, q2,))
-                yield section.slug, question.id, Markup(_clean_difflib_html_table(
-                    html_diff.make_table(q1, q2),
-                    table_preamble_template=table_preamble_template,
-                    table_preamble_context={
-                        "section": section,
-                        "question": question,
-                    },
-                ))
+                def render(q1=q1, q2=q2, section=section, question=question):
+                    return Markup(render_table(
+                        _get_value_for_difflib(q1),
+                        _get_value_for_difflib(q2),
+                        table_preamble_template=table_preamble_template,
+                        table_preamble_context={
+                            "section": section,
+                            "question": question,
+                        },
+                    ))
+
+                if cache_key is None:
+                    table_html = render()
+                else:
+                    table_html = diff_tables_cache.get((*cache_key, question.id, table_preamble_template), render)
+                yield section.slug, question.id, table_html
 
 
 def _get_value_for_difflib(thing):
@@ -56,6 +80,78 @@ def _get_value_for_difflib(thing):
         return thing
 
 
+def _render_difflib_table(lines_1, lines_2, table_preamble_template=None, table_preamble_context={}):
+    return _clean_difflib_html_table(
+        difflib.HtmlDiff().make_table(lines_1, lines_2),
+        table_preamble_template=table_preamble_template,
+        table_preamble_context=table_preamble_context,
+    )
+
+
+def _expand_tabs(line):
+    # as HtmlDiff does, so that tabs are compared as the spaces they're shown as
+    return line.replace(" ", "\0").expandtabs(8).replace(" ", "\t").replace("\0", " ").rstrip("\n")
+
+
+def _marked_content(text, tag):
+    """Return `text` from difflib's _mdiff escaped, with the changes it marks wrapped in `tag` elements and trailing
+    whitespace other than spaces removed, as the cleaned HtmlDiff table has it"""
+    text = _TRAILING_NON_SPACE_WHITESPACE.sub("", str(escape(text)))
+    for marker in ("\0+", "\0-", "\0^"):
+        text = text.replace(marker, f"<{tag}>")
+    return text.replace("\1", f"</{tag}>").replace("\t", " ")
+
+
+def _diff_row(line_number_1, content_1, line_number_2, content_2, removal=False, addition=False):
+    cells = []
+    for line_number, content, is_changed, change_class in (
+        (line_number_1, content_1, removal, "removal"),
+        (line_number_2, content_2, addition, "addition"),
+    ):
+        if line_number is None:
+            cells.append('<td class="line-number line-non-existent"></td>')
+            cells.append('<td class="line-content line-non-existent"></td>')
+        elif is_changed:
+            cells.append(f'<td class="line-number line-number-{change_class}">{line_number}</td>')
+            cells.append(f'<td class="line-content {change_class}">{content}</td>')
+        else:
+            cells.append(f'<td class="line-number">{line_number}</td>')
+            cells.append(f'<td class="line-content">{content}</td>')
+    return f"<tr>{''.join(cells)}</tr>"
+
+
+def _diff_rows(lines_1, lines_2):
+    # _mdiff is the generator HtmlDiff.make_table lays its rows out from, so lines are paired up (and their changed
+    # characters marked) exactly as the difflib renderer's are, including within replaced blocks of different lengths
+    lines_1, lines_2 = [_expand_tabs(line) for line in lines_1], [_expand_tabs(line) for line in lines_2]
+    for (line_number_1, text_1), (line_number_2, text_2), _ in difflib._mdiff(lines_1, lines_2):
+        # a side with no line has an empty line number
+        content_1, content_2 = _marked_content(text_1, "del"), _marked_content(text_2, "ins")
+        yield _diff_row(
+            line_number_1 or None,
+            content_1,
+            line_number_2 or None,
+            content_2,
+            removal="<del>" in content_1,
+            addition="<ins>" in content_2,
+        )
+
+
+def _render_direct_table(lines_1, lines_2, table_preamble_template=None, table_preamble_context={}):
+    """Render a diff table with the same rows, structure and classes as a cleaned difflib.HtmlDiff table, without the
+    overhead of generating difflib's html and then rewriting it. The one difference is that two empty revisions have
+    no rows, rather than HtmlDiff's "Empty File" placeholders."""
+    lines_1, lines_2 = ([str(line) for line in lines] for lines in (lines_1, lines_2))
+    preamble = render_template(table_preamble_template, **table_preamble_context) if table_preamble_template else ""
+    return f"<table>{preamble}<tbody>{''.join(_diff_rows(lines_1, lines_2))}</tbody></table>"
+
+
+DIFF_TABLE_RENDERERS = {
+    "difflib": _render_difflib_table,
+    "direct": _render_direct_table,
+}
+
+
 def _strip_nbsp(content):
     return content.replace(u"\u00a0", u" ")
 
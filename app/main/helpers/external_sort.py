@@ -0,0 +1,47 @@
+import heapq
+import pickle
+from itertools import islice
+from tempfile import TemporaryFile
+
+
+def _write_run(items):
+    run_file = TemporaryFile()
+    for item in items:
+        pickle.dump(item, run_file, protocol=pickle.HIGHEST_PROTOCOL)
+    run_file.seek(0)
+    return run_file
+
+
+def _read_run(run_file):
+    while True:
+        try:
+            yield pickle.load(run_file)
+        except EOFError:
+            return
+
+
+def external_sorted(iterable, key, buffer_size):
+    """Lazily yield the items of `iterable` in the (stable) order given by `key`, as `sorted` would, holding no more
+    than `buffer_size` items in memory at once while reading it.
+
+    Once more than `buffer_size` items have been read, each full buffer is sorted and written ("spilled") to a
+    temporary file, and the resulting sorted runs are merged as the output is consumed. Items must be picklable.
+    """
+    iterator = iter(iterable)
+    buffer = list(islice(iterator, buffer_size))
+    next_buffer = list(islice(iterator, buffer_size))
+    if not next_buffer:
+        # everything fits in memory
+        yield from sorted(buffer, key=key)
+        return
+
+    run_files = []
+    try:
+        while buffer:
+            run_files.append(_write_run(sorted(buffer, key=key)))
+            buffer, next_buffer = next_buffer, list(islice(iterator, buffer_size))
+        # heapq.merge favours earlier runs for equal keys, so the merge stays stable
+        yield from heapq.merge(*(_read_run(run_file) for run_file in run_files), key=key)
+    finally:
+        for run_file in run_files:
+            run_file.close()
@@ -1,5 +1,19 @@
 from flask import abort
 
+from .caching import TTLCache
+
+
+frameworks_cache = TTLCache("frameworks", "DM_FRAMEWORKS_CACHE_TTL")
+
+
+def get_frameworks(client):
+    """Return a list of all frameworks, shared between requests for up to DM_FRAMEWORKS_CACHE_TTL seconds.
+
+    The list itself is a fresh copy so can be sorted etc. by the caller, but the framework dicts in it are shared and
+    must not be modified.
+    """
+    return list(frameworks_cache.get("all", lambda: client.find_frameworks()["frameworks"]))
+
 
 def get_framework_or_404(client, framework_slug, allowed_statuses=None):
     if allowed_statuses is None:
@@ -31,3 +31,14 @@ def get_nav_args_from_api_response_links(links, prev_next_label, request_args, p
             navigation_args[kwarg] = request_args.get(kwarg)
 
     return navigation_args
+
+
+def get_page_links(page, page_count):
+    """Build prev/next links in the style of an API response, for a page of a listing paginated in the frontend, to
+    pass to get_nav_args_from_api_response_links"""
+    links = {}
+    if page > 1:
+        links["prev"] = f"?page={page - 1}"
+    if page < page_count:
+        links["next"] = f"?page={page + 1}"
+    return links
@@ -0,0 +1,87 @@
+from pathlib import PurePosixPath
+
+import requests
+from flask import Response, abort, current_app, redirect, request
+
+from .caching import TTLCache
+
+
+# signed urls for report downloads, keyed by (bucket name, path). dmutils signs urls to be valid for 30 seconds, so
+# DM_SIGNED_URL_CACHE_TTL should be comfortably less than that
+signed_urls_cache = TTLCache("signed_urls", "DM_SIGNED_URL_CACHE_TTL", maxsize=500)
+
+# headers of the upstream response which are passed on to the user when proxying a download
+_PROXIED_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified")
+
+
+def get_cached_signed_url(bucket, path, sign):
+    """Return `sign()`, a signed url for `path` in `bucket` (or None if it doesn't exist), reusing a recent one if
+    possible"""
+    return signed_urls_cache.get((bucket.bucket_name, path), sign)
+
+
+def _fetch_upstream(url):
+    headers = {"Range": request.headers["Range"]} if "Range" in request.headers else {}
+    return requests.get(
+        url,
+        headers=headers,
+        stream=True,
+        timeout=current_app.config["DM_REPORT_DOWNLOAD_PROXY_TIMEOUT"],
+    )
+
+
+def _proxy_download(bucket, path, url, sign):
+    upstream = _fetch_upstream(url)
+    if upstream.status_code == 403:
+        # most likely the url expired since it was cached, so sign a fresh one and try again
+        upstream.close()
+        signed_urls_cache.invalidate((bucket.bucket_name, path))
+        url = get_cached_signed_url(bucket, path, sign)
+        if not url:
+            abort(404)
+        upstream = _fetch_upstream(url)
+
+    if upstream.status_code not in (200, 206, 416):
+        upstream.close()
+        current_app.logger.error(
+            "Failed to proxy report download {path}: upstream responded {status_code}",
+            extra={"path": path, "status_code": upstream.status_code},
+        )
+        abort(404 if upstream.status_code == 404 else 502)
+
+    # read the chunk size now, as the response body is streamed after the app context has gone
+    chunk_size = current_app.config["DM_REPORT_DOWNLOAD_CHUNK_SIZE"]
+
+    def iter_chunks():
+        try:
+            yield from upstream.iter_content(chunk_size)
+        finally:
+            upstream.close()
+
+    return Response(
+        iter_chunks(),
+        status=upstream.status_code,
+        mimetype="text/csv",
+        headers={
+            **{name: upstream.headers[name] for name in _PROXIED_HEADERS if name in upstream.headers},
+            "Content-Disposition": f"attachment;filename={PurePosixPath(path).name}",
+        },
+    )
+
+
+def report_download_response(bucket, path, sign):
+    """Respond to a request to download the report at `path` in `bucket`, where `sign()` returns a signed url for it
+    (or None if it doesn't exist).
+
+    Usually this redirects the user to the signed url. If DM_REPORT_DOWNLOADS_PROXY is set, for users whose networks
+    block our assets domain, the report is instead streamed through the app in chunks of DM_REPORT_DOWNLOAD_CHUNK_SIZE
+    bytes, passing on any Range header so that interrupted downloads can be resumed.
+    """
+    url = get_cached_signed_url(bucket, path, sign)
+    if not url:
+        abort(404)
+
+    if current_app.config["DM_REPORT_DOWNLOADS_PROXY"]:
+        return _proxy_download(bucket, path, url, sign)
+
+    return redirect(url)
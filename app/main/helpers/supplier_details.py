@@ -1,3 +1,9 @@
+import time
+
+from dmapiclient import APIError
+from flask import current_app
+
+
 DEPRECATED_FRAMEWORK_SLUGS = ['g-cloud-4', 'g-cloud-5', 'g-cloud-6']
 
 
@@ -58,3 +64,26 @@ def get_supplier_frameworks_visible_for_role(supplier_frameworks, current_user,
         visible_supplier_frameworks,
         key=lambda sf: framework_info[sf["frameworkSlug"]]['frameworkLiveAtUTC']
     )
+
+
+def _is_transient(exception):
+    # connection errors and timeouts are reported with a 503
+    return isinstance(exception, APIError) and exception.status_code >= 500
+
+
+def update_supplier_declaration(client, supplier_id, framework_slug, declaration_update, updated_by):
+    """Apply `declaration_update` to the supplier's declaration for `framework_slug`.
+
+    The API client doesn't retry PATCH requests, so an update failing with a server or connection error is retried
+    here up to DM_DECLARATION_UPDATE_RETRIES times before its error is raised.
+    """
+    retries = current_app.config['DM_DECLARATION_UPDATE_RETRIES']
+    retry_interval = float(current_app.config['DM_DECLARATION_UPDATE_RETRY_INTERVAL'])
+
+    for attempt in range(retries + 1):
+        try:
+            return client.update_supplier_declaration(supplier_id, framework_slug, declaration_update, updated_by)
+        except APIError as e:
+            if attempt == retries or not _is_transient(e):
+                raise
+        time.sleep(retry_interval * (attempt + 1))
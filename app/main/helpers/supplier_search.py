@@ -0,0 +1,251 @@
+import re
+from bisect import bisect_left
+from heapq import merge, nsmallest
+from itertools import chain, islice
+from math import ceil
+from threading import Lock
+from time import monotonic
+from urllib.parse import parse_qs, urlparse
+
+from flask import current_app
+
+from ...metric_definitions import SUPPLIER_SEARCH_PREFETCH_TOTAL
+from .background_jobs import start_background_job
+from .caching import TTLCache
+from .concurrency import submit
+
+
+SUPPLIER_SEARCH_INDEX_JOB_KEY = "supplier-search-index"
+# how closely (as the proportion of trigrams shared) a supplier's name must match a query to be suggested when no
+# name, DUNS number or company number starts with it
+MIN_TRIGRAM_SIMILARITY = 0.3
+# roughly how many suppliers' names to score against a query's trigrams, at most
+MAX_TRIGRAM_CANDIDATES = 2000
+
+# keyed by (user id, search arguments, page)
+supplier_search_pages_cache = TTLCache("supplier_search_pages", "DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL", maxsize=500)
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+_WORD_START = re.compile(r"\b\w")
+
+
+def _normalise(text):
+    return _NON_ALPHANUMERIC.sub(" ", (text or "").casefold()).strip()
+
+
+def _trigrams(normalised_text):
+    padded = f"  {normalised_text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SupplierSearchIndex:
+    """An in-memory index of suppliers' names, DUNS numbers and company registration numbers, for suggesting suppliers
+    as an admin types.
+
+    Every word of a supplier's trading and registered names starts a key of the sorted prefix index, as do their DUNS
+    and company numbers, so a query which any of these start with is found by binary search. Queries with too few
+    prefix matches are topped up with the names sharing most trigrams with them, to allow for typos and partial words.
+
+    Suppliers are added a batch at a time, so a partly built index can be searched while the rest is fetched. Each
+    batch's keys are a sorted run of their own, and runs are merged as they grow so that there are only ever a
+    logarithmic number of them to search, without re-sorting every key for each batch.
+    """
+
+    def __init__(self):
+        self.complete = False
+        self.built_at = None
+        self._lock = Lock()
+        self._suppliers = {}  # id -> suggestion dict
+        self._prefix_runs = []  # sorted lists of (key, supplier id), largest first
+        self._trigrams = {}  # trigram -> set of supplier ids
+        self._name_trigram_counts = {}  # supplier id -> number of trigrams in their names
+
+    def __len__(self):
+        return len(self._suppliers)
+
+    def add(self, suppliers):
+        new_keys = []
+        new_trigrams = []
+        for supplier in suppliers:
+            names = {_normalise(supplier.get("name")), _normalise(supplier.get("registeredName"))} - {""}
+            numbers = {
+                _normalise(supplier.get(key))
+                for key in ("dunsNumber", "companiesHouseNumber", "otherCompanyRegistrationNumber")
+            } - {""}
+            new_keys.extend(
+                (name[match.start():], supplier["id"]) for name in names for match in _WORD_START.finditer(name)
+            )
+            new_keys.extend((number, supplier["id"]) for number in numbers)
+            new_trigrams.append((supplier, set().union(*map(_trigrams, names))))
+
+        # only the thread building the index adds to it, so runs can be merged before taking the lock searches need
+        prefix_runs = self._prefix_runs + [sorted(new_keys)]
+        while len(prefix_runs) > 1 and len(prefix_runs[-2]) <= 2 * len(prefix_runs[-1]):
+            last_run = prefix_runs.pop()
+            prefix_runs[-1] = sorted(prefix_runs[-1] + last_run)
+
+        with self._lock:
+            self._prefix_runs = prefix_runs
+            for supplier, trigrams in new_trigrams:
+                self._suppliers[supplier["id"]] = {
+                    "id": supplier["id"],
+                    "name": supplier.get("name"),
+                    "dunsNumber": supplier.get("dunsNumber"),
+                    "companiesHouseNumber": supplier.get("companiesHouseNumber"),
+                    "otherCompanyRegistrationNumber": supplier.get("otherCompanyRegistrationNumber"),
+                }
+                self._name_trigram_counts[supplier["id"]] = len(trigrams)
+                for trigram in trigrams:
+                    self._trigrams.setdefault(trigram, set()).add(supplier["id"])
+
+    def mark_complete(self):
+        if len(self._prefix_runs) > 1:
+            prefix_runs = [sorted(chain.from_iterable(self._prefix_runs))]
+            with self._lock:
+                self._prefix_runs = prefix_runs
+        self.complete = True
+        self.built_at = monotonic()
+
+    @staticmethod
+    def _run_prefix_matches(run, query, limit):
+        # the first `limit` distinct suppliers with a key starting with `query`, in key order. An exact match sorts
+        # before any longer key, so comes first
+        matches = []
+        seen = set()
+        for i in range(bisect_left(run, (query,)), len(run)):
+            key, supplier_id = run[i]
+            if not key.startswith(query) or len(seen) == limit:
+                break
+            if supplier_id not in seen:
+                seen.add(supplier_id)
+                matches.append((key, supplier_id))
+        return matches
+
+    def _prefix_matches(self, query, limit):
+        supplier_ids = []
+        for key, supplier_id in merge(*(self._run_prefix_matches(run, query, limit) for run in self._prefix_runs)):
+            if supplier_id not in supplier_ids:
+                supplier_ids.append(supplier_id)
+                if len(supplier_ids) == limit:
+                    break
+        return supplier_ids
+
+    def _trigram_matches(self, query, limit):
+        query_trigrams = _trigrams(query)
+        postings = sorted((self._trigrams.get(trigram, ()) for trigram in query_trigrams), key=len)
+        # a name similar enough to the query shares at least this many of its trigrams, so must share at least one of
+        # its rarest trigrams. Only suppliers with those need scoring
+        # Once there are enough candidates, the suppliers sharing only the query's more common trigrams are skipped,
+        # as scoring them all would take too long and they're seldom the supplier being looked for
+        min_shared = ceil(MIN_TRIGRAM_SIMILARITY * len(query_trigrams))
+        candidates = set()
+        for posting in postings[:len(postings) - min_shared + 1]:
+            if candidates and len(candidates) + len(posting) > MAX_TRIGRAM_CANDIDATES:
+                break
+            candidates.update(posting)
+
+        similarities = []
+        for supplier_id in candidates:
+            shared = sum(supplier_id in posting for posting in postings)
+            similarity = shared / (len(query_trigrams) + self._name_trigram_counts[supplier_id] - shared)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                similarities.append((-similarity, supplier_id))
+        return [supplier_id for _, supplier_id in nsmallest(limit, similarities)]
+
+    def search(self, query, limit):
+        """Return up to `limit` suggestion dicts of suppliers matching `query`, best matches first"""
+        query = _normalise(query)
+        if not query:
+            return []
+
+        with self._lock:
+            supplier_ids = self._prefix_matches(query, limit)
+            if len(supplier_ids) < limit:
+                supplier_ids.extend(
+                    supplier_id
+                    for supplier_id in self._trigram_matches(query, limit)
+                    if supplier_id not in supplier_ids
+                )
+            return [self._suppliers[supplier_id] for supplier_id in supplier_ids[:limit]]
+
+
+_index = None
+
+
+def _build_index(client, batch_size):
+    global _index
+    index = SupplierSearchIndex()
+    # until the first build completes, searches are served from what has been indexed so far
+    if _index is None or not _index.complete:
+        _index = index
+
+    suppliers = client.find_suppliers_iter()
+    while True:
+        batch = list(islice(suppliers, batch_size))
+        if not batch:
+            break
+        index.add(batch)
+
+    index.mark_complete()
+    _index = index
+    current_app.logger.info(
+        "Indexed {supplier_count} suppliers for search", extra={"supplier_count": len(index)},
+    )
+
+
+def get_supplier_search_index(client):
+    """Return the process's supplier search index, (re)building it from the API in the background if it hasn't been
+    built yet, a previous build failed, or it was built more than DM_SUPPLIER_SEARCH_INDEX_REFRESH_INTERVAL seconds
+    ago. Until the first build completes this may be a partial (or empty) index.
+    """
+    index = _index
+    if (
+        index is None
+        or not index.complete
+        or monotonic() - index.built_at >= current_app.config["DM_SUPPLIER_SEARCH_INDEX_REFRESH_INTERVAL"]
+    ):
+        # does nothing if a build is already running
+        batch_size = current_app.config["DM_SUPPLIER_SEARCH_INDEX_BATCH_SIZE"]
+        start_background_job(
+            SUPPLIER_SEARCH_INDEX_JOB_KEY,
+            "Indexing suppliers for search",
+            None,
+            lambda job: _build_index(client, batch_size),
+        )
+    return _index if _index is not None else SupplierSearchIndex()
+
+
+def _next_page(links):
+    page_arg = parse_qs(urlparse(links["next"]).query).get("page") if "next" in links else None
+    return page_arg[0] if page_arg else None
+
+
+def find_suppliers_page(client, user_id, page, **search):
+    """Return `client.find_suppliers(page=page, **search)`, and start fetching the next page in the background.
+
+    Pages are kept in a short-lived cache of each user's own searches, so an admin paging through the results of a
+    search is usually served the next page from memory (or waits on its fetch, if they're quicker than the API). The
+    `supplier_search_prefetch_total` metric counts pages prefetched and whether the pages after the first were served
+    from the cache (hits) or the API (misses). Setting DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL to 0 turns all this off.
+    """
+    search_args = tuple(sorted(search.items()))
+    fetched = []
+
+    def fetch():
+        fetched.append(True)
+        return client.find_suppliers(page=page, **search)
+
+    response = supplier_search_pages_cache.get((user_id, search_args, str(page)), fetch)
+    if supplier_search_pages_cache.ttl <= 0:
+        return response
+    if str(page) != "1":
+        SUPPLIER_SEARCH_PREFETCH_TOTAL.labels("miss" if fetched else "hit").inc()
+
+    next_page = _next_page(response["links"])
+    if next_page is not None:
+        def prefetch():
+            SUPPLIER_SEARCH_PREFETCH_TOTAL.labels("prefetched").inc()
+            return client.find_suppliers(page=next_page, **search)
+
+        submit(supplier_search_pages_cache.get, (user_id, search_args, next_page), prefetch)
+    return response
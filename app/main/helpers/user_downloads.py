@@ -1,14 +1,26 @@
 from dmutils import csv_generator
 
+from .external_sort import external_sorted
 
-def generate_user_csv(users):
+
+def generate_user_csv(users, sort_buffer_size=None):
+    """Return an iterator of CSV lines for `users`, which are consumed lazily as the lines are.
+
+    If `sort_buffer_size` is None, users are written out in the order they arrive, so the first line is ready as soon as
+    the first user is. Otherwise users are sorted by name, using temporary files once there are more than
+    `sort_buffer_size` of them.
+    """
     header_row = ("email address", "name")
     user_attributes = ("emailAddress", "name")
 
+    # only keep the fields we need, as the whole export may have to be held in the sort buffer
+    rows = (tuple(user.get(field_name, "") for field_name in user_attributes) for user in users)
+    if sort_buffer_size is not None:
+        rows = external_sorted(rows, key=lambda row: row[1], buffer_size=sort_buffer_size)
+
     def rows_iter():
         """Iterator yielding header then rows."""
         yield header_row
-        for user in sorted(users, key=lambda user: user["name"]):
-            yield (user.get(field_name, "") for field_name in user_attributes)
+        yield from rows
 
     return csv_generator.iter_csv(rows_iter())
@@ -0,0 +1,25 @@
+from dmutils.user import User
+
+from .caching import TTLCache
+
+
+# the API responses for users, keyed by user id, used to load the logged in user on every request. Updating a user
+# through this app invalidates their entry, but only in the process which made the change: elsewhere a user being
+# deactivated, locked or having their role changed takes effect once their entry expires
+user_cache = TTLCache("users", "DM_USER_CACHE_TTL", maxsize=1000)
+
+
+def load_user(client, user_id):
+    """Load the user `user_id` (if they are active), as `dmutils.user.User.load_user` does, from a short-lived cache"""
+    user_id = int(user_id)
+    user_json = user_cache.get(user_id, lambda: client.get_user(user_id=user_id))
+
+    if user_json:
+        user = User.from_json(user_json)
+        if user.is_active():
+            return user
+
+
+def invalidate_user(user_id):
+    """Forget the cached record for `user_id`, to be called when they are updated"""
+    user_cache.invalidate(int(user_id))
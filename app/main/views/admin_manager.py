@@ -1,46 +1,69 @@
 from distutils.util import strtobool
+from itertools import chain
 
 from dmutils.email.user_account_email import send_user_account_email
 from dmutils.forms.helpers import get_errors_from_wtform
 from dmutils.flask import timed_render_template as render_template
-from flask import request, redirect, url_for, flash
+from flask import abort, current_app, request, redirect, url_for, flash
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
 from ..forms import InviteAdminForm, EditAdminUserForm
+from ..helpers.caching import TTLCache
+from ..helpers.concurrency import fetch_concurrently
+from ..helpers.pagination import get_nav_args_from_api_response_links, get_page_links
+from ..helpers.users import invalidate_user
 from ... import data_api_client
 
 
 INVITATION_SENT_MESSAGE = "An invitation has been sent to {email_address}."
 EMAIL_ADDRESS_UPDATED_MESSAGE = "{email_address} has been updated."
 
+ADMIN_ROLES = (
+    'admin',
+    'admin-ccs-category',
+    'admin-ccs-sourcing',
+    'admin-framework-manager',
+    'admin-ccs-data-controller',
+)
+
+# the sorted list of all admin users, invalidated by changes made through this app
+admin_users_cache = TTLCache("admin_users", "DM_ADMIN_USERS_CACHE_TTL")
+
+
+def _find_admin_users():
+    # The API doesn't support filtering users by multiple roles at once, so fetch each role's users at the same time
+    users_by_role = fetch_concurrently(*(
+        lambda role=role: list(data_api_client.find_users_iter(role=role)) for role in ADMIN_ROLES
+    ))
+
+    # We want to sort so all Active users are above all Suspended users, and alphabetical by name within these groups.
+    # In Python False < True (False is zero, True is one) so sorting on "active is False" puts Active users first.
+    return sorted(chain.from_iterable(users_by_role), key=lambda k: (k['active'] is False, k['name']))
+
 
 @main.route('/admin-users', methods=['GET'])
 @role_required('admin-manager')
 def manage_admin_users():
-    # The API doesn't support filtering users by multiple roles at once, and it's not worth adding that feature
-    # just for this one view that (currently, and for the foreseeable future) will be very rarely used.
-    # In future, if we have many many admin users and/or this page is heavily used we should:
-    # (1) Fix the API to allow fetching all relevant user roles with a single call
-    # (2) Stop using the _iter method and properly paginate this page
-
-    support_users = data_api_client.find_users_iter(role='admin')
-    category_users = data_api_client.find_users_iter(role='admin-ccs-category')
-    sourcing_users = data_api_client.find_users_iter(role='admin-ccs-sourcing')
-    framework_manager_users = data_api_client.find_users_iter(role='admin-framework-manager')
-    data_controller_users = data_api_client.find_users_iter(role='admin-ccs-data-controller')
+    page = request.args.get("page", 1, type=int)
+    if page < 1:
+        abort(400)
 
-    # We want to sort so all Active users are above all Suspended users, and alphabetical by name within these groups.
-    # In Python False < True (False is zero, True is one) so sorting on "active is False" puts Active users first.
-    admin_users = sorted(
-        list(support_users) + list(category_users) +
-        list(sourcing_users) + list(framework_manager_users) + list(data_controller_users),
-        key=lambda k: (k['active'] is False, k['name'])
-    )
+    admin_users = admin_users_cache.get("admin_users", _find_admin_users)
 
-    return render_template("view_admin_users.html",
-                           admin_users=admin_users)
+    page_size = current_app.config["DM_ADMIN_USERS_PAGE_SIZE"]
+    page_count = max(1, -(-len(admin_users) // page_size))
+    if page > page_count:
+        abort(404)
+    links = get_page_links(page, page_count)
+
+    return render_template(
+        "view_admin_users.html",
+        admin_users=admin_users[(page - 1) * page_size:page * page_size],
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, []),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, []),
+    )
 
 
 @main.route('/admin-users/invite', methods=['GET', 'POST'])
@@ -60,6 +83,7 @@ def invite_admin_user():
             notify_template_id,
             personalisation={'name': current_user.name}
         )
+        admin_users_cache.invalidate()
         flash(INVITATION_SENT_MESSAGE.format(email_address=email_address))
         return redirect(url_for('main.manage_admin_users'))
 
@@ -93,6 +117,8 @@ def edit_admin_user(admin_user_id):
             role=edited_admin_permissions,
             active=edited_admin_status
         )
+        admin_users_cache.invalidate()
+        invalidate_user(admin_user_id)
         flash(EMAIL_ADDRESS_UPDATED_MESSAGE.format(email_address=admin_user["emailAddress"]))
         return redirect(url_for('.manage_admin_users'))
     elif edit_admin_user_form.edit_admin_name.errors:
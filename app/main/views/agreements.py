@@ -1,16 +1,36 @@
 from collections import OrderedDict
+from datetime import datetime
 
-from dateutil.parser import parse as parse_date
 from dmutils.documents import degenerate_document_path_and_return_doc_name
 from dmutils.flask import timed_render_template as render_template
-from dmutils.formats import datetimeformat
-from flask import redirect, url_for, abort, request
+from flask import redirect, url_for, abort, request, current_app
 
 from .. import main
 from ..auth import role_required
+from ..helpers.agreements import (
+    AgreementsListing,
+    SupplierFrameworkIndex,
+    agreements_index_cache,
+    agreements_listing_cache,
+    get_lot_supplier_ids,
+    get_supplier_lot_names,
+    supplier_lot_names_cache,
+)
+from ..helpers.concurrency import submit
+from ..helpers.frameworks import get_frameworks
+from ..helpers.pagination import get_nav_args_from_api_response_links, get_page_links
 from ... import data_api_client
 
 
+LIST_AGREEMENTS_FILTER_ARGS = ("status", "lot", "submitted_from", "submitted_to", "sort")
+SORT_LABELS = OrderedDict((
+    (None, "Default"),
+    ("name", "Supplier name"),
+    ("oldest", "Oldest first"),
+    ("newest", "Newest first"),
+))
+
+
 def get_status_labels():
     return OrderedDict((
         ("signed", "Waiting for countersigning"),
@@ -31,21 +51,70 @@ def _get_supplier_frameworks(framework_slug, status=None):
     ]
 
 
+def _get_supplier_frameworks_index(framework_slug):
+    """Return a (possibly cached) SupplierFrameworkIndex of all supplier frameworks on `framework_slug` with a returned
+    agreement. The views which change agreement statuses invalidate it."""
+    return agreements_index_cache.get(
+        framework_slug,
+        lambda: SupplierFrameworkIndex(_get_supplier_frameworks(framework_slug), get_status_labels().keys()),
+    )
+
+
+def _get_agreements_listing(framework_slug, status):
+    return agreements_listing_cache.get(
+        (framework_slug, status),
+        lambda: AgreementsListing(_get_supplier_frameworks(framework_slug, status=status)),
+    )
+
+
+def _get_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        abort(400, f"Invalid {name}")
+
+
 @main.route('/agreements/<framework_slug>', methods=['GET'])
 @role_required('admin-ccs-category', 'admin-ccs-sourcing', 'admin-framework-manager', 'admin-ccs-data-controller')
 def list_agreements(framework_slug):
     framework = data_api_client.get_framework(framework_slug)['frameworks']
     status_labels = get_status_labels()
 
-    status = request.args.get("status")
+    status = request.args.get("status") or None
     if status and status not in status_labels:
         abort(400)
 
-    supplier_frameworks = _get_supplier_frameworks(framework_slug, status=status)
+    lots = framework.get("lots") or []
+    lot = request.args.get("lot") or None
+    if lot and lot not in (framework_lot["slug"] for framework_lot in lots):
+        abort(400)
 
-    for supplier_framework in supplier_frameworks:
-        supplier_framework['agreementReturnedAt'] = datetimeformat(
-            parse_date(supplier_framework['agreementReturnedAt']))
+    sort = request.args.get("sort") or None
+    if sort and sort not in AgreementsListing.SORT_ORDERS:
+        abort(400)
+
+    submitted_from, submitted_to = _get_date_arg("submitted_from"), _get_date_arg("submitted_to")
+    page = request.args.get("page", 1, type=int)
+    if page < 1:
+        abort(400)
+
+    agreements_listing = _get_agreements_listing(framework_slug, status)
+    positions = agreements_listing.select(
+        sort=sort,
+        supplier_ids=get_lot_supplier_ids(data_api_client, framework, lot) if lot else None,
+        returned_from=submitted_from,
+        returned_to=submitted_to,
+    )
+
+    page_size = current_app.config["DM_AGREEMENTS_PAGE_SIZE"]
+    page_count = max(1, -(-len(positions) // page_size))
+    if page > page_count:
+        abort(404)
+    supplier_frameworks = agreements_listing.page(positions, page, page_size)
+    links = get_page_links(page, page_count)
 
     # Determine which template to use.
     # G-Cloud 7 and earlier frameworks do not have a frameworkAgreementVersion and use an old countersigning flow
@@ -62,13 +131,45 @@ def list_agreements(framework_slug):
         template,
         framework=framework,
         supplier_frameworks=supplier_frameworks,
+        total_count=len(positions),
         degenerate_document_path_and_return_doc_name=lambda x: degenerate_document_path_and_return_doc_name(x),
         status=status,
         status_labels=status_labels,
-        is_e_signature_flow=is_e_signature_flow
+        lots=lots,
+        lot=lot,
+        sort=sort,
+        sort_labels=SORT_LABELS,
+        submitted_from=submitted_from,
+        submitted_to=submitted_to,
+        filter_args={
+            arg: request.args[arg] for arg in LIST_AGREEMENTS_FILTER_ARGS if request.args.get(arg)
+        },
+        is_e_signature_flow=is_e_signature_flow,
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, LIST_AGREEMENTS_FILTER_ARGS),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, LIST_AGREEMENTS_FILTER_ARGS),
     )
 
 
+def _prefetch_lot_names(supplier_frameworks_index, next_supplier_framework, status):
+    """Start fetching the lot names shown on the agreement pages of the next DM_AGREEMENTS_PREFETCH_COUNT suppliers in
+    the queue from `next_supplier_framework` on, so they're cached by the time the user clicks through to them"""
+    count = current_app.config["DM_AGREEMENTS_PREFETCH_COUNT"]
+    if count < 1 or supplier_lot_names_cache.ttl <= 0:
+        return
+
+    framework_slug = next_supplier_framework["frameworkSlug"]
+    framework = next((fw for fw in get_frameworks(data_api_client) if fw["slug"] == framework_slug), None)
+    if framework is None:
+        return
+
+    supplier_framework = next_supplier_framework
+    for _ in range(count):
+        submit(get_supplier_lot_names, data_api_client, supplier_framework["supplierId"], framework)
+        supplier_framework = supplier_frameworks_index.next_after(supplier_framework["supplierId"], status)
+        if supplier_framework is None:
+            break
+
+
 @main.route('/suppliers/<int:supplier_id>/agreements/<framework_slug>/next', methods=('GET',))
 @role_required('admin-ccs-category', 'admin-ccs-sourcing', 'admin-framework-manager', 'admin-ccs-data-controller')
 def next_agreement(supplier_id, framework_slug):
@@ -79,25 +180,16 @@ def next_agreement(supplier_id, framework_slug):
 
     # note we are NOT requesting the status-filtered supplier_framework list - we can't be sure our requested supplier
     # will *be* in the filtered set (though it may have been at the time the url was generated) so for this view at
-    # least, any status "filtering" we do must be here in python.
-    supplier_frameworks = _get_supplier_frameworks(framework_slug)
-    supplier_frameworks_iter = iter(supplier_frameworks)
+    # least, any status "filtering" is done by the index, remembering that a status_labels key might be a
+    # comma-separated list of actual API statuses
+    supplier_frameworks_index = _get_supplier_frameworks_index(framework_slug)
 
-    # first advance supplier_frameworks_iter to the requested supplier in the list, disregarding any status filter
-    try:
-        next(sf for sf in supplier_frameworks_iter if sf.get("supplierId") == supplier_id)
-    except StopIteration:
-        # reached the end of supplier_frameworks_iter without finding an entry for supplier_id. supplier possibly
-        # doesn't exist or doesn't have a signed agreement yet
+    if supplier_id not in supplier_frameworks_index:
+        # supplier possibly doesn't exist or doesn't have a signed agreement yet
         abort(404)
 
-    # now find whatever the "next" one (which satisfies any status requirement we have) is, remembering that a
-    # status_labels key might be a comma-separated list of actual API statuses
-    try:
-        next_supplier_framework = next(
-            sf for sf in supplier_frameworks_iter if (not status) or sf.get("agreementStatus") in status.split(",")
-        )
-    except StopIteration:
+    next_supplier_framework = supplier_frameworks_index.next_after(supplier_id, status)
+    if next_supplier_framework is None:
         # this was the last one.
         return redirect(url_for(
             '.list_agreements',
@@ -105,6 +197,8 @@ def next_agreement(supplier_id, framework_slug):
             status=status,
         ))
 
+    _prefetch_lot_names(supplier_frameworks_index, next_supplier_framework, status)
+
     return redirect(url_for(
         '.view_signed_agreement',
         supplier_id=next_supplier_framework["supplierId"],
@@ -8,6 +8,8 @@ from flask import redirect, url_for, current_app, request, flash, abort
 from .. import main
 from ..auth import role_required
 from ... import data_api_client
+from ..helpers.caching import TTLCache
+from ..helpers.concurrency import fetch_concurrently
 from ..helpers.frameworks import get_framework_or_404
 
 
@@ -19,28 +21,44 @@ def _get_comm_type_root(framework_slug, comm_type):
 
 _comm_types = ("communication", "clarification",)
 
+# listings of each framework's communications of each type, keyed by (framework slug, comm type). Uploading or
+# deleting a file invalidates its listing, but only in the process which made the change
+communications_listing_cache = TTLCache("communications_listing", "DM_COMMUNICATIONS_LISTING_CACHE_TTL", maxsize=200)
 
-@main.route('/communications/<framework_slug>', methods=['GET'])
-@role_required('admin-framework-manager')
-def manage_communications(framework_slug):
+
+def _list_comm_type(framework_slug, comm_type):
+    # an S3 object per listing, as they're made in separate threads and boto3 resources aren't thread-safe
     communications_bucket = s3.S3(
         current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
     )
-    framework = get_framework_or_404(data_api_client, framework_slug)
+    return tuple(
+        {
+            **bucket_item,
+            # annotate on to object dicts their paths relative to comm_type_root
+            "rel_path": PurePath(bucket_item["path"]).relative_to(_get_comm_type_root(framework_slug, comm_type)),
+        } for bucket_item in communications_bucket.list(
+            str(_get_comm_type_root(framework_slug, comm_type)),
+            load_timestamps=True,
+        )
+    )
 
-    # generate a dict of comm_type: seq of s3 object dicts
-    comm_type_objs = {
-        comm_type: tuple(
-            {
-                **bucket_item,
-                # annotate on to object dicts their paths relative to comm_type_root
-                "rel_path": PurePath(bucket_item["path"]).relative_to(_get_comm_type_root(framework_slug, comm_type)),
-            } for bucket_item in communications_bucket.list(
-                str(_get_comm_type_root(framework_slug, comm_type)),
-                load_timestamps=True,
-            )
-        ) for comm_type in _comm_types
-    }
+
+def _list_communications(framework_slug):
+    """Return a dict of comm_type: seq of s3 object dicts for the framework, listing each comm type concurrently"""
+    return dict(zip(_comm_types, fetch_concurrently(*(
+        lambda comm_type=comm_type: communications_listing_cache.get(
+            (framework_slug, comm_type),
+            lambda: _list_comm_type(framework_slug, comm_type),
+        )
+        for comm_type in _comm_types
+    ))))
+
+
+@main.route('/communications/<framework_slug>', methods=['GET'])
+@role_required('admin-framework-manager')
+def manage_communications(framework_slug):
+    framework = get_framework_or_404(data_api_client, framework_slug)
+    comm_type_objs = _list_communications(framework_slug)
 
     return render_template(
         'manage_communications.html',
@@ -88,6 +106,7 @@ def upload_communication(framework_slug):
             communications_bucket.save(
                 path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
             )
+            communications_listing_cache.invalidate((framework_slug, 'communication'))
             flash('New communication was uploaded.')
 
     if request.files.get('clarification'):
@@ -101,6 +120,7 @@ def upload_communication(framework_slug):
             communications_bucket.save(
                 path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
             )
+            communications_listing_cache.invalidate((framework_slug, 'clarification'))
             flash('New clarification was uploaded.')
 
     return redirect(url_for('.manage_communications', framework_slug=framework_slug))
@@ -132,6 +152,7 @@ def delete_communication(framework_slug, comm_type, filepath):
             abort(404, f"{filepath} not present in S3 bucket")
 
         communications_bucket.delete_key(str(full_path))
+        communications_listing_cache.invalidate((framework_slug, comm_type))
 
         flash(f"{comm_type.capitalize()} ‘{filepath}’ was deleted for {framework['name']}.")
         return redirect(url_for('.manage_communications', framework_slug=framework_slug))
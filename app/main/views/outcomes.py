@@ -1,15 +1,21 @@
 from datetime import datetime
 
-from flask import Response, abort, current_app, redirect
+from flask import Response, current_app, stream_with_context
 
 from dmutils import csv_generator, s3
 from dmutils.documents import get_signed_url
 
 from .. import main
 from ..auth import role_required
+from ..helpers.concurrency import iter_prefetched
+from ..helpers.frameworks import get_frameworks
+from ..helpers.report_downloads import report_download_response
 from ... import data_api_client
 
 
+ARCHIVED_SERVICES_CACHE_SIZE = 256
+
+
 @main.route('/direct-award/outcomes', methods=['GET'])
 @role_required('admin-ccs-category', 'admin-framework-manager', 'admin-ccs-sourcing')
 def download_direct_award_outcomes():
@@ -33,41 +39,45 @@ def download_direct_award_outcomes():
         'User email',
     ]
 
-    formatted_rows = []
-    formatted_rows.append(headers)   # add header row
-    for project in projects:
-        if project['outcome']['result'] != 'awarded':
-            continue
-
-        awardDetails = project['outcome']['award']
-        resultOfDirectAward = project['outcome']['resultOfDirectAward']
-        service = data_api_client.get_archived_service(
-            archived_service_id=resultOfDirectAward['archivedService']['id']
-        )['services']
+    awarded_projects = (project for project in projects if project['outcome']['result'] == 'awarded')
+    projects_with_services = iter_prefetched(
+        awarded_projects,
+        lambda project: project['outcome']['resultOfDirectAward']['archivedService']['id'],
+        lambda archived_service_id: data_api_client.get_archived_service(
+            archived_service_id=archived_service_id
+        )['services'],
+        window=current_app.config['DM_PREFETCH_WINDOW'],
+        # many projects award the same few services
+        cache_size=ARCHIVED_SERVICES_CACHE_SIZE,
+    )
 
-        user = project['users'][0]
+    def formatted_rows():
+        yield headers
+        for project, service in projects_with_services:
+            awardDetails = project['outcome']['award']
+            resultOfDirectAward = project['outcome']['resultOfDirectAward']
+            user = project['users'][0]
 
-        row = [
-            project['id'],  # id
-            project['name'],  # name
-            project['outcome']['completedAt'],  # 'Submitted at',
-            project['outcome']['result'],  # 'result',
-            resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
-            service['serviceName'],  # 'Award service name',
-            service['supplierId'],  # 'Award supplier id',
-            service['supplierName'],  # 'Award supplier name',
-            awardDetails['awardValue'],   # 'awardValue',
-            awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
-            awardDetails['startDate'],  # 'awardStartDate',
-            awardDetails['endDate'],  # 'awardEndDate',
-            user['id'],  # 'User id',
-            user['name'],  # 'User name',
-            user['emailAddress'],  # 'User email',
-        ]
-        formatted_rows.append(row)
+            yield [
+                project['id'],  # id
+                project['name'],  # name
+                project['outcome']['completedAt'],  # 'Submitted at',
+                project['outcome']['result'],  # 'result',
+                resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
+                service['serviceName'],  # 'Award service name',
+                service['supplierId'],  # 'Award supplier id',
+                service['supplierName'],  # 'Award supplier name',
+                awardDetails['awardValue'],   # 'awardValue',
+                awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
+                awardDetails['startDate'],  # 'awardStartDate',
+                awardDetails['endDate'],  # 'awardEndDate',
+                user['id'],  # 'User id',
+                user['name'],  # 'User name',
+                user['emailAddress'],  # 'User email',
+            ]
 
     return Response(
-        csv_generator.iter_csv(formatted_rows),
+        stream_with_context(csv_generator.iter_csv(formatted_rows())),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
@@ -87,7 +97,7 @@ def download_dos_outcomes():
                     fw["family"] == "digital-outcomes-and-specialists"
                     and fw["status"] == "live"
                 ),
-                data_api_client.find_frameworks()["frameworks"]
+                get_frameworks(data_api_client)
             ),
             key=lambda fw: fw["frameworkLiveAtUTC"],
             reverse=True,
@@ -97,13 +107,10 @@ def download_dos_outcomes():
     reports_bucket = s3.S3(
         current_app.config["DM_REPORTS_BUCKET"], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
     )
-    url = get_signed_url(
+    path = f"{framework_slug}/reports/opportunity-data.csv"
+
+    return report_download_response(
         reports_bucket,
-        f"{framework_slug}/reports/opportunity-data.csv",
-        current_app.config["DM_ASSETS_URL"]
+        path,
+        lambda: get_signed_url(reports_bucket, path, current_app.config["DM_ASSETS_URL"]),
     )
-
-    if not url:
-        abort(404)
-
-    return redirect(url)
@@ -1,30 +1,66 @@
+from dmapiclient import HTTPError
 from dmapiclient.audit import AuditTypes
 from dmutils.flask import timed_render_template as render_template
-from flask import abort, flash, redirect, url_for
+from flask import abort, current_app, flash, redirect, request, url_for
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.caching import TTLCache
+from ..helpers.concurrency import map_concurrently, submit
+from ..helpers.pagination import get_nav_args_from_api_response_links
 from ... import data_api_client
 
 
 APPROVED_SERVICE_EDITS_MESSAGE = "The changes to service {service_id} were approved."
+BULK_APPROVED_SERVICE_EDITS_MESSAGE = "The changes to {count} {services} were approved."
+BULK_APPROVAL_FAILED_MESSAGE = "The changes to {services} {service_ids} could not be approved. Please try again."
+NO_SERVICE_EDITS_SELECTED_MESSAGE = "Select the edited services you want to approve."
 
+# pages of the approval queue, keyed by page number. Approving any edits changes every page after the approved ones,
+# so invalidates them all
+unapproved_service_updates_cache = TTLCache(
+    "unapproved_service_updates", "DM_UNAPPROVED_SERVICE_UPDATES_CACHE_TTL", maxsize=50,
+)
 
-@main.route('/services/updates/unapproved', methods=['GET'])
-@role_required('admin-ccs-category')
-def service_update_audits():
-    audit_events_response = data_api_client.find_audit_events(
+
+def _find_unapproved_service_updates(page):
+    return unapproved_service_updates_cache.get(page, lambda: data_api_client.find_audit_events(
         audit_type=AuditTypes.update_service,
         acknowledged='false',
         latest_first='false',
         earliest_for_each_object='true',
-    )
+        page=page,
+    ))
+
+
+@main.route('/services/updates/unapproved', methods=['GET'])
+@role_required('admin-ccs-category')
+def service_update_audits():
+    page = request.args.get("page", 1, type=int)
+    if page < 1:
+        abort(400)
+
+    try:
+        audit_events_response = _find_unapproved_service_updates(page)
+    except HTTPError as e:
+        # approving edits shortens the queue, so a page that existed a moment ago may not any more
+        if e.status_code == 404 and page > 1:
+            return redirect(url_for('.service_update_audits'))
+        raise
+    links = audit_events_response['links']
+
+    # admins usually work through the queue page by page, so get the next page ready while they look at this one
+    if links.get('next') and unapproved_service_updates_cache.ttl > 0:
+        submit(_find_unapproved_service_updates, page + 1)
 
     return render_template(
         "service_updates_unapproved.html",
         audit_events=audit_events_response['auditEvents'],
-        has_next=bool(audit_events_response['links'].get('next')),
+        has_next=bool(links.get('next')),
+        current_page=page,
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, []),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, []),
     )
 
 
@@ -44,5 +80,61 @@ def submit_service_update_approval(service_id, audit_id):
         audit_event["id"],
         current_user.email_address
     )
+    unapproved_service_updates_cache.invalidate()
     flash(APPROVED_SERVICE_EDITS_MESSAGE.format(service_id=service_id))
     return redirect(url_for('.service_update_audits'))
+
+
+@main.route('/services/updates/approve', methods=['POST'])
+@role_required('admin-ccs-category')
+def submit_service_update_approvals():
+    """Approve the edits to each of the selected services from the approval queue.
+
+    Each selection is "<service id>:<audit event id>", as listed in the queue. Unlike a single approval the audit
+    events aren't fetched first: the API checks each one belongs to its service and approves nothing if not, which is
+    reported as a failure along with any other error.
+    """
+    page = request.form.get("page", 1, type=int)
+    try:
+        selected = [
+            (service_id, int(audit_id))
+            for service_id, audit_id in (value.split(":") for value in request.form.getlist("audit_event"))
+        ]
+    except ValueError:
+        abort(400)
+
+    if not selected:
+        flash(NO_SERVICE_EDITS_SELECTED_MESSAGE, 'error')
+        return redirect(url_for('.service_update_audits', page=page))
+
+    # read here rather than in the worker threads, which don't share the request's logged in user
+    updated_by = current_user.email_address
+    outcomes = map_concurrently(
+        lambda item: data_api_client.acknowledge_service_update_including_previous(item[0], item[1], updated_by),
+        selected,
+        batch_size=current_app.config["DM_BULK_UPDATE_BATCH_SIZE"],
+    )
+    unapproved_service_updates_cache.invalidate()
+
+    failed_service_ids = []
+    for (service_id, audit_id), (_, exception) in zip(selected, outcomes):
+        if exception is not None:
+            current_app.logger.error(
+                "Failed to approve changes to service {service_id} up to audit event {audit_id}: {error}",
+                extra={"service_id": service_id, "audit_id": audit_id, "error": str(exception)},
+            )
+            failed_service_ids.append(service_id)
+
+    approved_count = len(selected) - len(failed_service_ids)
+    if approved_count:
+        flash(BULK_APPROVED_SERVICE_EDITS_MESSAGE.format(
+            count=approved_count,
+            services="service" if approved_count == 1 else "services",
+        ))
+    if failed_service_ids:
+        flash(BULK_APPROVAL_FAILED_MESSAGE.format(
+            services="service" if len(failed_service_ids) == 1 else "services",
+            service_ids=", ".join(failed_service_ids),
+        ), 'error')
+
+    return redirect(url_for('.service_update_audits', page=page))
@@ -16,7 +16,7 @@ from .. import main
 from ..auth import role_required
 from ..forms import EditFrameworkStatusForm
 from ..helpers.diff_tools import html_diff_tables_from_sections_iter
-from ..helpers.frameworks import get_framework_or_404
+from ..helpers.frameworks import frameworks_cache, get_framework_or_404, get_frameworks
 from ... import content_loader
 from ... import data_api_client
 
@@ -41,7 +41,7 @@ ALL_ADMIN_ROLES = [
 @main.route('', methods=['GET'])
 @role_required(*ALL_ADMIN_ROLES)
 def index():
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
     frameworks = [
         fw for fw in frameworks if not (fw['status'] == 'coming' or (
             fw['status'] == 'expired' and fw["family"] != 'digital-outcomes-and-specialists'
@@ -57,7 +57,7 @@ def view_frameworks():
     if os.getenv("DM_ENVIRONMENT") == 'production':
         abort(404)  # This endpoint isn't safe in production.
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
     frameworks.sort(key=lambda x: (x['family'], x['id']), reverse=True)
 
     return render_template(
@@ -83,6 +83,8 @@ def change_framework_status(framework_slug):
         status = form.data.get('status')
 
         data_api_client.update_framework(framework_slug, {"status": status}, user=current_user.email_address)
+        # other processes will keep serving their cached frameworks until DM_FRAMEWORKS_CACHE_TTL expires
+        frameworks_cache.invalidate()
 
         return redirect(url_for('.view_frameworks'))
     else:
@@ -364,6 +366,8 @@ def service_updates(service_id):
                 revision_1=archived_service,
                 revision_2=service,
                 table_preamble_template="diff_table/_table_preamble.html",
+                # a service's updatedAt changes whenever it is edited, so this identifies both revisions
+                cache_key=(archived_service["id"], service.get("updatedAt")),
             )
         )
 
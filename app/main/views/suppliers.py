@@ -1,10 +1,9 @@
-from collections import OrderedDict
-from itertools import groupby, chain
+from functools import partial
+from itertools import groupby
 from operator import itemgetter
 
 from dateutil.parser import parse as parse_date
 from dmcontent.errors import ContentNotFoundError
-from dmcontent.utils import count_unanswered_questions
 from dmapiclient import HTTPError, APIError
 from dmapiclient.audit import AuditTypes
 from dmutils import s3
@@ -19,7 +18,7 @@ from dmutils.flask import timed_render_template as render_template
 from dmutils.forms.helpers import get_errors_from_wtform
 from dmutils.formats import datetimeformat
 from dmutils.urls import rewrite_supplier_asset_path
-from flask import request, redirect, url_for, abort, current_app, flash
+from flask import request, redirect, url_for, abort, current_app, flash, jsonify
 from flask_login import current_user
 
 from .. import main
@@ -30,13 +29,24 @@ from ..forms import (
     EditSupplierRegisteredAddressForm,
     EditSupplierRegisteredNameForm
 )
+from ..helpers.agreements import get_supplier_lot_names, invalidate_agreements
+from ..helpers.background_jobs import get_background_job, start_background_job
+from ..helpers.concurrency import fetch_concurrently, map_concurrently
 from ..helpers.countries import COUNTRY_TUPLE
+from ..helpers.frameworks import get_frameworks
 from ..helpers.pagination import get_nav_args_from_api_response_links
+from ..helpers.supplier_search import (
+    find_suppliers_page,
+    get_supplier_search_index,
+    supplier_search_pages_cache,
+)
 from ..helpers.supplier_details import (
     get_supplier_frameworks_visible_for_role,
     get_company_details_from_supplier,
+    update_supplier_declaration,
     DEPRECATED_FRAMEWORK_SLUGS,
 )
+from ..helpers.users import invalidate_user
 from ... import data_api_client, content_loader
 
 
@@ -50,6 +60,14 @@ COUNTERSIGNED_AGREEMENT_NOT_PDF_MESSAGE = "Countersigned agreement file is not a
 SUPPLIER_SERVICES_REMOVED_MESSAGE = "You suspended all {framework_name} services for ‘{supplier_name}’."
 SUPPLIER_SERVICES_UNSUSPENDED_MESSAGE = "You unsuspended all {framework_name} services for ‘{supplier_name}’."
 SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE = "Search results may take a few minutes to be updated."
+SUPPLIER_SERVICES_NOT_TOGGLED_MESSAGE = "{failed_count} of {total_count} {framework_name} services for " \
+                                        "‘{supplier_name}’ could not be {action}: {service_ids}. Please try again."
+SUPPLIER_SERVICES_TOGGLING_MESSAGE = "{action} {total_count} {framework_name} services for ‘{supplier_name}’. " \
+                                     "This may take a few minutes."
+# jobs run in the process which started them, so requests served by another process can't see their progress
+SUPPLIER_SERVICES_TOGGLE_STARTED_MESSAGE = "{description} Its progress may not be shown on this page."
+SUPPLIER_SERVICES_ALREADY_TOGGLING_MESSAGE = "The {framework_name} services for ‘{supplier_name}’ are already being " \
+                                             "updated. Please wait for this to finish and try again."
 SUPPLIER_USER_MESSAGES = {
     'user_invited': 'User invited',
     'user_moved': 'User moved to this supplier',
@@ -69,19 +87,25 @@ def find_suppliers():
     if request.args.get("supplier_id"):
         suppliers = [data_api_client.get_supplier(request.args.get("supplier_id"))['suppliers']]
         links = {}
+        frameworks = get_frameworks(data_api_client)
     else:
         duns_number = request.args.get("supplier_duns_number").strip() \
             if request.args.get("supplier_duns_number") else None
-        suppliers_response = data_api_client.find_suppliers(
-            name=request.args.get("supplier_name"),
-            duns_number=duns_number,
-            company_registration_number=request.args.get("supplier_company_registration_number"),
-            page=request.args.get("page", 1)  # API will validate page number values
+        user_id = current_user.id
+        suppliers_response, frameworks = fetch_concurrently(
+            lambda: find_suppliers_page(
+                data_api_client,
+                user_id,
+                name=request.args.get("supplier_name"),
+                duns_number=duns_number,
+                company_registration_number=request.args.get("supplier_company_registration_number"),
+                page=request.args.get("page", 1)  # API will validate page number values
+            ),
+            lambda: get_frameworks(data_api_client),
         )
         suppliers = suppliers_response['suppliers']
         links = suppliers_response["links"]
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
     try:
         oldest_interesting_framework_id = [
             fw for fw in frameworks if fw['slug'] == OLDEST_INTERESTING_FRAMEWORK_SLUG
@@ -108,14 +132,33 @@ def find_suppliers():
     )
 
 
+@main.route('/suppliers/typeahead', methods=['GET'])
+@role_required(
+    'admin', 'admin-ccs-category', 'admin-ccs-sourcing', 'admin-framework-manager', 'admin-ccs-data-controller'
+)
+def supplier_typeahead():
+    """Suggest suppliers whose name, DUNS number or company registration number matches the `q` typed so far.
+
+    Suggestions come from an in-process index of all suppliers, which is built (and refreshed) in the background.
+    `complete` is false while the first build is still in progress, when some suppliers may be missing.
+    """
+    index = get_supplier_search_index(data_api_client)
+    return jsonify(
+        suppliers=index.search(request.args.get("q", ""), current_app.config["DM_SUPPLIER_TYPEAHEAD_LIMIT"]),
+        complete=index.complete,
+    )
+
+
 @main.route("/suppliers/<int:supplier_id>", methods=["GET"])
 @role_required(
     "admin", "admin-ccs-category", "admin-ccs-data-controller", "admin-framework-manager", "admin-ccs-sourcing"
 )
 def supplier_details(supplier_id):
-    frameworks = data_api_client.find_frameworks()["frameworks"]
-    supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    supplier_frameworks = data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"]
+    frameworks, supplier, supplier_frameworks = fetch_concurrently(
+        lambda: get_frameworks(data_api_client),
+        lambda: data_api_client.get_supplier(supplier_id)["suppliers"],
+        lambda: data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"],
+    )
 
     # Get SupplierFrameworks for frameworks the role is interested in, sorted by oldest frameworkLiveAtUTC first
     visible_supplier_frameworks = get_supplier_frameworks_visible_for_role(
@@ -155,6 +198,7 @@ def update_supplier_name(supplier_id):
     data_api_client.update_supplier(
         supplier['suppliers']['id'], {'name': new_supplier_name}, current_user.email_address
     )
+    supplier_search_pages_cache.invalidate()
     flash(SUPPLIER_DETAILS_UPDATED_MESSAGE.format(supplier_name=new_supplier_name))
     return redirect(url_for('.supplier_details', supplier_id=supplier_id))
 
@@ -176,6 +220,7 @@ def edit_supplier_registered_name(supplier_id):
             {'registeredName': form.registered_company_name.data},
             current_user.email_address
         )
+        supplier_search_pages_cache.invalidate()
         flash(SUPPLIER_DETAILS_UPDATED_MESSAGE.format(supplier_name=supplier['name']))
 
         return redirect(url_for('.supplier_details', supplier_id=supplier_id))
@@ -194,7 +239,6 @@ def edit_supplier_registered_name(supplier_id):
 @role_required('admin-ccs-data-controller')
 def edit_supplier_registered_company_number(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    frameworks = data_api_client.find_frameworks()['frameworks']
 
     # Take the registered company numbers from the supplier, as we need to know which type it is (CH or other)
     prefill_data = {
@@ -222,7 +266,10 @@ def edit_supplier_registered_company_number(supplier_id):
             }
 
         # Although we've fetched the reg number from the supplier, any recent declaration should be updated too
-        supplier_frameworks = data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"]
+        supplier_frameworks, frameworks = fetch_concurrently(
+            lambda: data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"],
+            lambda: get_frameworks(data_api_client),
+        )
         visible_supplier_frameworks = get_supplier_frameworks_visible_for_role(
             supplier_frameworks, current_user, frameworks
         )
@@ -234,9 +281,11 @@ def edit_supplier_registered_company_number(supplier_id):
             supplier=update_supplier_payload,
             user=current_user.email_address
         )
+        supplier_search_pages_cache.invalidate()
 
         if most_recent_supplier_framework.get('declaration'):
-            data_api_client.update_supplier_declaration(
+            update_supplier_declaration(
+                data_api_client,
                 supplier_id,
                 most_recent_supplier_framework['frameworkSlug'],
                 update_declaration_payload,
@@ -323,29 +372,22 @@ def view_supplier_declaration(supplier_id, framework_slug):
     if framework_slug in DEPRECATED_FRAMEWORK_SLUGS:
         abort(404)
 
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
+    def get_supplier_framework_or_empty():
+        try:
+            return data_api_client.get_supplier_framework_info(supplier_id, framework_slug)["frameworkInterest"]
+        except APIError as e:
+            if e.status_code != 404:
+                raise
+            return {}
+
+    supplier, framework, sf = fetch_concurrently(
+        lambda: data_api_client.get_supplier(supplier_id)['suppliers'],
+        lambda: data_api_client.get_framework(framework_slug)['frameworks'],
+        get_supplier_framework_or_empty,
+    )
     if framework['status'] not in ('pending', 'standstill', 'live', 'expired',):
         abort(403)
-    try:
-        sf = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)["frameworkInterest"]
-    except APIError as e:
-        if e.status_code != 404:
-            raise
-        sf = {}
-
-    content = content_loader.get_manifest(
-        framework_slug,
-        'declaration',
-    ).filter(sf.get("declaration", {}), inplace_allowed=True)
-    declaration_sections = content.sections
-    question_content = OrderedDict(
-        (question.id, question)
-        for question in sorted(
-            chain.from_iterable(section.questions for section in declaration_sections),
-            key=lambda question: question.number
-        )
-    )
+
     modern_slavery_fields = ['modernSlaveryStatement', 'modernSlaveryStatementOptional']
     declaration_with_public_assets = sf.get("declaration", {})
     for field in modern_slavery_fields:
@@ -353,20 +395,15 @@ def view_supplier_declaration(supplier_id, framework_slug):
             declaration_with_public_assets[field] = rewrite_supplier_asset_path(
                 declaration_with_public_assets[field],
                 current_app.config['DM_ASSETS_URL'])
-    # Enhance question_content with any nested questions
-    for question in chain.from_iterable(section.questions for section in declaration_sections):
-        if question.type == 'multiquestion':
-            for q in question.questions:
-                question_content[q.id] = q
 
     return render_template(
         "suppliers/view_declaration.html",
         supplier=supplier,
         framework=framework,
         supplier_framework=sf,
-        declaration=declaration_with_public_assets,
-        content=content,
-        question_content=question_content
+        declaration_summary=content_loader.get_declaration_layout(framework_slug).summary(
+            declaration_with_public_assets
+        ),
     )
 
 
@@ -376,27 +413,17 @@ def view_signed_agreement(supplier_id, framework_slug):
     # not properly validating this - all we do is pass it through
     next_status = request.args.get("next_status")
 
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
+    supplier, framework, supplier_framework = fetch_concurrently(
+        lambda: data_api_client.get_supplier(supplier_id)['suppliers'],
+        lambda: data_api_client.get_framework(framework_slug)['frameworks'],
+        lambda: data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest'],
+    )
     if not framework.get('frameworkAgreementVersion'):
         abort(404)
-    supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
     if not supplier_framework.get('agreementReturned'):
         abort(404)
 
-    lot_names = []
-    if framework["status"] in ("live", "expired"):
-        # If the framework is live or expired we don't need to filter drafts, we only care about successful services
-        service_iterator = data_api_client.find_services_iter(supplier_id=supplier_id, framework=framework_slug)
-        for service in service_iterator:
-            if service['lotName'] not in lot_names:
-                lot_names.append(service['lotName'])
-    else:
-        # If the framework has not yet become live we need to filter out unsuccessful services
-        service_iterator = data_api_client.find_draft_services_iter(supplier_id=supplier_id, framework=framework_slug)
-        for service in service_iterator:
-            if service["status"] == "submitted" and service['lotName'] not in lot_names:
-                lot_names.append(service['lotName'])
+    lot_names = get_supplier_lot_names(data_api_client, supplier_id, framework)
 
     agreements_bucket = s3.S3(
         current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
@@ -423,7 +450,7 @@ def view_signed_agreement(supplier_id, framework_slug):
         supplier=supplier,
         framework=framework,
         supplier_framework=supplier_framework,
-        lot_names=list(sorted(lot_names)),
+        lot_names=list(lot_names),
         agreement_url=url,
         agreement_ext=agreement_ext,
         next_status=next_status,
@@ -438,6 +465,7 @@ def put_signed_agreement_on_hold(agreement_id):
     next_status = request.args.get("next_status")
 
     agreement = data_api_client.put_signed_agreement_on_hold(agreement_id, current_user.email_address)["agreement"]
+    invalidate_agreements(agreement["frameworkSlug"])
 
     flash(AGREEMENT_ON_HOLD_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -460,6 +488,7 @@ def approve_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    invalidate_agreements(agreement["frameworkSlug"])
 
     flash(AGREEMENT_APPROVED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -482,6 +511,7 @@ def unapprove_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    invalidate_agreements(agreement["frameworkSlug"])
 
     flash(AGREEMENT_APPROVAL_CANCELLED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -525,9 +555,11 @@ def download_agreement_file(supplier_id, framework_slug, document_name):
 @main.route('/suppliers/<int:supplier_id>/countersigned-agreements/<framework_slug>', methods=['GET'])
 @role_required('admin-ccs-sourcing')
 def list_countersigned_agreement_file(supplier_id, framework_slug):
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
-    supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
+    supplier, framework, supplier_framework = fetch_concurrently(
+        lambda: data_api_client.get_supplier(supplier_id)['suppliers'],
+        lambda: data_api_client.get_framework(framework_slug)['frameworks'],
+        lambda: data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest'],
+    )
     if not supplier_framework['onFramework'] or supplier_framework['agreementStatus'] in (None, 'draft'):
         abort(404)
     agreements_bucket = s3.S3(
@@ -739,6 +771,7 @@ def find_supplier_users():
 @role_required('admin', 'admin-ccs-category')
 def unlock_user(user_id):
     user = data_api_client.update_user(user_id, locked=False, updater=current_user.email_address)
+    invalidate_user(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -748,6 +781,7 @@ def unlock_user(user_id):
 @role_required('admin', 'admin-ccs-category')
 def activate_user(user_id):
     user = data_api_client.update_user(user_id, active=True, updater=current_user.email_address)
+    invalidate_user(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -757,6 +791,7 @@ def activate_user(user_id):
 @role_required('admin', 'admin-ccs-category')
 def deactivate_user(user_id):
     user = data_api_client.update_user(user_id, active=False, updater=current_user.email_address)
+    invalidate_user(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -792,6 +827,7 @@ def move_user_to_new_supplier(supplier_id):
                 active=True,
                 updater=current_user.email_address
             )
+            invalidate_user(user['users']['id'])
             flash(SUPPLIER_USER_MESSAGES["user_moved"])
         else:
             flash(SUPPLIER_USER_MESSAGES["user_not_moved"], "error")
@@ -812,7 +848,7 @@ def find_supplier_services(supplier_id):
     remove_services_for_framework_slug = request.args.get('remove')
     publish_services_for_framework_slug = request.args.get('publish')
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
 
     frameworks_services = {
@@ -825,6 +861,10 @@ def find_supplier_services(supplier_id):
     }
 
     remove_services_for_framework, publish_services_for_framework = None, None
+    toggle_services_jobs = list(filter(None, (
+        get_background_job(_toggle_supplier_services_job_key(supplier_id, framework_slug))
+        for framework_slug in frameworks_services
+    )))
 
     if remove_services_for_framework_slug:
         if remove_services_for_framework_slug not in frameworks_services:
@@ -854,9 +894,36 @@ def find_supplier_services(supplier_id):
         supplier=supplier,
         remove_services_for_framework=remove_services_for_framework,
         publish_services_for_framework=publish_services_for_framework,
+        toggle_services_jobs=toggle_services_jobs,
     )
 
 
+def _toggle_supplier_services_job_key(supplier_id, framework_slug):
+    return f"toggle-supplier-services-{supplier_id}-{framework_slug}"
+
+
+def _toggle_services_status(services, new_status, updated_by, on_done=None, executor=None):
+    """Set the status of each of `services` concurrently, returning a dict of service id -> exception for any which
+    failed. `on_done(service, exception)` is called as each update finishes."""
+    outcomes = map_concurrently(
+        lambda service: data_api_client.update_service_status(
+            service['id'],
+            new_status,
+            updated_by,
+            wait_for_index=False,
+        ),
+        services,
+        batch_size=current_app.config['DM_BULK_UPDATE_BATCH_SIZE'],
+        on_done=on_done,
+        executor=executor,
+    )
+    return {
+        service['id']: exception
+        for service, (_, exception) in zip(services, outcomes)
+        if exception is not None
+    }
+
+
 @main.route('/suppliers/<int:supplier_id>/services', methods=['POST'])
 @role_required('admin-ccs-category')
 def toggle_supplier_services(supplier_id):
@@ -884,38 +951,74 @@ def toggle_supplier_services(supplier_id):
     if not services:
         abort(400, 'No {} services on framework'.format(toggle_action['old_status']))
 
-    for service in services:
-        data_api_client.update_service_status(
-            service['id'],
-            toggle_action['new_status'],
-            current_user.email_address,
-            wait_for_index=False,
-        )
+    message_format_args = {
+        'supplier_name': services[0]['supplierName'],
+        'framework_name': services[0]['frameworkName'],
+        'total_count': len(services),
+    }
 
-    flash(
-        " ".join((
-            toggle_action['flash_message'].format(
-                supplier_name=services[0]['supplierName'],
-                framework_name=services[0]['frameworkName']
+    if len(services) >= current_app.config['DM_BACKGROUND_TOGGLE_SERVICES_THRESHOLD']:
+        # too many to update within the request's timeout, so report progress on the services page instead
+        new_status, updated_by = toggle_action['new_status'], current_user.email_address
+        job_key = _toggle_supplier_services_job_key(supplier_id, toggle_action['framework_slug'])
+        running_job = get_background_job(job_key)
+        job = start_background_job(
+            job_key,
+            SUPPLIER_SERVICES_TOGGLING_MESSAGE.format(
+                action='Suspending' if remove_services else 'Unsuspending',
+                **message_format_args,
             ),
-            SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
-        ))
-    )
+            len(services),
+            lambda job: _toggle_services_status(
+                services,
+                new_status,
+                updated_by,
+                on_done=lambda service, exception: job.item_done(service['id'], exception),
+                executor=job.executor,
+            ),
+        )
+        if job is running_job:
+            flash(SUPPLIER_SERVICES_ALREADY_TOGGLING_MESSAGE.format(**message_format_args), 'error')
+        else:
+            flash(SUPPLIER_SERVICES_TOGGLE_STARTED_MESSAGE.format(description=job.description))
+        return redirect(url_for('.find_supplier_services', supplier_id=supplier_id))
+
+    errors = _toggle_services_status(services, toggle_action['new_status'], current_user.email_address)
+    if errors:
+        for service_id, exception in errors.items():
+            current_app.logger.error(
+                "Failed to set status of service {service_id}: {error}",
+                extra={'service_id': service_id, 'error': str(exception)},
+            )
+        flash(
+            SUPPLIER_SERVICES_NOT_TOGGLED_MESSAGE.format(
+                failed_count=len(errors),
+                action='suspended' if remove_services else 'unsuspended',
+                service_ids=', '.join(map(str, errors)),
+                **message_format_args,
+            ),
+            'error',
+        )
+    else:
+        flash(
+            " ".join((
+                toggle_action['flash_message'].format(**message_format_args),
+                SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
+            ))
+        )
     return redirect(url_for('.find_supplier_services', supplier_id=supplier_id))
 
 
 def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
     try:
-        manifest = content_loader.get_manifest(framework_slug, "edit_service_as_admin")
+        compiled_manifest = content_loader.get_compiled_manifest(framework_slug, "edit_service_as_admin")
     except ContentNotFoundError:
         return None
 
     return tuple(
         {
             **draft_service,
-            "unansweredRequiredCount": count_unanswered_questions(
-                manifest.filter(draft_service).summary(draft_service)
-            )[0],
+            "unansweredRequiredCount": compiled_manifest.count_unanswered_required(draft_service),
         } for draft_service in draft_services
     )
 
@@ -924,7 +1027,7 @@ def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
 @role_required('admin-framework-manager', 'admin-ccs-sourcing')
 def find_supplier_draft_services(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
 
     if current_user.has_role('admin-ccs-sourcing'):
         visible_framework_statuses = ["pending", "standstill", "live", "expired"]
@@ -936,15 +1039,22 @@ def find_supplier_draft_services(supplier_id):
 
     frameworks = (fw for fw in frameworks if fw['status'] in visible_framework_statuses)
 
+    frameworks_grouped_draft_services = [
+        (framework_slug, tuple(draft_services))
+        for framework_slug, draft_services in groupby(sorted(
+            data_api_client.find_draft_services_iter(supplier_id),
+            key=lambda draft_service: (draft_service["frameworkSlug"], draft_service["createdAt"]),
+        ), key=lambda draft_service: draft_service["frameworkSlug"])
+    ]
+    # each framework's drafts are counted against a different manifest, so we count them all at the same time
     frameworks_draft_services = {
         framework_slug: draft_services
-        for framework_slug, draft_services in (
-            (framework_slug, _draft_services_annotated_unanswered_counts(framework_slug, draft_services),)
-            for framework_slug, draft_services in
-            groupby(sorted(
-                data_api_client.find_draft_services_iter(supplier_id),
-                key=lambda draft_service: (draft_service["frameworkSlug"], draft_service["createdAt"]),
-            ), key=lambda draft_service: draft_service["frameworkSlug"])
+        for (framework_slug, _), draft_services in zip(
+            frameworks_grouped_draft_services,
+            fetch_concurrently(*(
+                partial(_draft_services_annotated_unanswered_counts, framework_slug, draft_services)
+                for framework_slug, draft_services in frameworks_grouped_draft_services
+            )),
         ) if draft_services is not None  # omit frameworks for which we couldn't retrieve the manifest
     }
 
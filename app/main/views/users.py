@@ -1,14 +1,18 @@
 from datetime import datetime
 
 from dmutils import s3
+from dmutils.config import convert_to_boolean
 from dmutils.documents import get_signed_url
 from dmutils.flask import timed_render_template as render_template
 from dmutils.forms.errors import get_errors_from_wtform
-from flask import abort, current_app, flash, redirect, request, Response, url_for
+from flask import abort, current_app, flash, request, Response, url_for
 from flask_login import current_user
 
 from ..forms import EditUserNameForm
+from ..helpers.frameworks import get_frameworks
+from ..helpers.report_downloads import report_download_response
 from ..helpers.user_downloads import generate_user_csv
+from ..helpers.users import invalidate_user
 from .. import main
 from ..auth import role_required
 from ... import data_api_client
@@ -51,6 +55,7 @@ def change_user_name(user_id):
     if form.validate_on_submit():
         name = form.data.get('name')
         user = data_api_client.update_user(user_id, name=name, updater=current_user.email_address)['users']
+        invalidate_user(user_id)
 
     form.name.data = user['name']
     errors = get_errors_from_wtform(form)
@@ -101,17 +106,17 @@ def download_supplier_user_list_report(framework_slug, report_type):
     else:
         abort(404)
 
-    url = get_signed_url(reports_bucket, path, current_app.config['DM_ASSETS_URL'])
-    if not url:
-        abort(404)
-
-    return redirect(url)
+    return report_download_response(
+        reports_bucket,
+        path,
+        lambda: get_signed_url(reports_bucket, path, current_app.config['DM_ASSETS_URL']),
+    )
 
 
 @main.route('/users/download/suppliers', methods=['GET'])
 @role_required('admin-framework-manager')
 def supplier_user_research_participants_by_framework():
-    frameworks = data_api_client.find_frameworks().get("frameworks")
+    frameworks = get_frameworks(data_api_client)
     frameworks = sorted(
         (fw for fw in frameworks if not (fw['status'] == 'coming' or (
             fw['status'] == 'expired' and fw['family'] != 'digital-outcomes-and-specialists'
@@ -140,14 +145,23 @@ def download_supplier_user_research_report(framework_slug):
     reports_bucket = s3.S3(
         current_app.config['DM_REPORTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
     )
-    path = "{framework_slug}/reports/user-research-suppliers-on-{framework_slug}.csv"
-    url = get_signed_url(
-        reports_bucket, path.format(framework_slug=framework_slug), current_app.config['DM_ASSETS_URL']
+    path = "{framework_slug}/reports/user-research-suppliers-on-{framework_slug}.csv".format(
+        framework_slug=framework_slug
     )
-    if not url:
-        abort(404)
 
-    return redirect(url)
+    return report_download_response(
+        reports_bucket,
+        path,
+        lambda: get_signed_url(reports_bucket, path, current_app.config['DM_ASSETS_URL']),
+    )
+
+
+def _user_csv_sort_buffer_size():
+    """Users are sorted by name unless the `sorted` query parameter is "false", in which case they are streamed in the
+    order they're returned by the API"""
+    if convert_to_boolean(request.args.get('sorted', True)) is False:
+        return None
+    return current_app.config['DM_USER_CSV_SORT_BUFFER_SIZE']
 
 
 @main.route('/users/download/buyers', methods=['GET'])
@@ -158,7 +172,7 @@ def download_buyers():
     users = data_api_client.find_users_iter(role="buyer")
 
     return Response(
-        generate_user_csv(users),
+        generate_user_csv(users, sort_buffer_size=_user_csv_sort_buffer_size()),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
@@ -178,7 +192,7 @@ def download_buyers_for_user_research():
     download_filename = "user-research-buyers-on-{}.csv".format(datetime.utcnow().strftime('%Y-%m-%d-at-%H-%M-%S'))
 
     return Response(
-        generate_user_csv(users),
+        generate_user_csv(users, sort_buffer_size=_user_csv_sort_buffer_size()),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
@@ -0,0 +1,38 @@
+"""The app's own prometheus metrics. They're kept apart from app.metrics, which reads the metrics path from the
+environment as it is imported, so that the modules recording them can be imported before the app is configured."""
+from gds_metrics.metrics import Counter, Gauge, Histogram
+
+
+CACHE_REQUESTS_TOTAL = Counter(
+    'cache_requests_total',
+    'Total lookups of in-process caches',
+    ['cache', 'result']
+)
+
+OUTBOUND_CALL_DURATION_SECONDS = Histogram(
+    'outbound_call_duration_seconds',
+    'Time spent in calls to the Data API, S3 and the content loader, by the view making them',
+    ['endpoint', 'kind', 'operation']
+)
+
+DATA_API_POOL_CONNECTIONS_IN_USE = Gauge(
+    'data_api_pool_connections_in_use',
+    'Data API requests in progress, each using one of the connection pool\'s connections',
+    multiprocess_mode='livesum'
+)
+
+DATA_API_POOL_SATURATED_TOTAL = Counter(
+    'data_api_pool_saturated_total',
+    'Data API requests made while all of the connection pool\'s connections were in use'
+)
+
+DATA_API_CONNECTIONS_OPENED_TOTAL = Counter(
+    'data_api_connections_opened_total',
+    'New connections opened to the Data API'
+)
+
+SUPPLIER_SEARCH_PREFETCH_TOTAL = Counter(
+    'supplier_search_prefetch_total',
+    'Pages of supplier search results prefetched, and later pages served from those prefetched (hit) or not (miss)',
+    ['result']
+)
@@ -0,0 +1,57 @@
+import time
+
+from flask import request, session
+from flask_session.sessions import RedisSessionInterface
+
+
+# the session key holding when (in seconds since the epoch) the session's expiry was last pushed back
+SESSION_REFRESHED_AT_KEY = "_refreshed_at"
+
+
+class SlidingExpiryRedisSessionInterface(RedisSessionInterface):
+    """flask_session's RedisSessionInterface, but only saving a session (and so re-issuing its cookie and resetting its
+    expiry in redis) when it has been modified, as flask's own session interface does with SESSION_REFRESH_EACH_REQUEST
+    turned off.
+    """
+
+    def save_session(self, app, session, response):
+        # an emptied session is still saved, so that it's deleted
+        if session and not self.should_set_cookie(app, session):
+            return
+        super().save_session(app, session, response)
+
+
+def _session_refresh_due(application, now):
+    refreshed_at = session.get(SESSION_REFRESHED_AT_KEY)
+    # (DM_SESSION_REFRESH_FRACTION is a string if it's set from the environment)
+    refresh_interval = application.permanent_session_lifetime.total_seconds() * float(
+        application.config["DM_SESSION_REFRESH_FRACTION"]
+    )
+    return refreshed_at is None or now - refreshed_at >= refresh_interval
+
+
+def init_session_refresh(application, exempt_path_prefixes):
+    """Keep sessions alive while they're in use, with a sliding expiry of PERMANENT_SESSION_LIFETIME.
+
+    Rather than re-issuing the session cookie (and rewriting the session) on every request, it is only re-issued once
+    DM_SESSION_REFRESH_FRACTION of the lifetime has passed since it last was, so a session left idle expires between
+    (1 - DM_SESSION_REFRESH_FRACTION) and 1 lifetimes after it was last used. Requests for paths starting with one of
+    `exempt_path_prefixes` neither refresh nor start sessions.
+    """
+    if isinstance(application.session_interface, RedisSessionInterface):
+        interface = application.session_interface
+        application.session_interface = SlidingExpiryRedisSessionInterface(
+            interface.redis, interface.key_prefix, interface.use_signer, interface.permanent,
+        )
+
+    exempt_path_prefixes = tuple(exempt_path_prefixes)
+
+    @application.before_request
+    def refresh_session():
+        if request.path.startswith(exempt_path_prefixes):
+            return
+        if not session.permanent:
+            session.permanent = True
+        now = time.time()
+        if _session_refresh_due(application, now):
+            session[SESSION_REFRESHED_AT_KEY] = now
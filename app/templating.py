@@ -0,0 +1,84 @@
+import logging
+import os
+
+from dmutils.flask import SLOW_RENDER_THRESHOLD
+from dmutils.timing import logged_duration
+from flask import has_request_context
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+
+# the extensions of the templates precompile_templates compiles - other files in the template folders (javascript,
+# package metadata and so on) are never loaded as templates
+PRECOMPILED_TEMPLATE_EXTENSIONS = ("html", "njk")
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_logging_condition(log_context):
+    # always log the templates compiled at startup, but only the slow (or sampled) ones compiled while serving requests,
+    # as timed_render_template would
+    return not has_request_context() or logged_duration.default_condition(log_context) or \
+        log_context["duration_real"] > SLOW_RENDER_THRESHOLD
+
+
+class TimedCompileMixin:
+    """A mixin for a jinja Environment which logs how long each template takes to compile.
+
+    Templates loaded from the bytecode cache aren't compiled, so aren't logged.
+    """
+
+    def compile(self, source, name=None, filename=None, *args, **kwargs):
+        with logged_duration(
+            logger=logger,
+            message="Spent {duration_real}s compiling template {template_name}",
+            condition=_compile_logging_condition,
+        ) as log_context:
+            log_context["template_name"] = name
+            return super().compile(source, name, filename, *args, **kwargs)
+
+
+def timed_compile_environment(environment_class):
+    """Return a subclass of the jinja Environment `environment_class` which logs its template compile times"""
+    return type(f"TimedCompile{environment_class.__name__}", (TimedCompileMixin, environment_class), {})
+
+
+def init_bytecode_cache(application):
+    """Keep `application`'s compiled templates in DM_JINJA_BYTECODE_CACHE_DIR (if DM_JINJA_BYTECODE_CACHE is set)"""
+    if not application.config["DM_JINJA_BYTECODE_CACHE"]:
+        return
+
+    bytecode_cache_dir = application.config["DM_JINJA_BYTECODE_CACHE_DIR"]
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+    # the jinja environment already exists by now (dmutils' init_app adds template filters to it), but it only looks
+    # at its bytecode cache when loading a template
+    application.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+
+def precompile_templates(application):
+    """Compile every template `application` can load into its jinja environment (and so its bytecode cache, if it has
+    one), returning the names of those compiled.
+
+    Templates which fail to compile are logged and skipped, so that they fail when they are used as they would have
+    done without precompilation.
+    """
+    jinja_env = application.jinja_env
+    compiled = []
+    with logged_duration(
+        logger=application.logger,
+        message="Precompiled {template_count} templates in {duration_real}s",
+        log_level=logging.INFO,
+        condition=True,
+    ) as log_context:
+        for template_name in jinja_env.list_templates(extensions=PRECOMPILED_TEMPLATE_EXTENSIONS):
+            try:
+                jinja_env.get_template(template_name)
+            except TemplateSyntaxError as e:
+                application.logger.warning(
+                    "Failed to precompile template {template_name}: {error}",
+                    extra={"template_name": template_name, "error": str(e)},
+                )
+                continue
+            compiled.append(template_name)
+        log_context["template_count"] = len(compiled)
+    return compiled
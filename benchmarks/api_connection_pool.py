@@ -0,0 +1,62 @@
+"""Compare dmapiclient's DataAPIClient, which opens a new connection for every request, with PooledDataAPIClient.
+
+`--threads` threads each make `--requests` find_frameworks calls to a stub API which answers after `--latency`
+seconds. We report the total time taken, the mean time per call and the number of connections the stub API accepted.
+The stub API is plain HTTP, so the TLS handshakes a pooled connection also saves aren't included.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dmapiclient import DataAPIClient
+from flask import Flask
+
+from app.api_client import PooledDataAPIClient
+from .stub_api import StubAPI
+
+
+def _run(client, threads, requests):
+    def make_requests(_):
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.find_frameworks()
+            durations.append(time.perf_counter() - start)
+        return durations
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        durations = [duration for thread_durations in executor.map(make_requests, range(threads))
+                     for duration in thread_durations]
+    return time.perf_counter() - start, sum(durations) / len(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds the stub API waits before responding")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per thread")
+    parser.add_argument("--pool-size", type=int, default=0, help="DM_DATA_API_POOL_SIZE")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    print(f"{args.threads} threads x {args.requests} requests, stub API latency {args.latency * 1000:.0f}ms")
+    print(f"{'client':<10} {'total':>9} {'per call':>10} {'connections':>12}")
+    for name, client in (("dmapiclient", DataAPIClient()), ("pooled", PooledDataAPIClient())):
+        with StubAPI([("GET", r"/frameworks", {"frameworks": []})], latency=args.latency) as stub:
+            app.config.update(
+                DM_DATA_API_URL=stub.url,
+                DM_DATA_API_AUTH_TOKEN="token",
+                DM_DATA_API_POOL_SIZE=args.pool_size,
+                DM_WEB_SERVER_THREADS=args.threads,
+                DM_CONCURRENT_FETCH_MAX_WORKERS=0,
+                DM_BACKGROUND_JOB_MAX_WORKERS=0,
+                DM_DATA_API_COMPRESSION=True,
+            )
+            client.init_app(app)
+            total, per_call = _run(client, args.threads, args.requests)
+            print(f"{name:<10} {total:>8.2f}s {per_call * 1000:>8.2f}ms {len(stub.client_ports):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure time to the first buyer row, total time and peak memory of the buyer CSV exports (download_buyers and
+download_buyers_for_user_research) when sorting all buyers in memory, sorting with temporary files and not sorting.
+
+A stub API serves `--buyers` synthetic buyers in pages of `--page-size`, each page after `--latency` seconds.
+"""
+import argparse
+import random
+import string
+import time
+import tracemalloc
+
+from dmapiclient import DataAPIClient
+
+from app.main.helpers.user_downloads import generate_user_csv
+from .stub_api import StubAPI
+
+
+def _users_route(buyer_count, page_size):
+    random.seed(0)
+    names = ["".join(random.choices(string.ascii_letters, k=12)) for _ in range(buyer_count)]
+
+    def users_page(path, query):
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * page_size
+        body = {
+            "users": [
+                {
+                    "id": i,
+                    "name": names[i],
+                    "emailAddress": f"buyer-{i}@example.gov.uk",
+                    "role": "buyer",
+                    "userResearchOptedIn": i % 3 == 0,
+                    "active": True,
+                    "locked": False,
+                    "createdAt": "2020-01-01T00:00:00.000000Z",
+                }
+                for i in range(start, min(start + page_size, buyer_count))
+            ],
+            "links": {},
+        }
+        if start + page_size < buyer_count:
+            body["links"]["next"] = f"{path}?role=buyer&page={page + 1}"
+        return body
+
+    return ("GET", r"/users", users_page)
+
+
+def _measure(csv_lines):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_row = None
+    next(csv_lines)  # the header row is always sent straight away
+    for _ in csv_lines:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+    total = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_row, total, peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--buyers", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds the stub API waits before each page")
+    parser.add_argument("--sort-buffer-size", type=int, default=5000, help="DM_USER_CSV_SORT_BUFFER_SIZE")
+    args = parser.parse_args()
+
+    with StubAPI([_users_route(args.buyers, args.page_size)], latency=args.latency) as stub:
+        client = DataAPIClient(stub.url, "token")
+
+        print(f"{args.buyers} buyers in pages of {args.page_size}, stub API latency {args.latency * 1000:.0f}ms")
+        print(f"{'export':<14} {'sort':<22} {'first row':>11} {'total':>8} {'peak memory':>12}")
+        for export, filter_users in (
+            ("buyers", lambda users: users),
+            ("user-research", lambda users: filter(lambda i: i["userResearchOptedIn"], users)),
+        ):
+            for sort, sort_buffer_size in (
+                ("in memory", args.buyers),
+                (f"buffer of {args.sort_buffer_size}", args.sort_buffer_size),
+                ("none (sorted=false)", None),
+            ):
+                csv_lines = generate_user_csv(
+                    filter_users(client.find_users_iter(role="buyer")),
+                    sort_buffer_size=sort_buffer_size,
+                )
+                first_row, total, peak_bytes = _measure(csv_lines)
+                print(
+                    f"{export:<14} {sort:<22} {first_row * 1000:>9.1f}ms {total:>7.2f}s "
+                    f"{peak_bytes / (1024 * 1024):>10.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
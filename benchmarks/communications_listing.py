@@ -0,0 +1,91 @@
+"""Measure the time manage_communications spends listing a framework's communications and clarifications in S3: one
+comm type after the other (as it used to), concurrently, and from the listing cache.
+
+A local stand-in for dmutils.s3.S3 sleeps `--list-latency` seconds per 1000 keys listed and, because listings are
+made with load_timestamps=True, `--object-latency` seconds per object for the extra request fetching its timestamp.
+"""
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from flask import Flask
+
+from app.main.views import communications
+
+
+class StandInS3:
+    def __init__(self, files_per_comm_type, list_latency, object_latency):
+        self.files_per_comm_type = files_per_comm_type
+        self.list_latency = list_latency
+        self.object_latency = object_latency
+
+    def __call__(self, bucket_name, endpoint_url=None):
+        return self
+
+    def list(self, prefix='', delimiter='', load_timestamps=False):
+        time.sleep(self.list_latency * -(-self.files_per_comm_type // 1000))
+        objects = []
+        for i in range(self.files_per_comm_type):
+            if load_timestamps:
+                time.sleep(self.object_latency)
+            objects.append({
+                "path": f"{prefix}/file-{i}.pdf",
+                "filename": f"file-{i}",
+                "ext": "pdf",
+                "size": 1024,
+                "last_modified": "2020-01-01T00:00:00.000000Z",
+            })
+        return objects
+
+
+def _time(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=300, help="files of each comm type")
+    parser.add_argument("--list-latency", type=float, default=0.05, help="seconds per 1000 keys listed")
+    parser.add_argument("--object-latency", type=float, default=0.001, help="seconds per object timestamp fetched")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"] = 8
+    app.config["DM_COMMUNICATIONS_BUCKET"] = "communications"
+    stand_in = StandInS3(args.files, args.list_latency, args.object_latency)
+
+    with mock.patch.object(communications, "s3", SimpleNamespace(S3=stand_in)), app.test_request_context("/"):
+        print(
+            f"{args.files} files of each comm type, list latency {args.list_latency * 1000:.0f}ms per 1000 keys, "
+            f"{args.object_latency * 1000:.1f}ms per object, median of {args.repeat} runs"
+        )
+
+        app.config["DM_COMMUNICATIONS_LISTING_CACHE_TTL"] = 0
+        sequential = _time(
+            lambda: [
+                communications._list_comm_type("g-cloud-12", comm_type) for comm_type in communications._comm_types
+            ],
+            args.repeat,
+        )
+        concurrent = _time(lambda: communications._list_communications("g-cloud-12"), args.repeat)
+
+        app.config["DM_COMMUNICATIONS_LISTING_CACHE_TTL"] = 300
+        communications._list_communications("g-cloud-12")
+        cached = _time(lambda: communications._list_communications("g-cloud-12"), args.repeat)
+        communications.communications_listing_cache.invalidate()
+
+        print(f"{'listing':<12} {'time':>10} {'speedup':>8}")
+        for name, duration in (("sequential", sequential), ("concurrent", concurrent), ("cached", cached)):
+            print(f"{name:<12} {duration * 1000:>8.2f}ms {sequential / duration:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
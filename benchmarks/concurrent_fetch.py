@@ -0,0 +1,76 @@
+"""Compare making a view's independent Data API calls one after another with making them via fetch_concurrently.
+
+A stub API answers each call after `--latency` seconds. We time the calls made by the supplier details page
+(find_frameworks, get_supplier and get_supplier_frameworks) and by the supplier declaration and agreement pages
+(get_supplier, get_framework and get_supplier_framework_info), `--repeat` times each.
+"""
+import argparse
+import statistics
+import time
+
+from dmapiclient import DataAPIClient
+from flask import Flask
+
+from app.main.helpers.concurrency import fetch_concurrently
+from .stub_api import StubAPI
+
+
+ROUTES = [
+    ("GET", r"/frameworks", {"frameworks": []}),
+    ("GET", r"/frameworks/[^/]+", {"frameworks": {"slug": "g-cloud-12", "status": "live"}}),
+    ("GET", r"/suppliers/\d+", {"suppliers": {"id": 1234, "name": "Supplier"}}),
+    ("GET", r"/suppliers/\d+/frameworks", {"frameworkInterest": []}),
+    ("GET", r"/suppliers/\d+/frameworks/[^/]+", {"frameworkInterest": {"declaration": {}}}),
+]
+
+
+def _page_calls(client):
+    return {
+        "supplier_details": [
+            lambda: client.find_frameworks()["frameworks"],
+            lambda: client.get_supplier(1234)["suppliers"],
+            lambda: client.get_supplier_frameworks(1234)["frameworkInterest"],
+        ],
+        "view_supplier_declaration": [
+            lambda: client.get_supplier(1234)["suppliers"],
+            lambda: client.get_framework("g-cloud-12")["frameworks"],
+            lambda: client.get_supplier_framework_info(1234, "g-cloud-12")["frameworkInterest"],
+        ],
+    }
+
+
+def _time(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stub API waits before responding")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8, help="DM_CONCURRENT_FETCH_MAX_WORKERS")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"] = args.workers
+
+    with StubAPI(ROUTES, latency=args.latency) as stub, app.test_request_context("/"):
+        client = DataAPIClient(stub.url, "token")
+
+        print(f"stub API latency {args.latency * 1000:.0f}ms, median of {args.repeat} runs")
+        print(f"{'page':<26} {'sequential':>11} {'concurrent':>11} {'speedup':>8}")
+        for page, calls in _page_calls(client).items():
+            sequential = _time(lambda: [call() for call in calls], args.repeat)
+            concurrent = _time(lambda: fetch_concurrently(*calls), args.repeat)
+            print(
+                f"{page:<26} {sequential * 1000:>9.1f}ms {concurrent * 1000:>9.1f}ms "
+                f"{sequential / concurrent:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare per-thread deepcopied content loaders with a single SharedContentLoader.
+
+For each approach we start `--threads` threads, each of which performs the work of a "first request" on a fresh
+thread: obtaining its content loader, then fetching and filtering an edit_service_as_admin manifest. We report the
+slowest such first request and the memory retained by the content loaders once all threads have finished.
+"""
+import argparse
+import os
+import threading
+import time
+import tracemalloc
+from copy import deepcopy
+
+from dmcontent.content_loader import ContentLoader
+from dmcontent.errors import ContentNotFoundError
+
+from app.content_store import SharedContentLoader
+
+
+def _load_primary_content_loader(content_path, framework_slugs):
+    primary_cl = ContentLoader(content_path)
+    loaded_slugs = []
+    for framework_slug in framework_slugs:
+        try:
+            primary_cl.load_manifest(framework_slug, "services", "edit_service_as_admin")
+            primary_cl.load_manifest(framework_slug, "declaration", "declaration")
+        except ContentNotFoundError:
+            continue
+        loaded_slugs.append(framework_slug)
+    return primary_cl, loaded_slugs
+
+
+def _run_threads(get_content_loader, framework_slug, thread_count):
+    durations = []
+    retained = []
+
+    def first_request():
+        start = time.perf_counter()
+        content_loader = get_content_loader()
+        content_loader.get_manifest(framework_slug, "edit_service_as_admin").filter({}, inplace_allowed=True)
+        durations.append(time.perf_counter() - start)
+        # keep a reference, as a worker thread's content loader would have lived as long as the thread
+        retained.append(content_loader)
+
+    tracemalloc.start()
+    threads = [threading.Thread(target=first_request) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    retained_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return max(durations), sum(durations) / len(durations), retained_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--content-path", default="app/content")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--frameworks", nargs="*", help="framework slugs to load (default: all in content path)")
+    args = parser.parse_args()
+
+    framework_slugs = args.frameworks or sorted(os.listdir(os.path.join(args.content_path, "frameworks")))
+    primary_cl, loaded_slugs = _load_primary_content_loader(args.content_path, framework_slugs)
+    if not loaded_slugs:
+        parser.error(f"no edit_service_as_admin manifests found under {args.content_path}")
+    framework_slug = loaded_slugs[-1]
+
+    print(f"{len(loaded_slugs)} frameworks loaded, {args.threads} threads, filtering {framework_slug}")
+    print(f"{'approach':<10} {'max first request':>18} {'mean first request':>19} {'retained memory':>16}")
+
+    shared_cl = SharedContentLoader(primary_cl)
+    for name, get_content_loader in (
+        ("deepcopy", lambda: deepcopy(primary_cl)),
+        ("shared", lambda: shared_cl),
+    ):
+        max_duration, mean_duration, retained_bytes = _run_threads(get_content_loader, framework_slug, args.threads)
+        print(
+            f"{name:<10} {max_duration * 1000:>16.1f}ms {mean_duration * 1000:>17.1f}ms "
+            f"{retained_bytes / (1024 * 1024):>14.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
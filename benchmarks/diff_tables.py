@@ -0,0 +1,51 @@
+"""Measure the time taken to render the service diff tables shown by service_updates with each diff table renderer,
+using the revisions from the diff tool tests (tests/app/test_diff_tool.py).
+
+Each revision's answers are diffed directly rather than through a framework manifest, so no content is needed.
+`--scale` repeats each answer's lines to simulate longer answers.
+"""
+import argparse
+import time
+
+from app.main.helpers.diff_tools import DIFF_TABLE_RENDERERS, _get_value_for_difflib
+from tests.app.test_diff_tool import TestHtmlDiffTablesFromSections
+
+
+def _fixture_answer_pairs(scale):
+    parametrize, = (
+        mark for mark in TestHtmlDiffTablesFromSections.test_common_properties.pytestmark
+        if "service_data_a" in mark.args[0]
+    )
+    argnames = [argname.strip() for argname in parametrize.args[0].split(",")]
+    for values in parametrize.args[1]:
+        params = dict(zip(argnames, values))
+        revision_1, revision_2 = params["service_data_a"], params["service_data_b"]
+        for question_id in revision_1.keys() | revision_2.keys():
+            lines_1, lines_2 = (
+                _get_value_for_difflib(revision.get(question_id, [])) * scale for revision in (revision_1, revision_2)
+            )
+            if lines_1 != lines_2:
+                yield lines_1, lines_2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200, help="times to render every table")
+    parser.add_argument("--scale", type=int, default=1, help="times to repeat the lines of each answer")
+    args = parser.parse_args()
+
+    answer_pairs = list(_fixture_answer_pairs(args.scale))
+
+    print(f"{len(answer_pairs)} tables, each rendered {args.repeat} times, answers scaled {args.scale}x")
+    print(f"{'renderer':<10} {'per table':>10} {'total':>8}")
+    for renderer, render_table in DIFF_TABLE_RENDERERS.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for lines_1, lines_2 in answer_pairs:
+                render_table(lines_1, lines_2)
+        total = time.perf_counter() - start
+        print(f"{renderer:<10} {total * 1e6 / (args.repeat * len(answer_pairs)):>8.0f}us {total:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare fetching the archived service for each awarded direct award project one at a time with prefetching them
+concurrently through iter_prefetched, as download_direct_award_outcomes does.
+
+`--projects` synthetic projects award services chosen at random from `--services` distinct archived services, which
+a stub API returns after `--latency` seconds. We report the time to the first row (how long before the download
+starts) and to the last.
+"""
+import argparse
+import random
+import time
+
+from dmapiclient import DataAPIClient
+from flask import Flask
+
+from app.main.helpers.concurrency import iter_prefetched
+from app.main.views.outcomes import ARCHIVED_SERVICES_CACHE_SIZE
+from .stub_api import StubAPI
+
+
+ROUTES = [
+    ("GET", r"/archived-services/\d+", {"services": {"serviceName": "Service", "supplierId": 1, "supplierName": "S"}}),
+]
+
+
+def _sequential(client, projects):
+    for project in projects:
+        yield project, client.get_archived_service(archived_service_id=project["archivedServiceId"])["services"]
+
+
+def _prefetched(client, projects, window):
+    return iter_prefetched(
+        projects,
+        lambda project: project["archivedServiceId"],
+        lambda archived_service_id: client.get_archived_service(archived_service_id=archived_service_id)["services"],
+        window=window,
+        cache_size=ARCHIVED_SERVICES_CACHE_SIZE,
+    )
+
+
+def _time(rows):
+    start = time.perf_counter()
+    first_row = None
+    for _ in rows:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+    return first_row, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=200, help="number of distinct archived services awarded")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds the stub API waits before responding")
+    parser.add_argument("--window", type=int, default=8, help="DM_PREFETCH_WINDOW")
+    parser.add_argument("--workers", type=int, default=8, help="DM_CONCURRENT_FETCH_MAX_WORKERS")
+    args = parser.parse_args()
+
+    random.seed(0)
+    projects = [{"archivedServiceId": random.randrange(args.services)} for _ in range(args.projects)]
+
+    app = Flask(__name__)
+    app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"] = args.workers
+
+    with StubAPI(ROUTES, latency=args.latency) as stub, app.test_request_context("/"):
+        client = DataAPIClient(stub.url, "token")
+
+        print(
+            f"{args.projects} projects awarding {args.services} services, "
+            f"stub API latency {args.latency * 1000:.0f}ms"
+        )
+        print(f"{'approach':<12} {'first row':>10} {'last row':>10} {'API calls':>10}")
+        for name, rows in (
+            ("sequential", lambda: _sequential(client, projects)),
+            ("prefetched", lambda: _prefetched(client, projects, args.window)),
+        ):
+            request_count = stub.request_count
+            first_row, last_row = _time(rows())
+            print(
+                f"{name:<12} {first_row * 1000:>8.1f}ms {last_row:>9.2f}s "
+                f"{stub.request_count - request_count:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Measure the time find_supplier_draft_services spends counting each draft service's unanswered required questions
+against the real edit_service_as_admin manifests in `--content-path`: through dmcontent's filter and summary (as it
+used to), with a CompiledManifest one framework after another, and with a CompiledManifest for each framework
+concurrently.
+
+Each framework gets `--drafts` synthetic drafts spread across its lots, each answering every question it is asked
+apart from a random `--unanswered` fraction of them.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dmcontent.content_loader import ContentLoader
+from dmcontent.errors import ContentNotFoundError
+from dmcontent.questions import List, Multiquestion, Pricing
+from dmcontent.utils import count_unanswered_questions
+
+from app.content_store import SharedContentLoader
+
+
+def _lot_slugs(manifest):
+    return sorted({
+        lot_slug
+        for section in manifest.sections
+        for question in section.questions
+        for depends in question.get("depends", [])
+        if depends["on"] == "lot"
+        for lot_slug in depends["being"]
+    }) or [None]
+
+
+def _answer(question, unanswered, rng):
+    if isinstance(question, Multiquestion):
+        answers = {}
+        for sub_question in question.questions:
+            answers.update(_answer(sub_question, unanswered, rng))
+        return answers
+    if rng.random() < unanswered:
+        return {}
+    if isinstance(question, Pricing):
+        return {field: "1" for field in question.fields.values()}
+    if isinstance(question, List):
+        return {question.id: [option.get("value", option.get("label")) for option in question.get("options", [])[:1]]}
+    if question.get("assuranceApproach"):
+        return {question.id: {"value": "answer", "assurance": "Service provider assertion"}}
+    return {question.id: "answer"}
+
+
+def _make_drafts(manifest, count, unanswered, rng):
+    lot_slugs = _lot_slugs(manifest)
+    drafts = []
+    for i in range(count):
+        draft = {"id": i, "lot": lot_slugs[i % len(lot_slugs)]}
+        for section in manifest.filter(draft).sections:
+            for question in section.questions:
+                draft.update(_answer(question, unanswered, rng))
+        drafts.append(draft)
+    return drafts
+
+
+def _count_with_dmcontent(content_loader, framework_slug, drafts):
+    manifest = content_loader.get_manifest(framework_slug, "edit_service_as_admin")
+    return [count_unanswered_questions(manifest.filter(draft).summary(draft))[0] for draft in drafts]
+
+
+def _count_compiled(content_loader, framework_slug, drafts):
+    compiled_manifest = content_loader.get_compiled_manifest(framework_slug, "edit_service_as_admin")
+    return [compiled_manifest.count_unanswered_required(draft) for draft in drafts]
+
+
+def _time(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--content-path", default="app/content")
+    parser.add_argument("--frameworks", nargs="*", default=["g-cloud-10", "g-cloud-11", "g-cloud-12"])
+    parser.add_argument("--drafts", type=int, default=50, help="drafts per framework")
+    parser.add_argument("--unanswered", type=float, default=0.1, help="fraction of questions left unanswered")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    primary_cl = ContentLoader(args.content_path)
+    framework_slugs = []
+    for framework_slug in args.frameworks:
+        if not os.path.isdir(os.path.join(args.content_path, "frameworks", framework_slug)):
+            continue
+        try:
+            primary_cl.load_manifest(framework_slug, "services", "edit_service_as_admin")
+        except ContentNotFoundError:
+            continue
+        framework_slugs.append(framework_slug)
+    if not framework_slugs:
+        parser.error(f"no edit_service_as_admin manifests found under {args.content_path}")
+    content_loader = SharedContentLoader(primary_cl)
+
+    rng = random.Random(0)
+    frameworks_drafts = {
+        framework_slug: _make_drafts(
+            content_loader.get_manifest(framework_slug, "edit_service_as_admin"), args.drafts, args.unanswered, rng,
+        )
+        for framework_slug in framework_slugs
+    }
+
+    for framework_slug, drafts in frameworks_drafts.items():
+        if _count_with_dmcontent(content_loader, framework_slug, drafts) != \
+                _count_compiled(content_loader, framework_slug, drafts):
+            raise AssertionError(f"compiled counts differ from dmcontent's for {framework_slug}")
+
+    executor = ThreadPoolExecutor(max_workers=len(framework_slugs))
+    timings = {
+        "dmcontent": _time(
+            lambda: [
+                _count_with_dmcontent(content_loader, framework_slug, drafts)
+                for framework_slug, drafts in frameworks_drafts.items()
+            ],
+            args.repeat,
+        ),
+        "compiled": _time(
+            lambda: [
+                _count_compiled(content_loader, framework_slug, drafts)
+                for framework_slug, drafts in frameworks_drafts.items()
+            ],
+            args.repeat,
+        ),
+        "concurrent": _time(
+            lambda: list(executor.map(
+                lambda item: _count_compiled(content_loader, *item),
+                frameworks_drafts.items(),
+            )),
+            args.repeat,
+        ),
+    }
+    executor.shutdown()
+
+    print(
+        f"{', '.join(framework_slugs)}: {args.drafts} drafts each, {args.unanswered:.0%} of questions unanswered, "
+        f"median of {args.repeat} runs"
+    )
+    print(f"{'counting':<12} {'time':>10} {'speedup':>8}")
+    for name, duration in timings.items():
+        print(f"{name:<12} {duration * 1000:>8.2f}ms {timings['dmcontent'] / duration:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure the per-request cost of keeping sessions alive: re-issuing the session cookie on every request (as
+refresh_session used to) against the sliding expiry of init_session_refresh, and against not touching the session.
+
+Each of `--requests` requests is for a trivial view by a client with a logged in user's session, using flask's signed
+cookie sessions, or redis sessions through flask_session if `--redis-url` is given. We report the mean time per
+request and the mean bytes of Set-Cookie headers per response.
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from flask import Flask, session
+
+from app.sessions import init_session_refresh
+
+
+def _always_refresh(app):
+    @app.before_request
+    def refresh_session():
+        session.permanent = True
+        session.modified = True
+
+
+def _never_refresh(app):
+    pass
+
+
+def _sliding_expiry(app):
+    init_session_refresh(app, exempt_path_prefixes=("/admin/static",))
+
+
+def _make_app(init_refresh, redis_url):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY="secret",
+        PERMANENT_SESSION_LIFETIME=timedelta(hours=1),
+        SESSION_REFRESH_EACH_REQUEST=init_refresh is _always_refresh,
+        DM_SESSION_REFRESH_FRACTION=0.1,
+    )
+    if redis_url:
+        import flask_session
+        import redis
+        app.config.update(SESSION_TYPE="redis", SESSION_REDIS=redis.from_url(redis_url), SESSION_USE_SIGNER=True)
+        flask_session.Session(app)
+    init_refresh(app)
+
+    @app.route("/admin/page")
+    def page():
+        return "OK"
+
+    @app.route("/admin/login")
+    def login():
+        session.update({"_user_id": "1234", "_fresh": True, "_id": "a" * 128, "csrf_token": "b" * 40})
+        session.permanent = True
+        return "OK"
+
+    return app
+
+
+def _measure(app, requests):
+    client = app.test_client()
+    client.get("/admin/login")
+    cookie_bytes = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/admin/page")
+        cookie_bytes += sum(len(cookie) for cookie in response.headers.getlist("Set-Cookie"))
+    return (time.perf_counter() - start) / requests, cookie_bytes / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--redis-url", help="use redis sessions, stored at this url")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {'redis' if args.redis_url else 'signed cookie'} sessions")
+    print(f"{'refresh':<16} {'per request':>12} {'Set-Cookie':>12}")
+    for name, init_refresh in (
+        ("none", _never_refresh),
+        ("every request", _always_refresh),
+        ("sliding expiry", _sliding_expiry),
+    ):
+        per_request, cookie_bytes = _measure(_make_app(init_refresh, args.redis_url), args.requests)
+        print(f"{name:<16} {per_request * 1e6:>10.1f}us {cookie_bytes:>11.0f}B")
+
+
+if __name__ == "__main__":
+    main()
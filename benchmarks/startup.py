@@ -0,0 +1,86 @@
+"""Profile the app's cold start: the time taken to import `app` (and the slowest of the modules it imports), then each
+phase of create_app and the time until /_status can be served, with content loaded up front and with
+DM_LAZY_CONTENT_LOADING.
+
+A stub API answers find_frameworks after `--latency` seconds, listing every framework in `app/content` as live, so
+the content loaded is that of a real deploy. The import is profiled in a fresh interpreter, with `-X importtime`.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from .stub_api import StubAPI
+
+
+def _import_times(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # nested imports are indented by two spaces a level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        yield depth, name.strip(), int(cumulative_us) / 1e6
+
+
+def _print_import_times(top):
+    import_times = list(_import_times("app"))
+    total = next(cumulative for depth, name, cumulative in import_times if depth == 0 and name == "app")
+    print(f"import app: {total * 1000:.0f}ms, slowest imports made directly by it:")
+    for depth, name, cumulative in sorted(
+        (row for row in import_times if row[0] == 1), key=lambda row: row[2], reverse=True,
+    )[:top]:
+        print(f"  {name:<40} {cumulative * 1000:>8.1f}ms")
+
+
+def _profile_create_app(config_name, lazy):
+    from app import content_loader, create_app
+
+    os.environ["DM_LAZY_CONTENT_LOADING"] = "true" if lazy else "false"
+    start = time.perf_counter()
+    application = create_app(config_name)
+    created = time.perf_counter() - start
+    status_code = application.test_client().get("/admin/_status?ignore-dependencies").status_code
+    first_status = time.perf_counter() - start
+
+    print(f"{'lazy' if lazy else 'eager'} content loading:")
+    for phase, duration in application.extensions["startup_phases"]:
+        print(f"  {phase:<24} {duration * 1000:>8.1f}ms")
+    print(f"  {'create_app':<24} {created * 1000:>8.1f}ms")
+    print(f"  {'first /_status':<24} {first_status * 1000:>8.1f}ms ({status_code})")
+    if lazy:
+        with application.app_context():
+            content_loader.preloaded.wait()
+        print(f"  {'content preloaded':<24} {(time.perf_counter() - start) * 1000:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub API waits before responding")
+    parser.add_argument("--config", default="development", help="the config to create the app with")
+    parser.add_argument("--top", type=int, default=10, help="number of the slowest imports to list")
+    args = parser.parse_args()
+
+    _print_import_times(args.top)
+
+    frameworks_path = os.path.join("app", "content", "frameworks")
+    frameworks = [
+        {"slug": framework_slug, "status": "live"}
+        for framework_slug in sorted(os.listdir(frameworks_path) if os.path.isdir(frameworks_path) else ())
+    ]
+    with StubAPI([("GET", r"/frameworks", {"frameworks": frameworks})], latency=args.latency) as stub:
+        os.environ.update({"DM_DATA_API_URL": stub.url, "DM_DATA_API_AUTH_TOKEN": "token"})
+        print(f"\n{len(frameworks)} frameworks, stub API latency {args.latency * 1000:.0f}ms")
+        _profile_create_app(args.config, lazy=False)
+        _profile_create_app(args.config, lazy=True)
+
+
+if __name__ == "__main__":
+    main()
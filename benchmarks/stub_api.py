@@ -0,0 +1,74 @@
+"""A local stand-in for the Data API which answers every request after a fixed delay, for benchmarking API-bound
+code paths without network variance.
+"""
+import json
+import re
+import time
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+
+class StubAPI:
+    """Serve canned JSON responses on localhost, sleeping `latency` seconds before each one.
+
+    `routes` is a list of (method, path regex, response body) tuples; the first match wins and unmatched requests get
+    a 404. A response body may instead be a function of the request's path and query parameters (as a dict of lists)
+    returning the body. Use as a context manager, the server's base url is available as `url`. The client ports
+    requests arrived from are kept in `client_ports`, so the number of connections made is `len(client_ports)`.
+    """
+    def __init__(self, routes, latency=0.05):
+        self.routes = [(method, re.compile(pattern), body) for method, pattern, body in routes]
+        self.latency = latency
+        self.request_count = 0
+        self.client_ports = set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # the headers and body are written separately, which on a kept-alive connection would otherwise wait on
+            # the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def _respond(self):
+                stub.request_count += 1
+                stub.client_ports.add(self.client_address[1])
+                time.sleep(stub.latency)
+                content_length = int(self.headers.get("Content-Length") or 0)
+                if content_length:
+                    self.rfile.read(content_length)
+                url = urlsplit(self.path)
+                for method, pattern, body in stub.routes:
+                    if method == self.command and pattern.fullmatch(url.path):
+                        status, payload = 200, body(url.path, parse_qs(url.query)) if callable(body) else body
+                        break
+                else:
+                    status, payload = 404, {"error": "Not found"}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,65 @@
+"""Measure the time to fetch each page of a supplier name search as an admin pages through it, with and without
+find_suppliers_page prefetching the next page.
+
+A stub API (`benchmarks/stub_api.py`) answers each page after `--latency` seconds, and links to the next one until
+`--pages` pages. Between pages the admin reads the results for `--think-time` seconds. We report the median time to
+get pages after the first.
+"""
+import argparse
+import statistics
+import time
+import warnings
+
+from dmapiclient import DataAPIClient
+from flask import Flask
+
+from app.main.helpers.supplier_search import find_suppliers_page, supplier_search_pages_cache
+from .stub_api import StubAPI
+
+
+def _routes(pages):
+    def page(path, query):
+        number = int(query.get("page", ["1"])[0])
+        links = {"next": f"/suppliers?page={number + 1}&name=foo"} if number < pages else {}
+        return {"suppliers": [{"id": number * 100 + i, "name": f"Supplier {i}"} for i in range(100)], "links": links}
+    return [("GET", r"^/suppliers$", page)]
+
+
+def _page_through(client, pages, think_time):
+    durations = []
+    for page in range(1, pages + 1):
+        start = time.perf_counter()
+        find_suppliers_page(client, 1, page if page == 1 else str(page), name="foo")
+        durations.append(time.perf_counter() - start)
+        time.sleep(think_time)
+    return statistics.median(durations[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub API waits before responding")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--think-time", type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["DM_CONCURRENT_FETCH_MAX_WORKERS"] = 4
+
+    print(f"stub API latency {args.latency * 1000:.0f}ms, {args.pages} pages, {args.think_time}s between pages")
+    with StubAPI(_routes(args.pages), latency=args.latency) as stub, warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        client = DataAPIClient(stub.url, "token")
+        for name, ttl in (("no prefetch", 0), ("prefetch", 60)):
+            app.config["DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL"] = ttl
+            supplier_search_pages_cache.invalidate()
+            requests_before = stub.request_count
+            with app.test_request_context("/"):
+                median = _page_through(client, args.pages, args.think_time)
+            print(
+                f"{name:<12} {median * 1000:>8.1f}ms per page after the first, "
+                f"{stub.request_count - requests_before} API requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
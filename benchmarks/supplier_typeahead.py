@@ -0,0 +1,98 @@
+"""Measure supplier typeahead suggestions from the in-process SupplierSearchIndex against a name search through the
+API, as find_suppliers makes.
+
+`--suppliers` synthetic suppliers are indexed `--batch-size` at a time, as the background build does, and we report
+the time to build the index and the median and 99th percentile time of `--queries` searches of each kind. The API
+search is timed against a stub API (`benchmarks/stub_api.py`) answering with a page of 100 suppliers after
+`--latency` seconds.
+"""
+import argparse
+import random
+import statistics
+import time
+import warnings
+
+from dmapiclient import DataAPIClient
+
+from app.main.helpers.supplier_search import SupplierSearchIndex
+from .stub_api import StubAPI
+
+
+SYLLABLES = ("ka", "lo", "mi", "ter", "van", "sol", "dra", "nex", "qui", "ra", "bel", "cor", "fin", "tek", "zu", "ion")
+SUFFIXES = ("Ltd", "Limited", "LLP", "PLC", "")
+
+
+def _suppliers(count):
+    rng = random.Random(0)
+    words = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(5000)})
+    for supplier_id in range(count):
+        name = " ".join(rng.choice(words).title() for _ in range(rng.randint(1, 3)))
+        name = f"{name} {rng.choice(SUFFIXES)}".strip()
+        yield {
+            "id": supplier_id,
+            "name": name,
+            "registeredName": f"{name} Holdings",
+            "dunsNumber": f"{rng.randint(0, 999999999):09d}",
+            "companiesHouseNumber": f"{rng.randint(0, 99999999):08d}" if rng.random() < 0.8 else None,
+        }
+
+
+def _queries(suppliers, count):
+    rng = random.Random(1)
+    sample = rng.sample(suppliers, min(count, len(suppliers)))
+    typo = lambda name: name[:3] + name[4:]  # noqa: E731
+    return {
+        "name prefix": [supplier["name"][:rng.randint(2, 8)] for supplier in sample],
+        "later word": [supplier["name"].split(" ", 1)[-1][:5] for supplier in sample],
+        "DUNS prefix": [supplier["dunsNumber"][:5] for supplier in sample],
+        "typo": [typo(supplier["name"]) for supplier in sample],
+    }
+
+
+def _percentiles(durations):
+    durations = sorted(durations)
+    return statistics.median(durations), durations[int(len(durations) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--suppliers", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    suppliers = list(_suppliers(args.suppliers))
+    index = SupplierSearchIndex()
+    start = time.perf_counter()
+    for batch_start in range(0, len(suppliers), args.batch_size):
+        index.add(suppliers[batch_start:batch_start + args.batch_size])
+    index.mark_complete()
+    print(f"indexed {len(index)} suppliers in batches of {args.batch_size} in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'search':<16} {'median':>10} {'p99':>10}")
+    for kind, queries in _queries(suppliers, args.queries).items():
+        durations = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 10)
+            durations.append(time.perf_counter() - start)
+        median, p99 = _percentiles(durations)
+        print(f"{kind:<16} {median * 1000:>8.2f}ms {p99 * 1000:>8.2f}ms")
+
+    page = {"suppliers": suppliers[:100], "links": {}}
+    with StubAPI([("GET", r"^/suppliers$", page)], latency=args.latency) as stub:
+        client = DataAPIClient(stub.url, "token")
+        durations = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            for query in _queries(suppliers, 20)["name prefix"]:
+                start = time.perf_counter()
+                client.find_suppliers(name=query)
+                durations.append(time.perf_counter() - start)
+    median, p99 = _percentiles(durations)
+    print(f"{'API (stub)':<16} {median * 1000:>8.2f}ms {p99 * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
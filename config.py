@@ -20,6 +20,95 @@ class Config(object):
     SESSION_COOKIE_SAMESITE = "Lax"
 
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
+    # sessions' cookies are only re-issued (pushing back their expiry) once this fraction of their lifetime has passed
+    # since they last were, rather than on every request
+    SESSION_REFRESH_EACH_REQUEST = False
+    DM_SESSION_REFRESH_FRACTION = 0.1
+
+    # how long (in seconds) to cache the list of frameworks in-process. 0 disables the cache
+    DM_FRAMEWORKS_CACHE_TTL = 300
+    # how long to cache each framework's agreements and their statuses, used to list and step through them. Changing
+    # an agreement's status invalidates them, but only in the process which made the change
+    DM_AGREEMENTS_INDEX_CACHE_TTL = 60
+    DM_AGREEMENTS_PAGE_SIZE = 100
+    # how long to cache the lots each supplier has services on, shown with their agreement, and how many suppliers
+    # ahead in the agreements queue to fetch them for
+    DM_SUPPLIER_LOT_NAMES_CACHE_TTL = 300
+    DM_AGREEMENTS_PREFETCH_COUNT = 3
+    # how long to cache rendered service diff tables. Each is keyed by the revisions it compares so never goes stale
+    DM_DIFF_TABLES_CACHE_TTL = 3600
+    # how long to cache pages of the service edits approval queue. Approving edits invalidates them, but only in the
+    # process which approved them
+    DM_UNAPPROVED_SERVICE_UPDATES_CACHE_TTL = 30
+    # requests taking longer than this many seconds are logged along with the (this many) kinds of API, S3 and content
+    # loader call they spent most time in
+    DM_SLOW_REQUEST_THRESHOLD = 2
+    DM_SLOW_REQUEST_TOP_SPANS = 5
+    # how long to cache users' records, used to load the logged in user on every request. Updating a user invalidates
+    # their record, but only in the process which made the change, so this is how long a user being deactivated (or
+    # having their role changed) elsewhere can take to apply
+    DM_USER_CACHE_TTL = 30
+    # how long to cache the list of admin users. Inviting or editing an admin user invalidates it, but only in the
+    # process which made the change
+    DM_ADMIN_USERS_CACHE_TTL = 60
+    DM_ADMIN_USERS_PAGE_SIZE = 100
+    # how long to cache the listings of each framework's communications files, including their timestamps. Uploading
+    # or deleting a file invalidates them, but only in the process which made the change
+    DM_COMMUNICATIONS_LISTING_CACHE_TTL = 300
+    # how long to reuse signed urls for report downloads. dmutils signs them to be valid for 30 seconds
+    DM_SIGNED_URL_CACHE_TTL = 20
+    # stream report downloads through the app rather than redirecting users to them, for networks which block our
+    # assets domain
+    DM_REPORT_DOWNLOADS_PROXY = False
+    DM_REPORT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    DM_REPORT_DOWNLOAD_PROXY_TIMEOUT = 30
+
+    # size of the thread pool shared by all requests for making independent API calls concurrently
+    DM_CONCURRENT_FETCH_MAX_WORKERS = 8
+    # the number of threads each web server process serves requests with, which should match the web server's config
+    DM_WEB_SERVER_THREADS = 10
+    # size of the separate thread pool background jobs make their API calls with, so they don't hold up requests'
+    DM_BACKGROUND_JOB_MAX_WORKERS = 4
+    # how many keep-alive connections to the Data API each process pools. 0 gives one to each thread which may make
+    # API calls at once, DM_WEB_SERVER_THREADS + DM_CONCURRENT_FETCH_MAX_WORKERS + DM_BACKGROUND_JOB_MAX_WORKERS
+    DM_DATA_API_POOL_SIZE = 0
+    # whether to accept gzip-compressed responses from the Data API
+    DM_DATA_API_COMPRESSION = True
+    # how many of a bulk operation's API calls may be made at once
+    DM_BULK_UPDATE_BATCH_SIZE = 4
+    # how many times to retry updating a supplier's declaration after a server or connection error, and the number of
+    # seconds to wait before the first retry (doubling, tripling etc. for later ones)
+    DM_DECLARATION_UPDATE_RETRIES = 2
+    DM_DECLARATION_UPDATE_RETRY_INTERVAL = 0.5
+    # how many items ahead of the one being streamed to fetch related data for, e.g. in CSV exports
+    DM_PREFETCH_WINDOW = 8
+
+    # how often each process rebuilds its in-memory index of suppliers for typeahead suggestions, in seconds
+    DM_SUPPLIER_SEARCH_INDEX_REFRESH_INTERVAL = 300
+    # how many suppliers are fetched from the API between additions to the index while it's being built
+    DM_SUPPLIER_SEARCH_INDEX_BATCH_SIZE = 500
+    DM_SUPPLIER_TYPEAHEAD_LIMIT = 10
+    # how long to keep each page of an admin's supplier search, and the page after it which is fetched speculatively,
+    # in seconds. 0 turns off prefetching
+    DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL = 60
+
+    # suspending or unsuspending at least this many services at once is done in the background
+    DM_BACKGROUND_TOGGLE_SERVICES_THRESHOLD = 100
+    # how many users to sort in memory when exporting user CSVs, beyond which they're sorted using temporary files
+    DM_USER_CSV_SORT_BUFFER_SIZE = 10000
+
+    # load frameworks' content as it is first used, and in a background thread, rather than all of it before the app
+    # can start serving. The background thread tries DM_CONTENT_PRELOAD_ATTEMPTS times to find the frameworks
+    DM_LAZY_CONTENT_LOADING = False
+    DM_CONTENT_PRELOAD_ATTEMPTS = 10
+    DM_CONTENT_PRELOAD_RETRY_INTERVAL = 5
+
+    # keep compiled templates in DM_JINJA_BYTECODE_CACHE_DIR so that other processes (and later deploys of the same
+    # templates) needn't compile them again. None uses a private directory in the system's temporary directory
+    DM_JINJA_BYTECODE_CACHE = True
+    DM_JINJA_BYTECODE_CACHE_DIR = None
+    # compile every template when the app is created rather than when each is first rendered
+    DM_PRECOMPILE_TEMPLATES = False
 
     DM_COOKIE_PROBE_EXPECT_PRESENT = True
 
@@ -98,6 +187,22 @@ class Test(Config):
     INVITE_EMAIL_TOKEN_NS = 'SALT'
     DM_NOTIFY_API_KEY = "not_a_real_key-00000000-fake-uuid-0000-000000000000"
 
+    # in-process caches are disabled by default in tests, tests which need one can enable it
+    DM_FRAMEWORKS_CACHE_TTL = 0
+    DM_AGREEMENTS_INDEX_CACHE_TTL = 0
+    DM_SUPPLIER_LOT_NAMES_CACHE_TTL = 0
+    DM_DIFF_TABLES_CACHE_TTL = 0
+    DM_UNAPPROVED_SERVICE_UPDATES_CACHE_TTL = 0
+    DM_ADMIN_USERS_CACHE_TTL = 0
+    DM_USER_CACHE_TTL = 0
+    DM_COMMUNICATIONS_LISTING_CACHE_TTL = 0
+    DM_SIGNED_URL_CACHE_TTL = 0
+    DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL = 0
+
+    DM_DECLARATION_UPDATE_RETRY_INTERVAL = 0
+
+    DM_JINJA_BYTECODE_CACHE = False
+
 
 class Development(Config):
     DEBUG = True
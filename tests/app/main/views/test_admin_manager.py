@@ -1,3 +1,5 @@
+from threading import Barrier
+
 from lxml import html
 import mock
 import pytest
@@ -5,6 +7,7 @@ import pytest
 from dmapiclient import HTTPError
 from dmtestutils.mocking import assert_args_and_return
 
+from app.main.views.admin_manager import admin_users_cache
 from ...helpers import LoggedInApplicationTest, Response
 
 
@@ -81,6 +84,7 @@ class TestAdminManagerListView(LoggedInApplicationTest):
          "role": "admin-ccs-data-controller",
          },
     ]
+    ALL_USERS = SUPPORT_USERS + CATEGORY_USERS + SOURCING_USERS + FRAMEWORK_MANAGER_USERS + DATA_CONTROLLER_USERS
 
     def setup_method(self, method):
         super().setup_method(method)
@@ -212,6 +216,67 @@ class TestAdminManagerListView(LoggedInApplicationTest):
             "/admin/admin-users/9095/edit",
         ]
 
+    def test_fetches_each_role_concurrently(self):
+        # each role's fetch waits for all the others to have started, so would deadlock if they were made in turn
+        barrier = Barrier(5, timeout=5)
+
+        def find_users_iter(role):
+            barrier.wait()
+            return iter([user for user in self.ALL_USERS if user["role"] == role])
+
+        self.data_api_client.find_users_iter.side_effect = find_users_iter
+        response = self.client.get("/admin/admin-users")
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert len(document.cssselect(".summary-item-row")) == 10
+        assert sorted(c[1]["role"] for c in self.data_api_client.find_users_iter.call_args_list) == [
+            "admin", "admin-ccs-category", "admin-ccs-data-controller", "admin-ccs-sourcing", "admin-framework-manager",
+        ]
+
+    def test_should_paginate_admin_users(self):
+        self.app.config["DM_ADMIN_USERS_PAGE_SIZE"] = 4
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            [user for user in self.ALL_USERS if user["role"] == role]
+        )
+
+        response = self.client.get("/admin/admin-users?page=3")
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert document.xpath("//td[@class='summary-item-field-with-action']//a/@href") == [
+            "/admin/admin-users/9091/edit",
+            "/admin/admin-users/9095/edit",
+        ]
+        assert document.xpath("//a[@rel='prev']/@href") == ["/admin/admin-users?page=2"]
+        assert not document.xpath("//a[@rel='next']")
+
+    @pytest.mark.parametrize("page, expected_code", (("0", 400), ("2", 404)))
+    def test_should_reject_pages_out_of_range(self, page, expected_code):
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            [user for user in self.ALL_USERS if user["role"] == role]
+        )
+
+        response = self.client.get(f"/admin/admin-users?page={page}")
+
+        assert response.status_code == expected_code
+
+    def test_admin_users_are_cached_between_requests(self):
+        self.app.config["DM_ADMIN_USERS_CACHE_TTL"] = 60
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            [user for user in self.ALL_USERS if user["role"] == role]
+        )
+
+        try:
+            for _ in range(2):
+                response = self.client.get("/admin/admin-users")
+                assert response.status_code == 200
+                assert len(html.fromstring(response.get_data(as_text=True)).cssselect(".summary-item-row")) == 10
+        finally:
+            admin_users_cache.invalidate()
+
+        assert self.data_api_client.find_users_iter.call_count == 5
+
     def test_should_have_invite_user_link(self):
         response = self.client.get("/admin/admin-users")
         document = html.fromstring(response.get_data(as_text=True))
@@ -350,6 +415,15 @@ class TestInviteAdminUserView(LoggedInApplicationTest):
         self.assert_flashes('An invitation has been sent to test@test.com.')
         assert self.data_api_client.get_user.called is True
 
+    @mock.patch('app.main.views.admin_manager.admin_users_cache', autospec=True)
+    @mock.patch('app.main.views.admin_manager.send_user_account_email')
+    def test_successful_post_invalidates_cached_admin_users(self, send_user_account_email, admin_users_cache):
+        self.data_api_client.get_user.side_effect = assert_args_and_return(None, email_address='test@test.com')
+        self.data_api_client.email_is_valid_for_admin_user.return_value = True
+        res = self.client.post('/admin/admin-users/invite', data={'role': 'admin', 'email_address': 'test@test.com'})
+        assert res.status_code == 302
+        assert admin_users_cache.invalidate.called is True
+
 
 class TestAdminManagerEditsAdminUsers(LoggedInApplicationTest):
     user_role = "admin-manager"
@@ -509,6 +583,34 @@ class TestAdminManagerEditsAdminUsers(LoggedInApplicationTest):
         response2 = self.client.get(response1.location)
         assert "reality.auditor@digital.cabinet-office.gov.uk has been updated." in response2.get_data(as_text=True)
 
+    @mock.patch('app.main.views.admin_manager.admin_users_cache', autospec=True)
+    def test_editing_admin_user_invalidates_cached_admin_users(self, admin_users_cache):
+        self.data_api_client.get_user.return_value = self.admin_user_to_edit
+        response = self.client.post(
+            "/admin/admin-users/2345/edit",
+            data={
+                "edit_admin_name": "Lady Myria Lejean",
+                "edit_admin_permissions": "admin",
+                "edit_admin_status": "True"
+            }
+        )
+        assert response.status_code == 302
+        assert admin_users_cache.invalidate.called is True
+
+    @mock.patch('app.main.views.admin_manager.invalidate_user', autospec=True)
+    def test_editing_admin_user_invalidates_their_cached_record(self, invalidate_user):
+        self.data_api_client.get_user.return_value = self.admin_user_to_edit
+        response = self.client.post(
+            "/admin/admin-users/2345/edit",
+            data={
+                "edit_admin_name": "Lady Myria Lejean",
+                "edit_admin_permissions": "admin-ccs-category",
+                "edit_admin_status": "False"
+            }
+        )
+        assert response.status_code == 302
+        invalidate_user.assert_called_once_with("2345")
+
     def test_admin_user_name_cannot_be_submitted_when_empty(self):
         self.data_api_client.get_user.return_value = self.admin_user_to_edit
         response = self.client.post(
@@ -5,6 +5,7 @@ import mock
 import pytest
 from lxml import html
 
+from app.main.helpers.agreements import get_supplier_lot_names
 from app.main.views.agreements import get_status_labels
 from ...helpers import LoggedInApplicationTest
 
@@ -306,6 +307,88 @@ class TestListAgreements(LoggedInApplicationTest):
         response = self.client.get('/admin/agreements/g-cloud-7?status=bad')
         assert response.status_code == 400
 
+    @pytest.mark.parametrize("query_string", (
+        "lot=not-a-lot", "sort=bad", "submitted_from=yesterday", "submitted_to=2020-13-01", "page=0",
+    ))
+    def test_invalid_filters_raise_400(self, query_string):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        response = self.client.get(f'/admin/agreements/g-cloud-8?{query_string}')
+
+        assert response.status_code == 400
+
+    def test_pagination(self):
+        self.app.config['DM_AGREEMENTS_PAGE_SIZE'] = 1
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        response = self.client.get('/admin/agreements/g-cloud-8?page=2&sort=oldest')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert [
+            self._unpack_search_result(result)[2] for result in page.cssselect('.search-result')
+        ] == ["My Supplier"]
+        summary_elem = page.xpath("//p[@class='govuk-body search-summary-border-bottom']")[0]
+        assert summary_elem.xpath("normalize-space(string())") == '2 agreements returned'
+        assert [
+            parse_qs(urlparse(a_element.attrib["href"]).query)
+            for a_element in page.xpath("//a[.//*[normalize-space(string())='Previous page']]")
+        ] == [{"page": ["1"], "sort": ["oldest"]}]
+        assert not page.xpath("//a[.//*[normalize-space(string())='Next page']]")
+
+    def test_page_past_the_end_returns_404(self):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        response = self.client.get('/admin/agreements/g-cloud-8?page=2')
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("query_string, expected_supplier_names", (
+        ("sort=name", ["My other supplier", "My Supplier"]),
+        ("sort=newest", ["My Supplier", "My other supplier"]),
+        ("submitted_from=2015-10-31", ["My Supplier"]),
+        ("submitted_to=2015-10-31", ["My other supplier"]),
+        ("submitted_from=2015-11-02", []),
+    ))
+    def test_sorting_and_date_filters(self, query_string, expected_supplier_names):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        response = self.client.get(f'/admin/agreements/g-cloud-8?{query_string}')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert [
+            self._unpack_search_result(result)[2] for result in page.cssselect('.search-result')
+        ] == expected_supplier_names
+
+    @pytest.mark.parametrize("framework_status", ("standstill", "live"))
+    def test_lot_filter(self, framework_status):
+        framework = self.load_example_listing('framework_response')
+        framework["frameworks"]["status"] = framework_status
+        self.data_api_client.get_framework.return_value = framework
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+        lot_services = [{"supplierId": 11111, "lot": "saas"}]
+        self.data_api_client.find_draft_services_by_framework_iter.return_value = iter(lot_services)
+        self.data_api_client.find_services_iter.return_value = iter(lot_services)
+
+        response = self.client.get('/admin/agreements/g-cloud-8?lot=saas')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert [
+            self._unpack_search_result(result)[2] for result in page.cssselect('.search-result')
+        ] == ["My Supplier"]
+        if framework_status == "live":
+            self.data_api_client.find_services_iter.assert_called_once_with(framework="g-cloud-8", lot="saas")
+        else:
+            self.data_api_client.find_draft_services_by_framework_iter.assert_called_once_with(
+                "g-cloud-8", status="submitted", lot="saas",
+            )
+
 
 class TestNextAgreementRedirect(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
@@ -379,6 +462,33 @@ class TestNextAgreementRedirect(LoggedInApplicationTest):
         assert parsed_location.path == "/admin/suppliers/31415/agreements/g-cloud-8"
         assert parse_qs(parsed_location.query) == {}
 
+    @pytest.mark.parametrize("status,expected_supplier_ids", (
+        (None, [31415, 27, 141]),
+        ("signed", [31415, 27]),
+    ))
+    @mock.patch("app.main.views.agreements.submit", autospec=True)
+    def test_prefetches_lot_names_for_next_suppliers(self, submit, status, expected_supplier_ids):
+        self.app.config["DM_SUPPLIER_LOT_NAMES_CACHE_TTL"] = 60
+        self.data_api_client.find_frameworks.return_value = {"frameworks": [{"slug": "g-cloud-8", "status": "live"}]}
+
+        query = f"?status={status}" if status else ""
+        res = self.client.get(f'/admin/suppliers/1234/agreements/g-cloud-8/next{query}')
+
+        assert res.status_code == 302
+        assert submit.call_args_list == [
+            mock.call(
+                get_supplier_lot_names, self.data_api_client, supplier_id, {"slug": "g-cloud-8", "status": "live"},
+            )
+            for supplier_id in expected_supplier_ids
+        ]
+
+    @mock.patch("app.main.views.agreements.submit", autospec=True)
+    def test_does_not_prefetch_lot_names_when_they_would_not_be_cached(self, submit):
+        res = self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next')
+
+        assert res.status_code == 302
+        assert submit.called is False
+
     def test_unknown_supplier_returns_404(self):
         res = self.client.get('/admin/suppliers/999/agreements/g-cloud-8/next')
         assert res.status_code == 404
@@ -451,6 +561,28 @@ class TestNextAgreementRedirect(LoggedInApplicationTest):
             for ca_args, ca_kwargs in self.data_api_client.find_framework_suppliers.call_args_list
         )
 
+    def test_supplier_frameworks_are_cached_between_requests(self):
+        self.app.config['DM_AGREEMENTS_INDEX_CACHE_TTL'] = 60
+
+        assert urlparse(self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next').location).path == \
+            "/admin/suppliers/31415/agreements/g-cloud-8"
+        assert urlparse(self.client.get('/admin/suppliers/31415/agreements/g-cloud-8/next').location).path == \
+            "/admin/suppliers/27/agreements/g-cloud-8"
+        assert urlparse(
+            self.client.get('/admin/suppliers/4321/agreements/g-cloud-8/next?status=on-hold').location
+        ).path == "/admin/suppliers/1234/agreements/g-cloud-8"
+
+        assert self.data_api_client.find_framework_suppliers.call_count == 1
+
+    def test_suppliers_not_on_framework_are_skipped(self):
+        supplier_frameworks = self.dummy_supplier_frameworks
+        supplier_frameworks["supplierFrameworks"][2]["onFramework"] = False
+        self.data_api_client.find_framework_suppliers.return_value = supplier_frameworks
+
+        res = self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next?status=signed')
+
+        assert urlparse(res.location).path == "/admin/suppliers/27/agreements/g-cloud-8"
+
     def test_invalid_status_raises_400(self):
         response = self.client.get('/admin/suppliers/151/agreements/g-cloud-8/next?status=bad')
         assert response.status_code == 400
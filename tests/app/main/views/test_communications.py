@@ -10,6 +10,7 @@ from dmtestutils.api_model_stubs import FrameworkStub
 from dmtestutils.comparisons import RestrictedAny
 from dmtestutils.fixtures import valid_pdf_bytes
 
+from app.main.views.communications import communications_listing_cache
 from ...helpers import LoggedInApplicationTest
 
 
@@ -64,10 +65,11 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap", endpoint_url=None),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # each comm type is listed concurrently, with its own S3 object
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap", endpoint_url=None)] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
         ]
 
     @pytest.mark.parametrize("framework_status", ("open", "standstill",))
@@ -180,12 +182,26 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap", endpoint_url=None),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # each comm type is listed concurrently, with its own S3 object
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap", endpoint_url=None)] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
         ]
 
+    def test_listings_are_cached_between_requests(self):
+        self.app.config["DM_COMMUNICATIONS_LISTING_CACHE_TTL"] = 60
+        self.s3.return_value.list.side_effect = lambda *args, **kwargs: []
+
+        try:
+            for _ in range(2):
+                response = self.client.get("/admin/communications/{}".format(self.framework_slug))
+                assert response.status_code == 200
+        finally:
+            communications_listing_cache.invalidate()
+
+        assert self.s3.return_value.list.call_count == 2
+
 
 class TestUploadCommunicationsView(_BaseTestCommunicationsView):
     def test_post_documents_for_framework(self):
@@ -223,6 +239,22 @@ class TestUploadCommunicationsView(_BaseTestCommunicationsView):
             response.location,
         ) == f"http://localhost/admin/communications/{self.framework_slug}"
 
+    @mock.patch("app.main.views.communications.communications_listing_cache", autospec=True)
+    def test_post_documents_invalidates_cached_listings(self, communications_listing_cache):
+        response = self.client.post(
+            f"/admin/communications/{self.framework_slug}",
+            data={
+                'communication': (BytesIO(valid_pdf_bytes), 'test-comm.pdf'),
+                'clarification': (BytesIO(valid_pdf_bytes), 'test-clar.pdf'),
+            }
+        )
+
+        assert response.status_code == 302
+        assert communications_listing_cache.invalidate.call_args_list == [
+            mock.call((self.framework_slug, "communication")),
+            mock.call((self.framework_slug, "clarification")),
+        ]
+
     @pytest.mark.parametrize("disallowed_role", ["admin", "admin-ccs-category", "admin-ccs-sourcing", "admin-manager"])
     def test_disallowed_roles_can_not_post_documents_for_framework(self, disallowed_role):
         self.user_role = disallowed_role
@@ -489,6 +521,20 @@ class TestDeleteCommunicationsPost(_BaseTestCommunicationsView):
             f"deleted for {self.framework_stub.response()['name']}."
         )
 
+    @pytest.mark.parametrize("comm_type", ("communication", "clarification",))
+    @mock.patch("app.main.views.communications.communications_listing_cache", autospec=True)
+    def test_happy_path_invalidates_cached_listing(self, communications_listing_cache, comm_type):
+        self.s3.return_value.path_exists.return_value = True
+        response = self.client.post(
+            f"/admin/communications/{self.framework_slug}/delete/{comm_type}/floatingfoampool",
+            data={"confirm": "Delete file"},
+        )
+
+        assert response.status_code == 302
+        assert communications_listing_cache.invalidate.call_args_list == [
+            mock.call((self.framework_slug, comm_type)),
+        ]
+
     @pytest.mark.parametrize("comm_type", ("communication", "clarification",))
     def test_file_not_present(self, comm_type):
         self.s3.return_value.path_exists.return_value = False
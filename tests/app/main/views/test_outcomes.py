@@ -150,6 +150,48 @@ class TestDirectAwardView(LoggedInApplicationTest):
             '123', 'A Buyer', 'buyer@example.com'
         ]
 
+    def test_outcomes_csv_download_fetches_each_archived_service_once(self):
+        self.user_role = 'admin-ccs-category'
+        self.data_api_client.find_direct_award_projects.return_value = {"projects": [
+            {
+                "id": project_id,
+                "name": f"Project {project_id}",
+                "outcome": {
+                    "award": {
+                        "awardValue": "100.00",
+                        "awardingOrganisationName": "Org",
+                        "endDate": "2020-12-12",
+                        "startDate": "2020-01-01",
+                    },
+                    "completedAt": "2018-06-19T13:37:59.713497Z",
+                    "result": "awarded",
+                    "resultOfDirectAward": {
+                        "archivedService": {"id": archived_service_id, "service": {"id": str(archived_service_id)}},
+                    },
+                },
+                "users": [{"emailAddress": "buyer@example.com", "id": 123, "name": "A Buyer"}],
+            }
+            for project_id, archived_service_id in ((1, 11), (2, 22), (3, 11), (4, 33), (5, 22))
+        ]}
+        self.data_api_client.get_archived_service.side_effect = lambda archived_service_id: {
+            "services": {
+                "serviceName": f"Service {archived_service_id}",
+                "supplierId": 1,
+                "supplierName": "Supplier",
+            },
+        }
+
+        response = self.client.get('/admin/direct-award/outcomes')
+
+        assert response.status_code == 200
+        rows = list(csv.reader(str(response.data, 'utf-8').splitlines()))
+        assert [(row[0], row[5]) for row in rows[1:]] == [
+            ('1', 'Service 11'), ('2', 'Service 22'), ('3', 'Service 11'), ('4', 'Service 33'), ('5', 'Service 22'),
+        ]
+        assert sorted(
+            c[1]['archived_service_id'] for c in self.data_api_client.get_archived_service.call_args_list
+        ) == [11, 22, 33]
+
 
 class TestDOSView(LoggedInApplicationTest):
 
@@ -237,3 +279,23 @@ class TestDOSView(LoggedInApplicationTest):
             f"{latest_dos_framework}/reports/opportunity-data.csv"
         )
         assert latest_dos_framework in response.location
+
+    @mock.patch("app.main.helpers.report_downloads.requests.get", autospec=True)
+    def test_proxies_csv_when_proxy_mode_enabled(self, requests_get):
+        self.user_role = "admin-ccs-category"
+        self.app.config["DM_REPORT_DOWNLOADS_PROXY"] = True
+        requests_get.return_value = mock.Mock(
+            status_code=200,
+            headers={"Content-Length": "8"},
+            iter_content=mock.Mock(return_value=iter((b"a,b\n", b"c,d\n"))),
+        )
+
+        response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.get_data() == b"a,b\nc,d\n"
+        assert response.headers["Content-Disposition"] == "attachment;filename=opportunity-data.csv"
+        assert requests_get.call_args[0][0] == (
+            "https://assets.test.digitalmarketplace.service.gov.uk"
+            "/digital-outcomes-and-specialists-4/reports/opportunity-data.csv?signature=deadbeef"
+        )
@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
+import time
+
 import mock
 import pytest
+from dmapiclient import HTTPError
 from lxml import html
 
+from app.main.views.service_updates import unapproved_service_updates_cache
 from ...helpers import LoggedInApplicationTest
 
 
@@ -200,3 +204,104 @@ class TestServiceUpdates(LoggedInApplicationTest):
         self.data_api_client.get_audit_event.side_effect = lambda audit_event_id: {123: audit_event}[audit_event_id]
         response = self.client.post('/admin/services/321/updates/123/approve')
         assert response.status_code == 404
+
+    def test_should_request_the_page_asked_for(self):
+        self.data_api_client.find_audit_events.return_value = {
+            "auditEvents": [],
+            "links": {
+                "prev": "http://localhost/audit-events?page=1",
+                "next": "http://localhost/audit-events?page=3",
+            },
+        }
+
+        response = self.client.get('/admin/services/updates/unapproved?page=2')
+
+        assert response.status_code == 200
+        assert self.data_api_client.find_audit_events.call_args[1]["page"] == 2
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("//a[@rel='prev']/@href") == ["/admin/services/updates/unapproved?page=1"]
+        assert document.xpath("//a[@rel='next']/@href") == ["/admin/services/updates/unapproved?page=3"]
+
+    def test_should_400_invalid_page(self):
+        response = self.client.get('/admin/services/updates/unapproved?page=0')
+        assert response.status_code == 400
+
+    def test_should_redirect_to_first_page_when_page_no_longer_exists(self):
+        self.data_api_client.find_audit_events.side_effect = HTTPError(mock.Mock(status_code=404))
+
+        response = self.client.get('/admin/services/updates/unapproved?page=5')
+
+        assert response.status_code == 302
+        assert response.location == 'http://localhost/admin/services/updates/unapproved'
+
+    def test_prefetches_the_next_page_when_cache_enabled(self):
+        self.app.config["DM_UNAPPROVED_SERVICE_UPDATES_CACHE_TTL"] = 60
+        self.data_api_client.find_audit_events.side_effect = lambda **kwargs: {
+            "auditEvents": [],
+            "links": {"next": "http://localhost/audit-events?page={}".format(kwargs["page"] + 1)},
+        }
+
+        try:
+            self.client.get('/admin/services/updates/unapproved')
+            for _ in range(50):
+                if self.data_api_client.find_audit_events.call_count == 2:
+                    break
+                time.sleep(0.01)
+
+            response = self.client.get('/admin/services/updates/unapproved?page=2')
+        finally:
+            unapproved_service_updates_cache.invalidate()
+
+        assert response.status_code == 200
+        # pages 1 and 2 were fetched by the first request, page 3 by the second
+        assert sorted(c[1]["page"] for c in self.data_api_client.find_audit_events.call_args_list) == [1, 2, 3]
+
+    def test_bulk_approve_acknowledges_each_selected_service(self):
+        response = self.client.post('/admin/services/updates/approve', data={
+            "audit_event": ["321:123", "654:456"],
+            "page": "2",
+        })
+
+        assert response.status_code == 302
+        assert response.location == 'http://localhost/admin/services/updates/unapproved?page=2'
+        self.assert_flashes("The changes to 2 services were approved.")
+        assert sorted(
+            c[0] for c in self.data_api_client.acknowledge_service_update_including_previous.call_args_list
+        ) == [("321", 123, "test@example.com"), ("654", 456, "test@example.com")]
+        assert self.data_api_client.get_audit_event.called is False
+
+    def test_bulk_approve_reports_failed_services(self):
+        def acknowledge(service_id, audit_event_id, user):
+            if service_id == "654":
+                raise HTTPError(mock.Mock(status_code=404))
+            return {}
+
+        self.data_api_client.acknowledge_service_update_including_previous.side_effect = acknowledge
+
+        response = self.client.post('/admin/services/updates/approve', data={
+            "audit_event": ["321:123", "654:456", "987:789"],
+        })
+
+        assert response.status_code == 302
+        self.assert_flashes("The changes to 2 services were approved.")
+        self.assert_flashes("The changes to service 654 could not be approved. Please try again.", "error")
+
+    def test_bulk_approve_with_nothing_selected(self):
+        response = self.client.post('/admin/services/updates/approve', data={})
+
+        assert response.status_code == 302
+        self.assert_flashes("Select the edited services you want to approve.", "error")
+        assert self.data_api_client.acknowledge_service_update_including_previous.called is False
+
+    @pytest.mark.parametrize("audit_event", ("321", "321:abc", "321:123:456"))
+    def test_bulk_approve_should_400_malformed_selection(self, audit_event):
+        response = self.client.post('/admin/services/updates/approve', data={"audit_event": audit_event})
+
+        assert response.status_code == 400
+        assert self.data_api_client.acknowledge_service_update_including_previous.called is False
+
+    @pytest.mark.parametrize("role_not_allowed", ["admin", "admin-ccs-sourcing", "admin-manager"])
+    def test_bulk_approve_should_403_forbidden_user_roles(self, role_not_allowed):
+        self.user_role = role_not_allowed
+        response = self.client.post('/admin/services/updates/approve', data={"audit_event": "321:123"})
+        assert response.status_code == 403
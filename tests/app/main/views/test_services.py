@@ -36,6 +36,16 @@ class TestViewFrameworks(LoggedInApplicationTest):
         response = self.client.get('/admin/frameworks')
         assert response.status_code == 200
 
+    def test_frameworks_are_cached_between_requests(self):
+        self.app.config["DM_FRAMEWORKS_CACHE_TTL"] = 60
+        self.data_api_client.find_frameworks.return_value = self._get_frameworks_list_fixture_data()
+
+        for _ in range(3):
+            response = self.client.get('/admin/frameworks')
+            assert response.status_code == 200
+
+        assert self.data_api_client.find_frameworks.call_args_list == [mock.call()]
+
 
 class TestChangeFrameworkStatus(LoggedInApplicationTest):
     def setup_method(self, method):
@@ -83,6 +93,17 @@ class TestChangeFrameworkStatus(LoggedInApplicationTest):
             mock.call('foo', {'status': 'expired'}, user='test@example.com')
         ]
 
+    def test_changing_status_invalidates_cached_frameworks(self):
+        self.app.config["DM_FRAMEWORKS_CACHE_TTL"] = 60
+        self.data_api_client.find_frameworks.return_value = self._get_frameworks_list_fixture_data()
+        self.data_api_client.get_framework.return_value = {'frameworks': {'slug': 'foo', 'status': 'live'}}
+
+        assert self.client.get('/admin/frameworks').status_code == 200
+        assert self.client.post('/admin/frameworks/foo/status', data={"status": "expired"}).status_code == 302
+        assert self.client.get('/admin/frameworks').status_code == 200
+
+        assert self.data_api_client.find_frameworks.call_args_list == [mock.call(), mock.call()]
+
 
 class TestServiceFind(LoggedInApplicationTest):
 
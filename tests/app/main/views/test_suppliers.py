@@ -1,5 +1,6 @@
 from io import BytesIO
 from urllib.parse import urlparse, parse_qs
+from threading import Event, current_thread
 
 import mock
 import pytest
@@ -23,6 +24,7 @@ from dmtestutils.mocking import (
     assert_args_and_raise,
 )
 
+from app.main.helpers.background_jobs import BackgroundJob, get_background_job
 from ...helpers import LoggedInApplicationTest, Response
 
 
@@ -582,6 +584,50 @@ class TestSuppliersListView(LoggedInApplicationTest):
         self.data_api_client.get_supplier.assert_called_once_with("12345")
 
 
+class TestSupplierTypeaheadView(LoggedInApplicationTest):
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.get_index_patch = mock.patch('app.main.views.suppliers.get_supplier_search_index', autospec=True)
+        self.get_supplier_search_index = self.get_index_patch.start()
+        self.index = self.get_supplier_search_index.return_value
+        self.index.search.return_value = [{"id": 12345, "name": "My Little Company"}]
+        self.index.complete = True
+
+    def teardown_method(self, method):
+        self.get_index_patch.stop()
+        super().teardown_method(method)
+
+    @pytest.mark.parametrize("role,expected_code", [
+        ("admin", 200),
+        ("admin-ccs-category", 200),
+        ("admin-ccs-sourcing", 200),
+        ("admin-ccs-data-controller", 200),
+        ("admin-framework-manager", 200),
+        ("admin-manager", 403),
+    ])
+    def test_suggestions_are_shown_to_users_with_right_roles(self, role, expected_code):
+        self.user_role = role
+        response = self.client.get('/admin/suppliers/typeahead?q=my')
+        actual_code = response.status_code
+        assert actual_code == expected_code, "Unexpected response {} for role {}".format(actual_code, role)
+
+    def test_suggestions_are_returned_as_json(self):
+        response = self.client.get('/admin/suppliers/typeahead?q=my+lit')
+
+        assert response.status_code == 200
+        assert response.json == {"suppliers": [{"id": 12345, "name": "My Little Company"}], "complete": True}
+        self.index.search.assert_called_once_with("my lit", 10)
+
+    def test_incomplete_index_is_reported(self):
+        self.index.complete = False
+
+        response = self.client.get('/admin/suppliers/typeahead')
+
+        assert response.json["complete"] is False
+        self.index.search.assert_called_once_with("", 10)
+
+
 class TestSupplierUsersView(LoggedInApplicationTest):
 
     def setup_method(self, method):
@@ -844,6 +890,13 @@ class TestSupplierUsersView(LoggedInApplicationTest):
         assert response.status_code == 302
         assert response.location == "http://localhost/admin/suppliers/users?supplier_id=1000"
 
+    @mock.patch('app.main.views.suppliers.invalidate_user', autospec=True)
+    def test_deactivating_user_invalidates_their_cached_record(self, invalidate_user):
+        self.data_api_client.update_user.return_value = self.load_example_listing("user_response")
+        self.client.post('/admin/suppliers/users/999/deactivate', data={'supplier_id': 1000})
+
+        invalidate_user.assert_called_once_with(999)
+
     def test_should_call_api_to_deactivate_user_and_redirect_to_source_if_present(self):
         response = self.client.post(
             '/admin/suppliers/users/999/deactivate',
@@ -945,6 +998,21 @@ class TestSupplierServicesView(LoggedInApplicationTest):
         view_service_links = document.xpath('.//a[contains(text(), "View")]')
         assert len(view_service_links) == (0 if can_edit else 2)
 
+    def test_shows_progress_of_background_toggle(self):
+        job = BackgroundJob("Suspending 3 G-Cloud 8 services for ‘PROACTIS Group Ltd’.", 3)
+        job.item_done('1231')
+
+        jobs = {'toggle-supplier-services-1000-g-cloud-8': job}
+
+        with mock.patch('app.main.views.suppliers.get_background_job', side_effect=jobs.get) as get_background_job:
+            response = self.client.get('/admin/suppliers/1000/services')
+
+        assert response.status_code == 200
+        get_background_job.assert_any_call('toggle-supplier-services-1000-g-cloud-8')
+        document = html.fromstring(response.get_data(as_text=True))
+        assert "Suspending 3 G-Cloud 8 services" in document.xpath("normalize-space(string(//main))")
+        assert "1 of 3 done." in document.xpath("normalize-space(string(//main))")
+
     @pytest.mark.parametrize("role, can_edit", [
         ("admin", False),
         ("admin-ccs-category", True),
@@ -1262,7 +1330,8 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
                 status=initial_status  # Enabled services should not be included
             )
         ]
-        assert self.data_api_client.update_service_status.call_args_list == [
+        # the updates are made concurrently, so in no particular order
+        assert sorted(self.data_api_client.update_service_status.call_args_list, key=lambda c: c[0][0]) == [
             mock.call('5687123785023488', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023489', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023490', result_status, 'test@example.com', wait_for_index=False),
@@ -1285,6 +1354,100 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
         with self.client.session_transaction() as session:
             assert session['_flashes'][0][1] == expected_flash_message
 
+    @staticmethod
+    def _fail_to_update(failing_service_id):
+        def update_service_status(service_id, *args, **kwargs):
+            if service_id == failing_service_id:
+                raise HTTPError(mock.Mock(status_code=503))
+            return {}
+        return update_service_status
+
+    def _three_services(self):
+        service = self.load_example_listing('services_response')['services'][0]
+        return tuple({**service, 'id': service_id} for service_id in ('1231', '1232', '1233'))
+
+    def test_reports_services_which_could_not_be_updated(self):
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter(self._three_services())
+        self.data_api_client.update_service_status.side_effect = self._fail_to_update('1232')
+
+        response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+
+        assert response.status_code == 302
+        # a failure doesn't stop the other services being updated
+        assert self.data_api_client.update_service_status.call_count == 3
+        with self.client.session_transaction() as session:
+            assert session['_flashes'] == [(
+                'error',
+                "1 of 3 G-Cloud 8 services for ‘PROACTIS Group Ltd’ could not be suspended: 1232. Please try again.",
+            )]
+
+    def test_large_numbers_of_services_are_updated_in_the_background(self):
+        self.app.config['DM_BACKGROUND_TOGGLE_SERVICES_THRESHOLD'] = 3
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter(self._three_services())
+        self.data_api_client.update_service_status.side_effect = self._fail_to_update('1233')
+
+        response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+
+        assert response.status_code == 302
+        assert response.location.endswith('/admin/suppliers/1000/services')
+        with self.client.session_transaction() as session:
+            assert session['_flashes'] == [(
+                'message',
+                "Suspending 3 G-Cloud 8 services for ‘PROACTIS Group Ltd’. This may take a few minutes. "
+                "Its progress may not be shown on this page.",
+            )]
+
+        with self.app.app_context():
+            job = get_background_job('toggle-supplier-services-1000-g-cloud-8')
+        assert job.wait(timeout=5)
+        assert job.description == (
+            "Suspending 3 G-Cloud 8 services for ‘PROACTIS Group Ltd’. This may take a few minutes."
+        )
+        assert (job.completed, job.total) == (3, 3)
+        assert list(job.errors) == ['1233']
+        assert self.data_api_client.update_service_status.call_count == 3
+
+    def test_background_updates_are_not_made_on_the_pool_shared_by_requests(self):
+        self.app.config['DM_BACKGROUND_TOGGLE_SERVICES_THRESHOLD'] = 3
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter(self._three_services())
+        thread_names = []
+        self.data_api_client.update_service_status.side_effect = (
+            lambda *args, **kwargs: thread_names.append(current_thread().name)
+        )
+
+        self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+
+        with self.app.app_context():
+            assert get_background_job('toggle-supplier-services-1000-g-cloud-8').wait(timeout=5)
+        assert len(thread_names) == 3
+        assert all(name.startswith('background-job-worker') for name in thread_names)
+
+    def test_services_are_not_updated_while_a_background_update_is_running(self):
+        self.app.config['DM_BACKGROUND_TOGGLE_SERVICES_THRESHOLD'] = 3
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter(self._three_services())
+        release = Event()
+        self.data_api_client.update_service_status.side_effect = lambda *args, **kwargs: release.wait(5)
+
+        try:
+            self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+            with self.client.session_transaction() as session:
+                session.pop('_flashes')
+            response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+        finally:
+            release.set()
+
+        assert response.status_code == 302
+        with self.client.session_transaction() as session:
+            assert session['_flashes'] == [(
+                'error',
+                "The G-Cloud 8 services for ‘PROACTIS Group Ltd’ are already being updated. "
+                "Please wait for this to finish and try again.",
+            )]
+
+        with self.app.app_context():
+            assert get_background_job('toggle-supplier-services-1000-g-cloud-8').wait(timeout=5)
+        assert self.data_api_client.update_service_status.call_count == 3
+
 
 class TestSupplierDraftServicesView(LoggedInApplicationTest):
     user_role = 'admin-framework-manager'
@@ -1745,6 +1908,14 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
         )
         self.assert_flashes("The details for ‘Something New’ have been updated.")
 
+    @mock.patch('app.main.views.suppliers.supplier_search_pages_cache', autospec=True)
+    def test_updating_supplier_name_forgets_cached_search_results(self, supplier_search_pages_cache):
+        self.user_role = 'admin-ccs-category'
+        self.data_api_client.get_supplier.return_value = {"suppliers": {"id": 1234, "name": "Something Old"}}
+        self.client.post('/admin/suppliers/1234/edit/name', data={'new_supplier_name': 'Something New'})
+
+        supplier_search_pages_cache.invalidate.assert_called_once_with()
+
     def test_ccs_sourcing_role_can_not_update_supplier_name(self):
         self.user_role = 'admin-ccs-sourcing'
         response = self.client.post(
@@ -1936,6 +2107,86 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
         )
         self.assert_flashes("The details for ‘ABC’ have been updated.")
 
+    def _set_supplier_frameworks(self):
+        self.data_api_client.get_supplier.return_value = {
+            "suppliers": {
+                "id": 1234,
+                "name": "ABC",
+                "companiesHouseNumber": "87654321",
+                "registeredName": "Something Old",
+                "contactInformation": [{'id': 999, 'country': "country:FR"}],
+            }
+        }
+        self.data_api_client.find_frameworks.return_value = {'frameworks': [
+            FrameworkStub(frameworkLiveAtUTC="a", status="expired", slug="g-cloud-10").response(),
+            FrameworkStub(frameworkLiveAtUTC="b", status="live", slug="g-cloud-11").response(),
+            FrameworkStub(frameworkLiveAtUTC="c", status="pending", slug="g-cloud-12").response(),
+        ]}
+        # SupplierFrameworkStub ignores its declaration argument
+        self.data_api_client.get_supplier_frameworks.return_value = {"frameworkInterest": [
+            dict(SupplierFrameworkStub(framework_slug=framework_slug).response(), declaration={"status": "complete"})
+            for framework_slug in ("g-cloud-10", "g-cloud-11", "g-cloud-12")
+        ]}
+
+    def test_company_number_is_updated_in_most_recent_visible_declaration(self):
+        self.user_role = 'admin-ccs-data-controller'
+        self._set_supplier_frameworks()
+
+        response = self.client.post(
+            '/admin/suppliers/1234/edit/registered-company-number',
+            data={'companies_house_number': '12345678'}
+        )
+
+        assert response.status_code == 302
+        # the pending framework's declaration isn't visible to data controllers
+        self.data_api_client.update_supplier_declaration.assert_called_once_with(
+            1234, 'g-cloud-11', {'supplierCompanyRegistrationNumber': '12345678'}, "test@example.com"
+        )
+        self.assert_flashes("The details for ‘ABC’ have been updated.")
+
+    @pytest.mark.parametrize('url_suffix, payload', [
+        ('registered-name', {'registered_company_name': 'Something New'}),
+        (
+            'registered-address',
+            {'street': '10 Downing St', 'city': 'London', 'postcode': 'AB1 2DE', 'country': 'country:GB'},
+        ),
+    ])
+    def test_other_registered_details_are_not_updated_in_declarations(self, url_suffix, payload):
+        self.user_role = 'admin-ccs-data-controller'
+        self._set_supplier_frameworks()
+
+        response = self.client.post(f'/admin/suppliers/1234/edit/{url_suffix}', data=payload)
+
+        assert response.status_code == 302
+        assert self.data_api_client.update_supplier_declaration.called is False
+
+    def test_declaration_update_is_retried_after_server_errors(self):
+        self.user_role = 'admin-ccs-data-controller'
+        self._set_supplier_frameworks()
+        self.data_api_client.update_supplier_declaration.side_effect = [APIError(mock.Mock(status_code=503)), {}]
+
+        response = self.client.post(
+            '/admin/suppliers/1234/edit/registered-company-number',
+            data={'companies_house_number': '12345678'}
+        )
+
+        assert response.status_code == 302
+        assert self.data_api_client.update_supplier_declaration.call_count == 2
+        self.assert_flashes("The details for ‘ABC’ have been updated.")
+
+    def test_declaration_update_is_not_retried_after_client_errors(self):
+        self.user_role = 'admin-ccs-data-controller'
+        self._set_supplier_frameworks()
+        self.data_api_client.update_supplier_declaration.side_effect = APIError(mock.Mock(status_code=400))
+
+        response = self.client.post(
+            '/admin/suppliers/1234/edit/registered-company-number',
+            data={'companies_house_number': '12345678'}
+        )
+
+        assert response.status_code == 400
+        assert self.data_api_client.update_supplier_declaration.call_count == 1
+
     @pytest.mark.parametrize(
         'url_suffix, payload, expected_error_msg', [
             ('registered-company-number', {'companies_house_number': ''}, "You must provide an answer"),
@@ -2013,7 +2264,6 @@ class TestViewingASupplierDeclaration(LoggedInApplicationTest):
 
         assert response.status_code == 404
         self.data_api_client.get_supplier.assert_called_once_with(1234)
-        assert self.data_api_client.get_framework.call_args_list == []
 
     def test_should_404_if_framework_does_not_exist(self):
         self.data_api_client.get_framework.side_effect = APIError(Response(404))
@@ -2701,7 +2951,6 @@ class TestViewingSignedAgreement(LoggedInApplicationTest):
 
         assert response.status_code == 404
         self.data_api_client.get_supplier.assert_called_with(1234)
-        assert self.data_api_client.get_framework.call_args_list == []
 
     def test_should_404_if_framework_does_not_exist(self, s3):
         self.data_api_client.get_framework.side_effect = APIError(Response(404))
@@ -2931,6 +3180,12 @@ class TestPutSignedAgreementOnHold(LoggedInApplicationTest):
         assert parsed_location.path == "/admin/suppliers/4321/agreements/g-cloud-99-flake/next"
         assert parse_qs(parsed_location.query) == {"status": ["on-hold"]}
 
+    def test_invalidates_cached_agreements(self):
+        with mock.patch('app.main.views.suppliers.invalidate_agreements', autospec=True) as invalidate_agreements:
+            self.client.post("/admin/suppliers/agreements/123/on-hold", data={"nameOfOrganisation": "Test"})
+
+        invalidate_agreements.assert_called_once_with("g-cloud-99-flake")
+
 
 class TestApproveAgreement(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
@@ -2991,6 +3246,12 @@ class TestApproveAgreement(LoggedInApplicationTest):
         assert parsed_location.path == "/admin/suppliers/4321/agreements/g-cloud-99p-world/next"
         assert parse_qs(parsed_location.query) == {"status": ["on-hold"]}
 
+    def test_invalidates_cached_agreements(self):
+        with mock.patch('app.main.views.suppliers.invalidate_agreements', autospec=True) as invalidate_agreements:
+            self.client.post("/admin/suppliers/agreements/123/approve", data={"nameOfOrganisation": "Test"})
+
+        invalidate_agreements.assert_called_once_with("g-cloud-99p-world")
+
 
 class TestUnapproveAgreement(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
@@ -3057,6 +3318,12 @@ class TestUnapproveAgreement(LoggedInApplicationTest):
         assert parsed_location.path == "/admin/suppliers/4321/agreements/g-cloud-99p-world"
         assert parse_qs(parsed_location.query) == {"next_status": ["on-hold"]}
 
+    def test_invalidates_cached_agreements(self):
+        with mock.patch('app.main.views.suppliers.invalidate_agreements', autospec=True) as invalidate_agreements:
+            self.client.post("/admin/suppliers/agreements/123/unapprove", data={"nameOfOrganisation": "Test"})
+
+        invalidate_agreements.assert_called_once_with("g-cloud-99p-world")
+
 
 @mock.patch('app.main.views.suppliers.get_signed_url')
 @mock.patch('app.main.views.suppliers.s3')
@@ -223,6 +223,12 @@ class TestChangeUserName(LoggedInApplicationTest):
             mock.call(12345, name='New name', updater='test@example.com')
         ]
 
+    @mock.patch('app.main.views.users.invalidate_user', autospec=True)
+    def test_changing_name_invalidates_cached_user(self, invalidate_user):
+        self.client.post('/admin/users/12345/name', data={"name": "New name"})
+
+        invalidate_user.assert_called_once_with(12345)
+
     @pytest.mark.parametrize('name', ["", "a" * 1000])
     def test_reject_invalid_names(self, name):
         response = self.client.post('/admin/users/12345/name', data={"name": name})
@@ -396,6 +402,26 @@ class TestUserResearchParticipantsExport(LoggedInApplicationTest):
         assert 'mariah@example.com,Mariah Carey' in response.get_data(as_text=True)
         self.data_api_client.find_users_iter.assert_called_once_with(role='buyer')
 
+    @pytest.mark.parametrize('query_string, sort_buffer_size', (('', 10), ('?sorted=false', 10), ('', 1)))
+    def test_download_list_of_all_buyers_sorted_by_name_unless_unsorted_requested(
+        self, s3, query_string, sort_buffer_size
+    ):
+        self.app.config['DM_USER_CSV_SORT_BUFFER_SIZE'] = sort_buffer_size
+        self.data_api_client.find_users_iter.return_value = iter([
+            {'id': 1, 'userResearchOptedIn': True, 'emailAddress': 'shania@example.com', 'name': "Shania Twain"},
+            {'id': 2, 'userResearchOptedIn': False, 'emailAddress': 'mariah@example.com', 'name': "Mariah Carey"},
+            {'id': 3, 'userResearchOptedIn': False, 'emailAddress': 'tina@example.com', 'name': "Tina Turner"},
+        ])
+
+        response = self.client.get(f'/admin/users/download/buyers{query_string}')
+
+        assert response.status_code == 200
+        names = [line.split(',')[1] for line in response.get_data(as_text=True).splitlines()[1:]]
+        if query_string:
+            assert names == ["Shania Twain", "Mariah Carey", "Tina Turner"]
+        else:
+            assert names == ["Mariah Carey", "Shania Twain", "Tina Turner"]
+
     @pytest.mark.parametrize(
         ('role', 'status_code'),
         (
@@ -0,0 +1,158 @@
+from datetime import date
+
+import mock
+import pytest
+
+from app.main.helpers.agreements import (
+    AgreementsListing,
+    SupplierFrameworkIndex,
+    get_supplier_lot_names,
+    supplier_lot_names_cache,
+)
+from .helpers import BaseApplicationTest
+
+
+class TestSupplierFrameworkIndex:
+    supplier_frameworks = (
+        {"supplierId": 1, "agreementStatus": "signed"},
+        {"supplierId": 2, "agreementStatus": "on-hold"},
+        {"supplierId": 3, "agreementStatus": "approved"},
+        {"supplierId": 4, "agreementStatus": "signed"},
+        {"supplierId": 5, "agreementStatus": "countersigned"},
+    )
+
+    def setup_method(self, method):
+        self.index = SupplierFrameworkIndex(
+            self.supplier_frameworks, ("signed", "on-hold", "approved,countersigned"),
+        )
+
+    def test_contains(self):
+        assert 3 in self.index
+        assert 6 not in self.index
+
+    @pytest.mark.parametrize("supplier_id, status_filter, expected_supplier_id", (
+        (1, None, 2),
+        (1, "", 2),
+        (4, None, 5),
+        (5, None, None),
+        (1, "signed", 4),
+        (2, "signed", 4),
+        (4, "signed", None),
+        (2, "on-hold", None),
+        (1, "approved,countersigned", 3),
+        (3, "approved,countersigned", 5),
+    ))
+    def test_next_after(self, supplier_id, status_filter, expected_supplier_id):
+        next_supplier_framework = self.index.next_after(supplier_id, status_filter)
+
+        assert (next_supplier_framework and next_supplier_framework["supplierId"]) == expected_supplier_id
+
+    def test_next_after_unknown_supplier_raises_key_error(self):
+        with pytest.raises(KeyError):
+            self.index.next_after(6)
+
+    def test_duplicate_supplier_uses_first_position(self):
+        index = SupplierFrameworkIndex(
+            self.supplier_frameworks + ({"supplierId": 1, "agreementStatus": "on-hold"},), (),
+        )
+
+        assert index.next_after(1)["supplierId"] == 2
+
+
+class TestAgreementsListing:
+    supplier_frameworks = (
+        {"supplierId": 1, "supplierName": "Bravo", "agreementReturnedAt": "2020-03-02T12:00:00.000000Z"},
+        {"supplierId": 2, "supplierName": "alpha", "agreementReturnedAt": "2020-03-01T00:00:00.000000Z"},
+        {"supplierId": 3, "supplierName": "Charlie", "agreementReturnedAt": "2020-03-03T23:59:59.000000Z"},
+        {"supplierId": 4, "supplierName": "Delta", "agreementReturnedAt": "2020-02-28T08:00:00.000000Z"},
+    )
+
+    def setup_method(self, method):
+        self.listing = AgreementsListing(self.supplier_frameworks)
+
+    def _supplier_ids(self, positions):
+        return [supplier_framework["supplierId"] for supplier_framework in self.listing.page(positions, 1, 100)]
+
+    def test_dates_are_formatted_without_modifying_originals(self):
+        supplier_framework, = self.listing.page(self.listing.select(), 1, 1)
+
+        assert supplier_framework["agreementReturnedAt"] == "Monday 2 March 2020 at 12:00pm GMT"
+        assert self.supplier_frameworks[0]["agreementReturnedAt"] == "2020-03-02T12:00:00.000000Z"
+
+    @pytest.mark.parametrize("sort, expected_supplier_ids", (
+        (None, [1, 2, 3, 4]),
+        ("name", [2, 1, 3, 4]),
+        ("oldest", [4, 2, 1, 3]),
+        ("newest", [3, 1, 2, 4]),
+    ))
+    def test_sort(self, sort, expected_supplier_ids):
+        assert self._supplier_ids(self.listing.select(sort=sort)) == expected_supplier_ids
+
+    @pytest.mark.parametrize("returned_from, returned_to, expected_supplier_ids", (
+        (date(2020, 3, 1), None, [1, 2, 3]),
+        (None, date(2020, 3, 1), [2, 4]),
+        (date(2020, 3, 1), date(2020, 3, 2), [1, 2]),
+        (date(2020, 3, 3), date(2020, 3, 3), [3]),
+        (date(2020, 3, 4), None, []),
+    ))
+    def test_date_range(self, returned_from, returned_to, expected_supplier_ids):
+        assert self._supplier_ids(
+            self.listing.select(returned_from=returned_from, returned_to=returned_to)
+        ) == expected_supplier_ids
+
+    def test_supplier_ids(self):
+        assert self._supplier_ids(self.listing.select(sort="name", supplier_ids={1, 2})) == [2, 1]
+
+    def test_page(self):
+        positions = self.listing.select(sort="oldest")
+
+        assert [sf["supplierId"] for sf in self.listing.page(positions, 1, 3)] == [4, 2, 1]
+        assert [sf["supplierId"] for sf in self.listing.page(positions, 2, 3)] == [3]
+        assert self.listing.page(positions, 3, 3) == []
+        assert len(self.listing) == 4
+
+
+class TestGetSupplierLotNames(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.client = mock.Mock()
+        self.client.find_services_iter.side_effect = lambda **kwargs: iter((
+            {"lotName": "Cloud support"},
+            {"lotName": "Cloud hosting"},
+            {"lotName": "Cloud support"},
+        ))
+        self.client.find_draft_services_iter.side_effect = lambda **kwargs: iter((
+            {"lotName": "Cloud support", "status": "not-submitted"},
+            {"lotName": "Cloud software", "status": "submitted"},
+            {"lotName": "Cloud hosting", "status": "submitted"},
+        ))
+
+    def teardown_method(self, method):
+        supplier_lot_names_cache.invalidate()
+        super().teardown_method(method)
+
+    @pytest.mark.parametrize("framework_status", ("live", "expired"))
+    def test_lists_distinct_lots_of_services(self, framework_status):
+        with self.app.app_context():
+            lot_names = get_supplier_lot_names(self.client, 1234, {"slug": "g-cloud-12", "status": framework_status})
+
+        assert lot_names == ("Cloud hosting", "Cloud support")
+        assert self.client.find_services_iter.call_args == mock.call(supplier_id=1234, framework="g-cloud-12")
+
+    @pytest.mark.parametrize("framework_status", ("open", "pending", "standstill"))
+    def test_lists_distinct_lots_of_submitted_drafts(self, framework_status):
+        with self.app.app_context():
+            lot_names = get_supplier_lot_names(self.client, 1234, {"slug": "g-cloud-12", "status": framework_status})
+
+        assert lot_names == ("Cloud hosting", "Cloud software")
+        assert self.client.find_draft_services_iter.call_args == mock.call(supplier_id=1234, framework="g-cloud-12")
+
+    def test_is_cached_per_supplier_and_framework(self):
+        self.app.config["DM_SUPPLIER_LOT_NAMES_CACHE_TTL"] = 60
+
+        with self.app.app_context():
+            for supplier_id, framework_slug in ((1234, "g-cloud-12"), (1234, "g-cloud-12"), (5678, "g-cloud-12"),
+                                                (1234, "g-cloud-11")):
+                get_supplier_lot_names(self.client, supplier_id, {"slug": framework_slug, "status": "live"})
+
+        assert self.client.find_services_iter.call_count == 3
@@ -0,0 +1,156 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Barrier, Thread
+
+import mock
+import pytest
+from flask import Flask
+
+from app.api_client import PooledDataAPIClient
+from .helpers import BaseApplicationTest
+
+
+class StubAPIServer:
+    """A local HTTP/1.1 server answering every request with `{"frameworks": []}`, recording the client port (and so
+    the connection) each request arrived on and the Accept-Encoding it was sent with"""
+
+    def __init__(self):
+        self.client_ports = []
+        self.accept_encodings = []
+        self.barrier = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.client_ports.append(self.client_address[1])
+                stub.accept_encodings.append(self.headers.get("Accept-Encoding"))
+                if stub.barrier is not None:
+                    stub.barrier.wait(5)
+                body = json.dumps({"frameworks": []}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TestPooledDataAPIClient:
+    def setup_method(self, method):
+        self.server = StubAPIServer()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            DM_DATA_API_URL=self.server.url,
+            DM_DATA_API_AUTH_TOKEN="token",
+            DM_DATA_API_POOL_SIZE=0,
+            DM_WEB_SERVER_THREADS=2,
+            DM_CONCURRENT_FETCH_MAX_WORKERS=3,
+            DM_BACKGROUND_JOB_MAX_WORKERS=1,
+            DM_DATA_API_COMPRESSION=True,
+        )
+
+    def teardown_method(self, method):
+        self.server.close()
+
+    def _client(self):
+        client = PooledDataAPIClient()
+        client.init_app(self.app)
+        return client
+
+    def test_connections_are_kept_alive_between_requests(self):
+        client = self._client()
+        for _ in range(5):
+            assert client.find_frameworks() == {"frameworks": []}
+
+        assert len(self.server.client_ports) == 5
+        assert len(set(self.server.client_ports)) == 1
+
+    def test_pool_is_shared_between_threads(self):
+        client = self._client()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in range(5):
+                list(executor.map(lambda _: client.find_frameworks(), range(4)))
+
+        assert len(self.server.client_ports) == 20
+        assert len(set(self.server.client_ports)) <= 4
+
+    def test_pool_size_defaults_to_number_of_threads_which_may_use_it(self):
+        assert self._client()._requests_retry_session().get_adapter(self.server.url)._pool_maxsize == 6
+
+        self.app.config["DM_DATA_API_POOL_SIZE"] = 12
+        assert self._client()._requests_retry_session().get_adapter(self.server.url)._pool_maxsize == 12
+
+    def test_keeps_dmapiclient_retry_policy(self):
+        client = self._client()
+
+        assert client._requests_retry_session().get_adapter(self.server.url).max_retries.total == client._RETRIES
+        assert client._requests_retry_session(retry_read_timeouts=False).get_adapter(
+            self.server.url
+        ).max_retries.read == 0
+
+    @pytest.mark.parametrize("compression, accept_encoding", ((True, "gzip, deflate"), (False, "identity")))
+    def test_compression_can_be_turned_off(self, compression, accept_encoding):
+        self.app.config["DM_DATA_API_COMPRESSION"] = compression
+        self._client().find_frameworks()
+
+        assert self.server.accept_encodings == [accept_encoding]
+
+    def test_forked_processes_get_sessions_of_their_own(self):
+        client = self._client()
+        session = client._requests_retry_session()
+
+        with mock.patch("app.api_client.os.getpid", return_value=-1):
+            assert client._requests_retry_session() is not session
+        assert client._requests_retry_session() is session
+
+
+class TestPoolMetrics(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.server = StubAPIServer()
+        self.app.config.update(DM_DATA_API_URL=self.server.url, DM_DATA_API_POOL_SIZE=1)
+
+    def teardown_method(self, method):
+        self.server.close()
+        super().teardown_method(method)
+
+    def _metrics(self):
+        # these metrics have no labels, so aren't found by load_prometheus_metrics
+        results = dict(re.findall(rb"^(\w+) (\d+)", self.client.get('/admin/_metrics').data, re.MULTILINE))
+        return (
+            int(results.get(b'data_api_connections_opened_total', 0)),
+            int(results.get(b'data_api_pool_saturated_total', 0)),
+        )
+
+    def test_saturation_and_new_connections_are_exported_as_metrics(self):
+        client = PooledDataAPIClient()
+        client.init_app(self.app)
+        opened_before, saturated_before = self._metrics()
+
+        # two requests at once, with a pool of one connection
+        self.server.barrier = Barrier(2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda _: client.find_frameworks(), range(2)))
+
+        opened_after, saturated_after = self._metrics()
+        assert opened_after - opened_before == 2
+        assert saturated_after - saturated_before == 1
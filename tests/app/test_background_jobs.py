@@ -0,0 +1,72 @@
+from threading import Event
+
+import mock
+
+from app.main.helpers.background_jobs import get_background_job, start_background_job
+from .helpers import BaseApplicationTest
+
+
+class TestBackgroundJobs(BaseApplicationTest):
+    def test_job_runs_in_background_and_reports_progress(self):
+        release = Event()
+
+        def func(job):
+            job.item_done("a")
+            release.wait(5)
+            job.item_done("b", ValueError("b"))
+
+        with self.app.app_context():
+            job = start_background_job("test-progress", "Testing", 2, func)
+
+            assert get_background_job("test-progress") is job
+            assert not job.finished
+
+            release.set()
+            assert job.wait(5)
+            assert (job.completed, job.succeeded, list(job.errors)) == (2, 1, ["b"])
+
+            # a finished job is only reported once
+            assert get_background_job("test-progress") is job
+            assert get_background_job("test-progress") is None
+
+    def test_only_one_job_runs_per_key(self):
+        release = Event()
+        calls = []
+
+        def func(job):
+            calls.append(job)
+            release.wait(5)
+
+        with self.app.app_context():
+            first_job = start_background_job("test-single", "Testing", 1, func)
+            second_job = start_background_job("test-single", "Testing", 1, func)
+            release.set()
+
+            assert second_job is first_job
+            assert first_job.wait(5)
+            assert calls == [first_job]
+
+    def test_job_is_finished_even_if_it_fails(self):
+        def func(job):
+            raise ValueError
+
+        with self.app.app_context():
+            job = start_background_job("test-failure", "Testing", 1, func)
+
+            assert job.wait(5)
+            assert get_background_job("test-failure") is job
+
+    def test_job_start_and_finish_are_logged(self):
+        def func(job):
+            job.item_done("a")
+
+        with self.app.app_context():
+            with mock.patch.object(self.app, "logger", autospec=True) as logger:
+                job = start_background_job("test-logging", "Testing", 1, func)
+                assert job.wait(5)
+
+        assert [call[0][0] for call in logger.info.call_args_list] == [
+            "Background job {key} started: {description}",
+            "Background job {key} finished",
+        ]
+        assert logger.info.call_args[1]["extra"] == {"key": "test-logging", "completed": 1, "error_count": 0}
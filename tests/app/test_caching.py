@@ -0,0 +1,144 @@
+from threading import Event, Thread
+
+import mock
+import pytest
+
+from app.main.helpers.caching import TTLCache
+from .helpers import BaseApplicationTest
+from .test_metrics import load_prometheus_metrics
+
+
+class TestTTLCache(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_TEST_CACHE_TTL"] = 60
+        self.cache = TTLCache("test", "DM_TEST_CACHE_TTL")
+
+    def test_fetches_once_within_ttl(self):
+        fetch = mock.Mock(return_value="value")
+
+        with self.app.app_context():
+            assert self.cache.get("key", fetch) == "value"
+            assert self.cache.get("key", fetch) == "value"
+
+        assert fetch.call_count == 1
+
+    def test_keys_are_cached_separately(self):
+        with self.app.app_context():
+            assert self.cache.get("a", lambda: 1) == 1
+            assert self.cache.get("b", lambda: 2) == 2
+            assert self.cache.get("a", lambda: 3) == 1
+
+    def test_entries_expire(self):
+        fetch = mock.Mock(side_effect=["old", "new"])
+
+        with self.app.app_context(), mock.patch("app.main.helpers.caching.monotonic") as monotonic:
+            monotonic.return_value = 1000
+            assert self.cache.get("key", fetch) == "old"
+            monotonic.return_value = 1059
+            assert self.cache.get("key", fetch) == "old"
+            monotonic.return_value = 1061
+            assert self.cache.get("key", fetch) == "new"
+
+    @pytest.mark.parametrize("ttl", (0, None))
+    def test_disabled_by_config(self, ttl):
+        self.app.config["DM_TEST_CACHE_TTL"] = ttl
+        fetch = mock.Mock(return_value="value")
+
+        with self.app.app_context():
+            self.cache.get("key", fetch)
+            self.cache.get("key", fetch)
+
+        assert fetch.call_count == 2
+
+    def test_disabled_outside_app_context(self):
+        fetch = mock.Mock(return_value="value")
+
+        self.cache.get("key", fetch)
+        self.cache.get("key", fetch)
+
+        assert fetch.call_count == 2
+
+    def test_invalidate(self):
+        fetch = mock.Mock(side_effect=[1, 2, 3, 4])
+
+        with self.app.app_context():
+            assert self.cache.get("a", fetch) == 1
+            assert self.cache.get("b", fetch) == 2
+            self.cache.invalidate("a")
+            assert self.cache.get("a", fetch) == 3
+            assert self.cache.get("b", fetch) == 2
+            self.cache.invalidate()
+            assert self.cache.get("b", fetch) == 4
+
+    def test_invalidate_where(self):
+        fetch = mock.Mock(side_effect=[1, 2, 3, 4])
+
+        with self.app.app_context():
+            assert self.cache.get(("a", 1), fetch) == 1
+            assert self.cache.get(("a", 2), fetch) == 2
+            assert self.cache.get(("b", 1), fetch) == 3
+            self.cache.invalidate_where(lambda key: key[0] == "a")
+            assert self.cache.get(("b", 1), fetch) == 3
+            assert self.cache.get(("a", 1), fetch) == 4
+
+    def test_maxsize_evicts_least_recently_used(self):
+        cache = TTLCache("test", "DM_TEST_CACHE_TTL", maxsize=2)
+
+        with self.app.app_context():
+            cache.get("a", lambda: 1)
+            cache.get("b", lambda: 2)
+            cache.get("a", lambda: None)
+            cache.get("c", lambda: 3)
+
+            assert cache.get("a", lambda: "refetched") == 1
+            assert cache.get("b", lambda: "refetched") == "refetched"
+
+    def test_exceptions_are_not_cached(self):
+        fetch = mock.Mock(side_effect=[ValueError, "value"])
+
+        with self.app.app_context():
+            with pytest.raises(ValueError):
+                self.cache.get("key", fetch)
+            assert self.cache.get("key", fetch) == "value"
+
+    def test_concurrent_lookups_share_a_single_fetch(self):
+        fetch_started, release_fetch = Event(), Event()
+        fetch = mock.Mock(side_effect=lambda: (fetch_started.set(), release_fetch.wait(), "value")[-1])
+        results = []
+
+        def lookup():
+            with self.app.app_context():
+                results.append(self.cache.get("key", fetch))
+
+        leader = Thread(target=lookup)
+        leader.start()
+        fetch_started.wait()
+        followers = [Thread(target=lookup) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        release_fetch.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert results == ["value"] * 4
+        assert fetch.call_count == 1
+
+    def test_invalidation_during_fetch_discards_result(self):
+        with self.app.app_context():
+            def fetch():
+                self.cache.invalidate()
+                return "stale"
+
+            assert self.cache.get("key", fetch) == "stale"
+            assert self.cache.get("key", lambda: "fresh") == "fresh"
+
+    def test_hits_and_misses_are_exported_as_metrics(self):
+        with self.app.app_context():
+            for _ in range(3):
+                self.cache.get("key", lambda: "value")
+
+        results = load_prometheus_metrics(self.client.get('/admin/_metrics').data)
+
+        assert int(results[b'cache_requests_total{cache="test",result="miss"}']) >= 1
+        assert int(results[b'cache_requests_total{cache="test",result="hit"}']) >= 2
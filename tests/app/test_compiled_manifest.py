@@ -0,0 +1,215 @@
+import pytest
+from dmcontent.content_loader import ContentManifest
+from dmcontent.utils import count_unanswered_questions
+
+from app.compiled_manifest import CompiledManifest
+from .helpers import BaseApplicationTest
+
+
+MANIFEST = ContentManifest([
+    {
+        "slug": "about",
+        "name": "About your service",
+        "questions": [
+            {"id": "serviceName", "question": "Service name", "type": "text"},
+            {"id": "serviceSummary", "question": "Service summary", "type": "textbox_large", "optional": True},
+            {
+                "id": "lotOnly",
+                "question": "Only for one lot",
+                "type": "text",
+                "depends": [{"on": "lot", "being": ["cloud-support"]}],
+            },
+            {
+                "id": "contractLength",
+                "question": "Contract length",
+                "type": "number",
+                "unit": "months",
+                "unit_position": "after",
+            },
+            {"id": "startDate", "question": "Start date", "type": "date"},
+        ],
+    },
+    {
+        "slug": "features",
+        "name": "Features",
+        "questions": [
+            {
+                "id": "serviceCategories",
+                "question": "Categories",
+                "type": "checkboxes",
+                "options": [{"label": "Accounting", "value": "accounting"}, {"label": "Hosting"}],
+            },
+            {
+                "id": "serviceSubcategories",
+                "question": "Subcategories",
+                "type": "checkbox_tree",
+                "options": [
+                    {"label": "Planning", "options": [{"label": "Strategy"}, {"label": "Roadmaps"}]},
+                    {"label": "Testing"},
+                ],
+            },
+            {
+                "id": "dataCentres",
+                "question": "Data centres",
+                "type": "radios",
+                "assuranceApproach": "2answers-type1",
+                "options": [{"label": "Yes"}, {"label": "No"}],
+            },
+            {
+                "id": "priceString",
+                "question": "Price",
+                "type": "pricing",
+                "fields": {"minimum_price": "priceMin", "maximum_price": "priceMax", "price_unit": "priceUnit"},
+            },
+        ],
+    },
+    {
+        "slug": "support",
+        "name": "Support",
+        "questions": [
+            {
+                "id": "support",
+                "question": "Support",
+                "type": "multiquestion",
+                "questions": [
+                    {
+                        "id": "supportAvailable",
+                        "question": "Is support available?",
+                        "type": "radios",
+                        "options": [{"label": "Yes", "value": "yes"}, {"label": "No", "value": "no"}],
+                        "followup": {"supportHours": ["Yes"]},
+                    },
+                    {"id": "supportHours", "question": "Support hours", "type": "text"},
+                    {"id": "supportLevels", "question": "Support levels", "type": "text"},
+                    {
+                        "id": "supportPhone",
+                        "question": "Support phone",
+                        "type": "text",
+                        "depends": [{"on": "lot", "being": ["cloud-support"]}],
+                    },
+                ],
+            },
+            {
+                "id": "optionalMulti",
+                "question": "Something optional",
+                "type": "multiquestion",
+                "optional": True,
+                "questions": [{"id": "optionalMultiPart", "question": "Part", "type": "text"}],
+            },
+        ],
+    },
+])
+
+COMPLETE_SERVICE = {
+    "lot": "cloud-support",
+    "serviceName": "Pinchbeck",
+    "lotOnly": "Something",
+    "contractLength": 12,
+    "startDate": "2020-01-01",
+    "serviceCategories": ["accounting"],
+    "serviceSubcategories": ["Strategy"],
+    "dataCentres": {"value": "Yes", "assurance": "Service provider assertion"},
+    "priceMin": "10",
+    "supportAvailable": "yes",
+    "supportHours": "9 to 5",
+    "supportLevels": "Gold",
+    "supportPhone": "0123",
+}
+
+
+def _dmcontent_count(service_data):
+    return count_unanswered_questions(MANIFEST.filter(service_data).summary(service_data))[0]
+
+
+class TestCompiledManifest:
+    @pytest.mark.parametrize("service_data", (
+        COMPLETE_SERVICE,
+        {},
+        {"lot": "cloud-hosting"},
+        {"lot": "cloud-support"},
+        {**COMPLETE_SERVICE, "lot": "cloud-hosting", "lotOnly": None},
+        {**COMPLETE_SERVICE, "serviceName": ""},
+        {**COMPLETE_SERVICE, "serviceSummary": None},
+        {**COMPLETE_SERVICE, "contractLength": None},
+        {**COMPLETE_SERVICE, "contractLength": 0},
+        {**COMPLETE_SERVICE, "startDate": ""},
+        {**COMPLETE_SERVICE, "startDate": "last tuesday"},
+        {**COMPLETE_SERVICE, "serviceCategories": []},
+        {**COMPLETE_SERVICE, "serviceSubcategories": []},
+        {**COMPLETE_SERVICE, "serviceSubcategories": ["Planning"]},
+        {**COMPLETE_SERVICE, "serviceSubcategories": ["Not an option"]},
+        {**COMPLETE_SERVICE, "dataCentres": {"assurance": "Service provider assertion"}},
+        {**COMPLETE_SERVICE, "priceMin": None, "priceMax": "20"},
+        {**COMPLETE_SERVICE, "priceMin": None},
+        {**COMPLETE_SERVICE, "supportHours": None},
+        {**COMPLETE_SERVICE, "supportAvailable": "no", "supportHours": None},
+        {**COMPLETE_SERVICE, "supportAvailable": None, "supportHours": None},
+        {**COMPLETE_SERVICE, "supportLevels": None},
+        {**COMPLETE_SERVICE, "supportPhone": None},
+        {**COMPLETE_SERVICE, "lot": "cloud-hosting", "supportPhone": None},
+        {"supportAvailable": "yes", "supportHours": "9 to 5"},
+    ))
+    def test_counts_match_dmcontent(self, service_data):
+        assert CompiledManifest(MANIFEST).count_unanswered_required(service_data) == _dmcontent_count(service_data)
+
+    def test_counts_unanswered_required_questions(self):
+        compiled_manifest = CompiledManifest(MANIFEST)
+
+        assert compiled_manifest.count_unanswered_required(COMPLETE_SERVICE) == 0
+        assert compiled_manifest.count_unanswered_required({
+            **COMPLETE_SERVICE,
+            "serviceName": "",
+            "supportHours": None,
+        }) == 2
+        # lotOnly isn't asked of cloud-hosting services, and unanswered optional questions aren't counted
+        assert compiled_manifest.count_unanswered_required({
+            **COMPLETE_SERVICE,
+            "lot": "cloud-hosting",
+            "lotOnly": None,
+            "serviceSummary": None,
+        }) == 0
+
+
+class TestCompiledManifestWithFrameworkContent(BaseApplicationTest):
+    """Compares CompiledManifest with dmcontent's summaries for the frameworks' own edit_service_as_admin content"""
+
+    @staticmethod
+    def _lot_slugs(manifest):
+        return sorted({
+            lot_slug
+            for section in manifest.sections
+            for question in section.questions
+            for depends in question.get("depends", ())
+            if depends["on"] == "lot"
+            for lot_slug in depends["being"]
+        })
+
+    def _service_data_variants(self, manifest):
+        service = self.load_example_listing("services_response")["services"][0]
+        yield {}
+        for lot_slug in self._lot_slugs(manifest):
+            yield {"lot": lot_slug}
+            yield {**service, "lot": lot_slug}
+        # the example service with each of its answers missing in turn
+        for key in service:
+            yield {other_key: value for other_key, value in service.items() if other_key != key}
+
+    @pytest.mark.parametrize("framework_slug", (
+        "g-cloud-7",
+        "g-cloud-8",
+        "g-cloud-9",
+        "g-cloud-11",
+        "digital-outcomes-and-specialists",
+        "digital-outcomes-and-specialists-2",
+    ))
+    def test_counts_match_dmcontent(self, framework_slug):
+        manifest = self.injected_content_loader.get_manifest(framework_slug, "edit_service_as_admin")
+        compiled_manifest = CompiledManifest(manifest)
+
+        mismatches = [
+            service_data for service_data in self._service_data_variants(manifest)
+            if compiled_manifest.count_unanswered_required(service_data) != count_unanswered_questions(
+                manifest.filter(service_data).summary(service_data)
+            )[0]
+        ]
+        assert mismatches == []
@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, current_thread
+
+import mock
+import pytest
+from flask import current_app, request
+
+from app.main.helpers.concurrency import fetch_concurrently, iter_prefetched, map_concurrently, submit
+from .helpers import BaseApplicationTest
+
+
+class TestFetchConcurrently(BaseApplicationTest):
+    def test_returns_results_in_argument_order(self):
+        with self.app.app_context():
+            assert fetch_concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+    def test_calls_are_made_concurrently(self):
+        # each call waits for all the others to have started, so would deadlock if they were made one at a time
+        barrier = Barrier(3, timeout=5)
+
+        with self.app.app_context():
+            assert fetch_concurrently(*[barrier.wait] * 3) is not None
+
+    def test_calls_are_made_in_other_threads(self):
+        with self.app.app_context():
+            thread, = fetch_concurrently(current_thread)
+
+        assert thread is not current_thread()
+
+    def test_raises_the_first_exception_in_argument_order(self):
+        barrier = Barrier(2, timeout=5)
+
+        def fail_later():
+            barrier.wait()
+            raise ValueError
+
+        def fail_sooner():
+            raise KeyError
+
+        with self.app.app_context():
+            with pytest.raises(ValueError):
+                fetch_concurrently(fail_later, lambda: barrier.wait(), fail_sooner)
+
+    def test_calls_are_made_in_the_app_context(self):
+        with self.app.app_context():
+            app, = fetch_concurrently(lambda: current_app._get_current_object())
+
+        assert app is self.app
+
+    def test_calls_are_made_in_the_request_context(self):
+        with self.app.test_request_context("/admin/suppliers?supplier_id=1234"):
+            path, args = fetch_concurrently(lambda: request.path, lambda: request.args["supplier_id"])
+
+        assert (path, args) == ("/admin/suppliers", "1234")
+
+
+class TestSubmit(BaseApplicationTest):
+    def test_returns_a_future(self):
+        with self.app.app_context():
+            future = submit(lambda x, y: x + y, 1, y=2)
+
+            assert future.result(timeout=5) == 3
+
+
+class TestMapConcurrently(BaseApplicationTest):
+    def test_returns_results_and_exceptions_in_item_order(self):
+        def func(item):
+            if item == 2:
+                raise ValueError(item)
+            return item * 10
+
+        with self.app.app_context():
+            outcomes = map_concurrently(func, [1, 2, 3], batch_size=2)
+
+        assert [result for result, _ in outcomes] == [10, None, 30]
+        assert [type(exception) for _, exception in outcomes] == [type(None), ValueError, type(None)]
+
+    def test_batches_are_made_concurrently(self):
+        barrier = Barrier(2, timeout=5)
+
+        with self.app.app_context():
+            outcomes = map_concurrently(lambda item: barrier.wait(), list(range(4)), batch_size=2)
+
+        assert all(exception is None for _, exception in outcomes)
+
+    def test_calls_on_done_for_each_item(self):
+        on_done = mock.Mock()
+
+        with self.app.app_context():
+            map_concurrently(lambda item: 1 / item, [1, 0], batch_size=1, on_done=on_done)
+
+        assert [c[0][0] for c in on_done.call_args_list] == [1, 0]
+        assert on_done.call_args_list[0][0][1] is None
+        assert isinstance(on_done.call_args_list[1][0][1], ZeroDivisionError)
+
+    def test_calls_are_made_on_the_given_executor_in_the_app_context(self):
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="other-pool") as executor:
+            with self.app.app_context():
+                outcomes = map_concurrently(
+                    lambda item: (current_thread().name, current_app.name), [1, 2], batch_size=2, executor=executor,
+                )
+
+        assert all(thread_name.startswith("other-pool") for (thread_name, _), _ in outcomes)
+        assert all(app_name == self.app.name for (_, app_name), _ in outcomes)
+
+
+class TestIterPrefetched(BaseApplicationTest):
+    def test_yields_items_with_fetched_values_in_order(self):
+        with self.app.app_context():
+            results = list(iter_prefetched(range(10), lambda i: i % 3, lambda key: key * 10, window=4, cache_size=8))
+
+        assert results == [(i, (i % 3) * 10) for i in range(10)]
+
+    def test_fetches_repeated_keys_once(self):
+        fetch = mock.Mock(side_effect=lambda key: key)
+
+        with self.app.app_context():
+            list(iter_prefetched("abcabcab", lambda c: c, fetch, window=2, cache_size=3))
+
+        assert sorted(c[0][0] for c in fetch.call_args_list) == ["a", "b", "c"]
+
+    def test_evicts_least_recently_used_keys(self):
+        fetch = mock.Mock(side_effect=lambda key: key)
+
+        with self.app.app_context():
+            list(iter_prefetched("abcab", lambda c: c, fetch, window=1, cache_size=2))
+
+        assert [c[0][0] for c in fetch.call_args_list] == ["a", "b", "c", "a", "b"]
+
+    def test_fetches_ahead_concurrently(self):
+        # each fetch waits for the next to have started, so would deadlock if they weren't made concurrently
+        barrier = Barrier(2, timeout=5)
+
+        with self.app.app_context():
+            assert len(list(iter_prefetched(range(4), lambda i: i, lambda key: barrier.wait(), 2, 4))) == 4
+
+    def test_is_lazy(self):
+        fetch = mock.Mock()
+
+        with self.app.app_context():
+            results = iter_prefetched(range(4), lambda i: i, fetch, window=2, cache_size=4)
+            assert fetch.called is False
+            next(results)
+
+        assert fetch.call_count == 3
+
+    def test_raises_when_failed_item_is_reached(self):
+        def fetch(key):
+            if key == 2:
+                raise ValueError
+            return key
+
+        with self.app.app_context():
+            results = iter_prefetched(range(4), lambda i: i, fetch, window=4, cache_size=4)
+            assert next(results) == (0, 0)
+            assert next(results) == (1, 1)
+            with pytest.raises(ValueError):
+                next(results)
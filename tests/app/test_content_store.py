@@ -0,0 +1,272 @@
+from threading import Thread
+
+import mock
+import pytest
+from dmcontent.content_loader import ContentManifest
+from dmcontent.errors import ContentNotFoundError
+from flask import request
+
+from app import _make_content_loader_factory
+from app.compiled_manifest import CompiledManifest
+from app.content_store import DeclarationLayout, LazyContentLoader, SharedContentLoader
+from app.instrumentation import REQUEST_SPANS_ENVIRON_KEY, RequestSpans
+from .helpers import BaseApplicationTest
+
+
+class TestSharedContentLoader(BaseApplicationTest):
+    def _question_ids(self, manifest):
+        return [question.id for section in manifest.sections for question in section.questions]
+
+    def test_manifests_match_source(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+
+        assert self._question_ids(shared_cl.get_manifest("g-cloud-9", "edit_service_as_admin")) == \
+            self._question_ids(self.injected_content_loader.get_manifest("g-cloud-9", "edit_service_as_admin"))
+
+    def test_inplace_filter_only_affects_its_own_manifest(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+        unfiltered_question_ids = self._question_ids(shared_cl.get_manifest("g-cloud-9", "edit_service_as_admin"))
+
+        manifest = shared_cl.get_manifest("g-cloud-9", "edit_service_as_admin")
+        filtered = manifest.filter({"lot": "cloud-support"}, inplace_allowed=True)
+
+        assert filtered is manifest
+        assert self._question_ids(filtered) != unfiltered_question_ids
+        assert self._question_ids(shared_cl.get_manifest("g-cloud-9", "edit_service_as_admin")) == \
+            unfiltered_question_ids
+
+    def test_missing_manifest(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+
+        with pytest.raises(ContentNotFoundError):
+            shared_cl.get_manifest("g-cloud-9", "not-a-manifest")
+        with pytest.raises(ContentNotFoundError):
+            shared_cl.get_manifest("not-a-framework", "edit_service_as_admin")
+
+    def test_getting_and_filtering_manifests_are_timed(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+
+        with self.app.test_request_context():
+            request_spans = RequestSpans()
+            request.environ[REQUEST_SPANS_ENVIRON_KEY] = request_spans
+            shared_cl.get_manifest("g-cloud-9", "edit_service_as_admin").filter({"lot": "cloud-support"})
+
+        assert sorted((kind, operation, count) for kind, operation, count, seconds in request_spans.top(5)) == [
+            ("content", "filter", 1),
+            ("content", "get_manifest", 1),
+        ]
+
+    def test_compiled_manifest_is_only_compiled_once(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+
+        compiled_manifest = shared_cl.get_compiled_manifest("g-cloud-9", "edit_service_as_admin")
+
+        assert isinstance(compiled_manifest, CompiledManifest)
+        assert shared_cl.get_compiled_manifest("g-cloud-9", "edit_service_as_admin") is compiled_manifest
+        with pytest.raises(ContentNotFoundError):
+            shared_cl.get_compiled_manifest("not-a-framework", "edit_service_as_admin")
+
+    def test_declaration_layout_summary_matches_filtered_manifest_summary(self):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+        declaration = self.load_example_listing("declaration_response")["declaration"]
+        manifest = self.injected_content_loader.get_manifest("g-cloud-9", "declaration").filter(declaration)
+
+        summary = shared_cl.get_declaration_layout("g-cloud-9").summary(declaration)
+
+        assert [(section_id, section_name) for section_id, section_name, _ in summary] == [
+            (section.id, section.name) for section in manifest.sections
+        ]
+        assert [
+            (answer.number, answer.summary.id, answer.summary.question, answer.summary.value)
+            for _, _, answers in summary
+            for answer in answers
+        ] == [
+            (question.number, question.id, question.question, question.value)
+            for section in manifest.summary(declaration).sections
+            for question in section.questions
+        ]
+        with pytest.raises(ContentNotFoundError):
+            shared_cl.get_declaration_layout("not-a-framework")
+
+    @pytest.mark.parametrize("method,args", (
+        ("load_manifest", ("g-cloud-9", "services", "edit_submission")),
+        ("lazy_load_manifests", ("g-cloud-9", {"edit_submission": "services"})),
+        ("load_messages", ("g-cloud-9", ["urls"])),
+        ("load_metadata", ("g-cloud-9", ["copy_services"])),
+    ))
+    def test_read_only(self, method, args):
+        shared_cl = SharedContentLoader(self.injected_content_loader)
+
+        with pytest.raises(TypeError):
+            getattr(shared_cl, method)(*args)
+
+    def test_factory_shares_one_instance_between_threads(self):
+        factory = _make_content_loader_factory(
+            mock.Mock(),
+            [{"slug": "g-cloud-9"}],
+            initial_instance=self.injected_content_loader,
+        )
+
+        results = []
+        threads = [Thread(target=lambda: results.append(factory())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+        assert isinstance(results[0], SharedContentLoader)
+
+
+class TestDeclarationLayout:
+    manifest = ContentManifest([
+        {
+            "slug": "about-you",
+            "name": "About you",
+            "questions": [
+                {"id": "supplierName", "question": "Your name", "type": "text"},
+                {
+                    "id": "prime",
+                    "question": "Are you a prime contractor?",
+                    "type": "radios",
+                    "options": [{"label": "Yes", "value": "yes"}, {"label": "No", "value": "no"}],
+                    "assessment": {"passIfIn": ["Yes"], "discretionary": True},
+                },
+            ],
+        },
+        {
+            "slug": "subcontracting",
+            "name": "Subcontracting",
+            "questions": [
+                {
+                    "id": "subcontractors",
+                    "question": "Your subcontractors",
+                    "type": "text",
+                    "depends": [{"on": "prime", "being": ["no"]}],
+                },
+            ],
+        },
+        {
+            "slug": "exclusions",
+            "name": "Grounds for exclusion",
+            "questions": [
+                {
+                    "id": "exclusions",
+                    "question": "Exclusions",
+                    "type": "multiquestion",
+                    "questions": [
+                        {"id": "fraud", "question": "Fraud?", "type": "boolean", "assessment": {"passIfIn": [False]}},
+                        {
+                            "id": "fraudDetails",
+                            "question": "Details",
+                            "type": "text",
+                            "depends": [{"on": "fraud", "being": [True]}],
+                        },
+                    ],
+                },
+            ],
+        },
+    ])
+
+    def test_summary_only_includes_shown_questions_numbered_in_order(self):
+        summary = DeclarationLayout(self.manifest).summary({"supplierName": "Acme", "prime": "yes", "fraud": False})
+
+        assert [(section_id, section_name) for section_id, section_name, _ in summary] == [
+            ("about-you", "About you"),
+            ("exclusions", "Grounds for exclusion"),
+        ]
+        assert [
+            (answer.number, answer.summary.id, answer.summary.question, answer.summary.value)
+            for _, _, answers in summary
+            for answer in answers
+        ] == [
+            (1, "supplierName", "Your name", "Acme"),
+            (2, "prime", "Are you a prime contractor?", "Yes"),
+            (3, "exclusions", "Exclusions", mock.ANY),
+        ]
+
+    @pytest.mark.parametrize("declaration, assessments, nested_assessments", (
+        ({"prime": "yes", "fraud": False}, [None, "Pass", None], ["Pass"]),
+        ({"prime": "no", "fraud": True}, [None, "Discretionary", None, None], ["Fail", None]),
+        ({}, [None, "Discretionary", None], ["Fail"]),
+    ))
+    def test_summary_assesses_answers(self, declaration, assessments, nested_assessments):
+        summary = DeclarationLayout(self.manifest).summary(declaration)
+
+        answers = [answer for _, _, answers in summary for answer in answers]
+        assert [answer.assessment for answer in answers] == assessments
+        assert answers[-1].nested_assessments == nested_assessments
+
+    def test_summaries_of_different_declarations_are_independent(self):
+        layout = DeclarationLayout(self.manifest)
+
+        first_summary = layout.summary({"prime": "no", "subcontractors": "Some"})
+        second_summary = layout.summary({"prime": "yes"})
+
+        assert [(answer.number, answer.summary.id) for _, _, answers in first_summary for answer in answers] == [
+            (1, "supplierName"), (2, "prime"), (3, "subcontractors"), (4, "exclusions"),
+        ]
+        assert [(answer.number, answer.summary.id) for _, _, answers in second_summary for answer in answers] == [
+            (1, "supplierName"), (2, "prime"), (3, "exclusions"),
+        ]
+        assert [answer.summary.value for _, _, answers in first_summary for answer in answers][1] == "No"
+
+
+class TestLazyContentLoader(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.load_framework = mock.Mock(return_value=self.injected_content_loader)
+
+    def test_loads_each_framework_the_first_time_it_is_used(self):
+        lazy_cl = LazyContentLoader(self.load_framework)
+
+        assert self.load_framework.called is False
+
+        manifest = lazy_cl.get_manifest("g-cloud-9", "edit_service_as_admin")
+        lazy_cl.get_compiled_manifest("g-cloud-9", "edit_service_as_admin")
+        lazy_cl.get_declaration_layout("g-cloud-9")
+
+        assert self.load_framework.call_args_list == [mock.call("g-cloud-9")]
+        assert [q.id for section in manifest.sections for q in section.questions] == [
+            q.id
+            for section in self.injected_content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").sections
+            for q in section.questions
+        ]
+
+    def test_loads_framework_once_for_concurrent_first_uses(self):
+        lazy_cl = LazyContentLoader(self.load_framework)
+
+        threads = [
+            Thread(target=lambda: lazy_cl.get_manifest("g-cloud-9", "edit_service_as_admin")) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert self.load_framework.call_args_list == [mock.call("g-cloud-9")]
+
+    def test_missing_manifest(self):
+        lazy_cl = LazyContentLoader(self.load_framework)
+
+        with pytest.raises(ContentNotFoundError):
+            lazy_cl.get_manifest("g-cloud-9", "not-a-manifest")
+
+    def test_preload_loads_frameworks_in_order(self):
+        lazy_cl = LazyContentLoader(self.load_framework)
+
+        lazy_cl.preload(["g-cloud-10", "g-cloud-9"])
+        lazy_cl.get_manifest("g-cloud-9", "edit_service_as_admin")
+
+        assert self.load_framework.call_args_list == [mock.call("g-cloud-10"), mock.call("g-cloud-9")]
+        assert lazy_cl.preloaded.is_set()
+
+    def test_preloaded_is_set_even_if_preloading_fails(self):
+        self.load_framework.side_effect = ValueError
+        lazy_cl = LazyContentLoader(self.load_framework)
+
+        with pytest.raises(ValueError):
+            lazy_cl.preload(["g-cloud-9"])
+
+        assert lazy_cl.preloaded.is_set()
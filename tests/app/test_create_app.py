@@ -0,0 +1,110 @@
+from threading import Event
+
+import mock
+import pytest
+from dmapiclient import HTTPError
+from dmcontent.errors import ContentNotFoundError
+
+from app import create_app, data_api_client
+from app.content_store import LazyContentLoader
+from config import configs
+from .helpers import BaseApplicationTest
+
+
+class TestCreateApp(BaseApplicationTest):
+    def test_records_startup_phases(self):
+        assert [phase for phase, duration in self.app.extensions["startup_phases"]] == [
+            "init_app", "content_loader", "blueprints",
+        ]
+        assert all(duration >= 0 for phase, duration in self.app.extensions["startup_phases"])
+
+
+class TestCreateAppWithLazyContentLoading(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.config_patch = mock.patch.multiple(
+            configs["test"],
+            DM_LAZY_CONTENT_LOADING=True,
+            DM_CONTENT_PRELOAD_ATTEMPTS=3,
+            DM_CONTENT_PRELOAD_RETRY_INTERVAL=0,
+        )
+        self.config_patch.start()
+        self.load_framework_manifests_patch = mock.patch("app._load_framework_manifests", autospec=True)
+        self.load_framework_manifests = self.load_framework_manifests_patch.start()
+        # forget the call made creating self.app
+        data_api_client.find_frameworks.reset_mock()
+
+    def teardown_method(self, method):
+        self.load_framework_manifests_patch.stop()
+        self.config_patch.stop()
+        super().teardown_method(method)
+
+    def _lazy_content_loader(self, app):
+        with app.app_context():
+            from app import content_loader
+            return content_loader._get_current_object()
+
+    def test_serves_status_checks_before_frameworks_are_found(self):
+        frameworks_requested, release_frameworks = Event(), Event()
+
+        def find_frameworks():
+            frameworks_requested.set()
+            release_frameworks.wait(5)
+            return {"frameworks": [{"slug": "g-cloud-12", "status": "live"}]}
+        data_api_client.find_frameworks.side_effect = find_frameworks
+
+        app = create_app("test")
+        lazy_cl = self._lazy_content_loader(app)
+        try:
+            assert frameworks_requested.wait(5)
+            assert isinstance(lazy_cl, LazyContentLoader)
+            with mock.patch("app.status.views.data_api_client"):
+                assert app.test_client().get("/admin/_status?ignore-dependencies").status_code == 200
+            assert lazy_cl.preloaded.is_set() is False
+        finally:
+            release_frameworks.set()
+
+        assert lazy_cl.preloaded.wait(5)
+        assert [c[0][2] for c in self.load_framework_manifests.call_args_list] == ["g-cloud-12"]
+
+    def test_preloads_frameworks_in_status_order(self):
+        data_api_client.find_frameworks.return_value = {"frameworks": [
+            {"slug": "g-cloud-9", "status": "expired"},
+            {"slug": "g-cloud-13", "status": "coming"},
+            {"slug": "g-cloud-12", "status": "live"},
+            {"slug": "g-cloud-14", "status": "open"},
+        ]}
+
+        app = create_app("test")
+
+        assert self._lazy_content_loader(app).preloaded.wait(5)
+        assert [c[0][2] for c in self.load_framework_manifests.call_args_list] == [
+            "g-cloud-12", "g-cloud-14", "g-cloud-13", "g-cloud-9",
+        ]
+
+    def test_retries_finding_frameworks(self):
+        data_api_client.find_frameworks.side_effect = [
+            HTTPError(mock.Mock(status_code=503)),
+            {"frameworks": [{"slug": "g-cloud-12", "status": "live"}]},
+        ]
+
+        app = create_app("test")
+
+        assert self._lazy_content_loader(app).preloaded.wait(5)
+        assert data_api_client.find_frameworks.call_count == 2
+        assert [c[0][2] for c in self.load_framework_manifests.call_args_list] == ["g-cloud-12"]
+
+    def test_gives_up_preloading_if_frameworks_cannot_be_found(self):
+        data_api_client.find_frameworks.side_effect = HTTPError(mock.Mock(status_code=503))
+
+        app = create_app("test")
+        lazy_cl = self._lazy_content_loader(app)
+
+        assert lazy_cl.preloaded.wait(5)
+        assert data_api_client.find_frameworks.call_count == 3
+        assert self.load_framework_manifests.called is False
+
+        # content is still loaded when it's used (though as we haven't really loaded any here, it's not found)
+        with pytest.raises(ContentNotFoundError):
+            lazy_cl.get_declaration_layout("g-cloud-12")
+        assert [c[0][2] for c in self.load_framework_manifests.call_args_list] == ["g-cloud-12"]
@@ -1,11 +1,13 @@
 from collections import OrderedDict
 from itertools import chain
 
+import mock
 import pytest
+from dmcontent.content_loader import ContentSection
 from lxml import html
 
 from app import content_loader
-from app.main.helpers.diff_tools import html_diff_tables_from_sections_iter
+from app.main.helpers.diff_tools import DIFF_TABLE_RENDERERS, diff_tables_cache, html_diff_tables_from_sections_iter
 from .helpers import BaseApplicationTest
 
 
@@ -136,8 +138,10 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
         ),
     ))
     @pytest.mark.parametrize("table_preamble_template", (None, "diff_table/_table_preamble.html",))
+    @pytest.mark.parametrize("renderer", DIFF_TABLE_RENDERERS.keys())
     def test_common_properties(
         self,
+        renderer,
         framework_slug,
         lot_slug,
         service_data_a,
@@ -162,6 +166,7 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
                 service_data_a,
                 service_data_b,
                 table_preamble_template=table_preamble_template,
+                renderer=renderer,
             ))
 
         for question_id, html_diff in diffs.items():
@@ -315,7 +320,8 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
             # check a question we expect to have neither additions or removals to not be present in diffs at all
             assert (question_id in diffs) == (question_id in expected_rem_qs or question_id in expected_add_qs)
 
-    def test_identical_data(self):
+    @pytest.mark.parametrize("renderer", DIFF_TABLE_RENDERERS.keys())
+    def test_identical_data(self, renderer):
         # these two should be identical in as far as the data we're concerned about
         service_data_a = {
             "lot": "cloud-support",
@@ -342,4 +348,138 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
             'edit_service_as_admin',
         ).filter(service_data_b).sections
 
-        assert not tuple(html_diff_tables_from_sections_iter(content_sections, service_data_a, service_data_b))
+        assert not tuple(html_diff_tables_from_sections_iter(
+            content_sections,
+            service_data_a,
+            service_data_b,
+            renderer=renderer,
+        ))
+
+
+class TestDirectDiffTableRenderer(BaseApplicationTest):
+    def _rows(self, lines_1, lines_2):
+        with self.app.app_context():
+            table_element = html.fragment_fromstring(DIFF_TABLE_RENDERERS["direct"](lines_1, lines_2))
+        return [
+            [(td.attrib["class"], td.xpath("string()"), [child.tag for child in td]) for td in tr.xpath("./td")]
+            for tr in table_element.xpath("./tbody/tr")
+        ]
+
+    def test_marks_changed_characters_of_similar_lines(self):
+        assert self._rows(["Rudolf Virag"], ["Rudolf Viraj"]) == [[
+            ("line-number line-number-removal", "1", []),
+            ("line-content removal", "Rudolf Virag", ["del"]),
+            ("line-number line-number-addition", "1", []),
+            ("line-content addition", "Rudolf Viraj", ["ins"]),
+        ]]
+
+    def test_marks_whole_dissimilar_lines(self):
+        assert self._rows(["same", "Virag"], ["same", "Bloom"]) == [
+            [
+                ("line-number", "1", []),
+                ("line-content", "same", []),
+                ("line-number", "1", []),
+                ("line-content", "same", []),
+            ],
+            [
+                ("line-number line-number-removal", "2", []),
+                ("line-content removal", "Virag", ["del"]),
+                ("line-number line-number-addition", "2", []),
+                ("line-content addition", "Bloom", ["ins"]),
+            ],
+        ]
+
+    def test_added_lines_have_no_removal_side(self):
+        assert self._rows(["a"], ["a", ""]) == [
+            [
+                ("line-number", "1", []),
+                ("line-content", "a", []),
+                ("line-number", "1", []),
+                ("line-content", "a", []),
+            ],
+            [
+                ("line-number line-non-existent", "", []),
+                ("line-content line-non-existent", "", []),
+                ("line-number line-number-addition", "2", []),
+                ("line-content addition", " ", ["ins"]),
+            ],
+        ]
+
+    def test_escapes_content(self):
+        rows = self._rows(["<b>bold</b> & brave"], ["<i>bold</i> & brave"])
+
+        assert rows[0][1][1] == "<b>bold</b> & brave"
+        assert rows[0][3][1] == "<i>bold</i> & brave"
+
+    @pytest.mark.parametrize("lines_1, lines_2", (
+        # replaced blocks of different lengths, where lines are paired with their closest match
+        (["a", "b c d", "e"], ["a", "x", "b c e", "f", "g"]),
+        (["one two three", "four five six"], ["one two three!", "totally different", "four five six?"]),
+        (["a", "b", "c", "d"], ["z"]),
+        (["Virag", "Bloom", "Dedalus"], ["Bloom!"]),
+        # tabs and trailing whitespace
+        (["x\ty  ", " lead"], ["x\tz  ", " lead!"]),
+        ([""], ["x"]),
+    ))
+    def test_rows_match_difflib_renderer(self, lines_1, lines_2):
+        with self.app.app_context():
+            difflib_table_element = html.fragment_fromstring(DIFF_TABLE_RENDERERS["difflib"](lines_1, lines_2))
+        difflib_rows = [
+            [(td.attrib["class"], td.xpath("string()"), [child.tag for child in td]) for td in tr.xpath("./td")]
+            for tr in difflib_table_element.xpath("./tbody/tr")
+        ]
+
+        assert self._rows(lines_1, lines_2) == difflib_rows
+
+
+class TestHtmlDiffTablesCache(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_DIFF_TABLES_CACHE_TTL"] = 60
+        self.sections = [ContentSection.create({
+            "slug": "description",
+            "name": "Description",
+            "questions": [
+                {"id": "serviceName", "question": "Service name", "type": "text"},
+                {"id": "serviceDescription", "question": "Service description", "type": "textbox_large"},
+            ],
+        })]
+
+    def teardown_method(self, method):
+        diff_tables_cache.invalidate()
+        super().teardown_method(method)
+
+    def _diffs(self, revision_1, revision_2, cache_key):
+        with self.app.app_context():
+            return list(html_diff_tables_from_sections_iter(
+                self.sections,
+                revision_1,
+                revision_2,
+                cache_key=cache_key,
+            ))
+
+    def test_tables_are_cached_per_revision_and_question(self):
+        revision_1 = {"serviceName": "Virag", "serviceDescription": "Rudolf"}
+        revision_2 = {"serviceName": "Bloom", "serviceDescription": "Leopold"}
+
+        with mock.patch.dict(DIFF_TABLE_RENDERERS, direct=mock.Mock(side_effect=lambda *args, **kwargs: "<table/>")):
+            first = self._diffs(revision_1, revision_2, cache_key=(123, "2017-01-01T00:00:00.000000Z"))
+            second = self._diffs(revision_1, revision_2, cache_key=(123, "2017-01-01T00:00:00.000000Z"))
+            assert DIFF_TABLE_RENDERERS["direct"].call_count == 2
+
+            self._diffs(revision_1, revision_2, cache_key=(123, "2017-01-02T00:00:00.000000Z"))
+            assert DIFF_TABLE_RENDERERS["direct"].call_count == 4
+
+        assert first == second == [
+            ("description", "serviceName", "<table/>"),
+            ("description", "serviceDescription", "<table/>"),
+        ]
+
+    def test_tables_are_not_cached_without_a_cache_key(self):
+        revision_1 = {"serviceName": "Virag"}
+        revision_2 = {"serviceName": "Bloom"}
+
+        with mock.patch.dict(DIFF_TABLE_RENDERERS, direct=mock.Mock(side_effect=lambda *args, **kwargs: "<table/>")):
+            self._diffs(revision_1, revision_2, cache_key=None)
+            self._diffs(revision_1, revision_2, cache_key=None)
+            assert DIFF_TABLE_RENDERERS["direct"].call_count == 2
@@ -0,0 +1,53 @@
+import random
+
+import mock
+import pytest
+
+from app.main.helpers.external_sort import external_sorted
+
+
+class TestExternalSorted:
+    @pytest.mark.parametrize("buffer_size", (1, 3, 10, 100, 1000))
+    def test_sorts_like_sorted(self, buffer_size):
+        random.seed(buffer_size)
+        items = [(random.randrange(20), i) for i in range(300)]
+
+        # sorting on the first element only checks the sort is stable
+        assert list(external_sorted(items, key=lambda item: item[0], buffer_size=buffer_size)) == \
+            sorted(items, key=lambda item: item[0])
+
+    def test_empty(self):
+        assert list(external_sorted([], key=lambda item: item, buffer_size=10)) == []
+
+    def test_does_not_spill_if_everything_fits_in_memory(self):
+        with mock.patch("app.main.helpers.external_sort.TemporaryFile") as TemporaryFile:
+            assert list(external_sorted([3, 1, 2], key=lambda item: item, buffer_size=3)) == [1, 2, 3]
+
+        assert TemporaryFile.called is False
+
+    def test_spills_a_run_per_full_buffer_and_closes_them(self):
+        run_files = []
+
+        def temporary_file(*args, **kwargs):
+            from tempfile import TemporaryFile
+            run_files.append(TemporaryFile(*args, **kwargs))
+            return run_files[-1]
+
+        with mock.patch("app.main.helpers.external_sort.TemporaryFile", side_effect=temporary_file):
+            assert list(external_sorted(range(10, 0, -1), key=lambda item: item, buffer_size=4)) == \
+                list(range(1, 11))
+
+        assert len(run_files) == 3
+        assert all(run_file.closed for run_file in run_files)
+
+    def test_is_lazy(self):
+        consumed = []
+
+        def items():
+            for item in (2, 1):
+                consumed.append(item)
+                yield item
+
+        result = external_sorted(items(), key=lambda item: item, buffer_size=10)
+        assert consumed == []
+        assert list(result) == [1, 2]
@@ -0,0 +1,123 @@
+import inspect
+
+import boto3
+import mock
+from botocore.stub import Stubber
+from flask import Response, request
+
+from app.instrumentation import (
+    REQUEST_SPANS_ENVIRON_KEY,
+    RequestSpans,
+    _log_slow_request,
+    instrumented_client_class,
+)
+from app.main.helpers.concurrency import fetch_concurrently
+from .helpers import BaseApplicationTest
+from .test_metrics import load_prometheus_metrics
+
+
+class Client:
+    def get_thing(self, thing_id, detailed=False):
+        return {"things": {"id": thing_id}}
+
+    def get_things(self, *thing_ids):
+        return [self.get_thing(thing_id) for thing_id in thing_ids]
+
+    def find_things_iter(self):
+        yield from self.get_things(1, 2)
+
+    def _request(self):
+        pass
+
+
+InstrumentedClient = instrumented_client_class(Client, "api")
+
+
+class TestInstrumentedClientClass:
+    def test_public_methods_keep_their_signatures(self):
+        assert inspect.signature(InstrumentedClient.get_thing) == inspect.signature(Client.get_thing)
+        assert InstrumentedClient().get_thing(1) == {"things": {"id": 1}}
+
+    def test_private_and_generator_methods_are_not_wrapped(self):
+        assert "_request" not in vars(InstrumentedClient)
+        assert "find_things_iter" not in vars(InstrumentedClient)
+
+    def test_calls_outside_requests_are_not_timed(self):
+        assert InstrumentedClient().get_things(1, 2) == [{"things": {"id": 1}}, {"things": {"id": 2}}]
+
+
+class TestRequestSpans(BaseApplicationTest):
+    def _spans(self, request_spans):
+        return sorted((kind, operation, count) for kind, operation, count, seconds in request_spans.top(10))
+
+    def test_client_calls_are_counted_against_the_request(self):
+        with self.app.test_request_context():
+            request_spans = request.environ[REQUEST_SPANS_ENVIRON_KEY] = RequestSpans()
+            client = InstrumentedClient()
+            client.get_thing(1)
+            client.get_thing(2)
+            # methods calling other methods are only counted once, and iterators' calls are counted as they're made
+            client.get_things(1, 2)
+            list(client.find_things_iter())
+
+        assert self._spans(request_spans) == [("api", "get_thing", 2), ("api", "get_things", 2)]
+
+    def test_calls_made_concurrently_are_counted_against_the_request(self):
+        with self.app.test_request_context():
+            request_spans = request.environ[REQUEST_SPANS_ENVIRON_KEY] = RequestSpans()
+            client = InstrumentedClient()
+            fetch_concurrently(lambda: client.get_thing(1), lambda: client.get_thing(2))
+
+        assert self._spans(request_spans) == [("api", "get_thing", 2)]
+
+    def test_s3_calls_are_counted_against_the_request(self):
+        s3_client = boto3.client(
+            "s3", region_name="eu-west-1", aws_access_key_id="key", aws_secret_access_key="secret",
+        )
+        with Stubber(s3_client) as stubber, self.app.test_request_context():
+            stubber.add_response("list_objects_v2", {"Contents": []}, {"Bucket": "bucket"})
+            request_spans = request.environ[REQUEST_SPANS_ENVIRON_KEY] = RequestSpans()
+            s3_client.list_objects_v2(Bucket="bucket")
+
+        assert self._spans(request_spans) == [("s3", "ListObjectsV2", 1)]
+
+    def test_call_durations_are_exported_as_metrics(self):
+        with self.app.test_request_context("/admin/suppliers"):
+            InstrumentedClient().get_thing(1)
+            endpoint = request.endpoint
+
+        results = load_prometheus_metrics(self.client.get('/admin/_metrics').data)
+
+        assert int(results[
+            f'outbound_call_duration_seconds_count{{endpoint="{endpoint}",kind="api",operation="get_thing"}}'.encode()
+        ]) >= 1
+
+
+class TestLogSlowRequest(BaseApplicationTest):
+    def _log_request(self, duration):
+        response = Response()
+        with self.app.test_request_context("/admin/suppliers"):
+            request_spans = request.environ[REQUEST_SPANS_ENVIRON_KEY] = RequestSpans()
+            request_spans.started_at -= duration
+            request_spans.add("api", "get_supplier", 0.5)
+            request_spans.add("api", "find_frameworks", 0.25)
+            request_spans.add("api", "get_supplier", 0.5)
+            request_spans.add("content", "filter", 0.125)
+            with mock.patch("app.instrumentation.logger", autospec=True) as logger:
+                assert _log_slow_request(response) is response
+        return logger
+
+    def test_slow_requests_are_logged_with_their_top_spans(self):
+        self.app.config["DM_SLOW_REQUEST_TOP_SPANS"] = 2
+
+        logger = self._log_request(3)
+
+        assert logger.warning.call_count == 1
+        extra = logger.warning.call_args[1]["extra"]
+        assert extra["duration_real"] >= 3
+        assert extra["top_spans"] == "get_supplier (api) x2 1.000s; find_frameworks (api) x1 0.250s"
+
+    def test_fast_requests_are_not_logged(self):
+        logger = self._log_request(0)
+
+        assert logger.warning.called is False
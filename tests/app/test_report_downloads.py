@@ -0,0 +1,115 @@
+import mock
+import pytest
+from werkzeug.exceptions import BadGateway, NotFound
+
+from app.main.helpers.report_downloads import report_download_response, signed_urls_cache
+from .helpers import BaseApplicationTest
+
+
+class TestReportDownloadResponse(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.bucket = mock.Mock(bucket_name="reports")
+        self.sign = mock.Mock(return_value="https://assets.example.com/g-cloud-12/reports/report.csv?signature=abc")
+        self.requests_get_patch = mock.patch("app.main.helpers.report_downloads.requests.get", autospec=True)
+        self.requests_get = self.requests_get_patch.start()
+
+    def teardown_method(self, method):
+        self.requests_get_patch.stop()
+        signed_urls_cache.invalidate()
+        super().teardown_method(method)
+
+    def _upstream(self, status_code=200, headers=None, chunks=(b"a,b\n", b"c,d\n")):
+        return mock.Mock(status_code=status_code, headers=headers or {}, iter_content=mock.Mock(return_value=chunks))
+
+    def test_redirects_to_signed_url(self):
+        with self.app.test_request_context("/"):
+            response = report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+        assert response.status_code == 302
+        assert response.location == "https://assets.example.com/g-cloud-12/reports/report.csv?signature=abc"
+        assert self.requests_get.called is False
+
+    def test_404s_when_report_does_not_exist(self):
+        self.sign.return_value = None
+
+        with self.app.test_request_context("/"):
+            with pytest.raises(NotFound):
+                report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+    def test_reuses_signed_urls_while_cached(self):
+        self.app.config["DM_SIGNED_URL_CACHE_TTL"] = 20
+
+        with self.app.test_request_context("/"):
+            for _ in range(3):
+                report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+            report_download_response(self.bucket, "g-cloud-12/reports/other.csv", self.sign)
+
+        assert self.sign.call_count == 2
+
+    def test_proxies_report_in_chunks(self):
+        self.app.config["DM_REPORT_DOWNLOADS_PROXY"] = True
+        self.app.config["DM_REPORT_DOWNLOAD_CHUNK_SIZE"] = 4
+        self.requests_get.return_value = upstream = self._upstream(
+            headers={"Content-Length": "8", "Accept-Ranges": "bytes", "X-Amz-Request-Id": "123"},
+        )
+
+        with self.app.test_request_context("/"):
+            response = report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.get_data() == b"a,b\nc,d\n"
+        assert response.headers["Content-Length"] == "8"
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert "X-Amz-Request-Id" not in response.headers
+        assert response.headers["Content-Disposition"] == "attachment;filename=report.csv"
+        assert upstream.iter_content.call_args == mock.call(4)
+        assert upstream.close.called is True
+        assert self.requests_get.call_args == mock.call(
+            "https://assets.example.com/g-cloud-12/reports/report.csv?signature=abc",
+            headers={},
+            stream=True,
+            timeout=30,
+        )
+
+    def test_proxy_passes_on_range_requests(self):
+        self.app.config["DM_REPORT_DOWNLOADS_PROXY"] = True
+        self.requests_get.return_value = self._upstream(
+            status_code=206,
+            headers={"Content-Length": "4", "Content-Range": "bytes 4-7/8"},
+            chunks=(b"c,d\n",),
+        )
+
+        with self.app.test_request_context("/", headers={"Range": "bytes=4-"}):
+            response = report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == "bytes 4-7/8"
+        assert response.get_data() == b"c,d\n"
+        assert self.requests_get.call_args[1]["headers"] == {"Range": "bytes=4-"}
+
+    def test_proxy_signs_a_new_url_when_cached_one_is_rejected(self):
+        self.app.config["DM_REPORT_DOWNLOADS_PROXY"] = True
+        self.app.config["DM_SIGNED_URL_CACHE_TTL"] = 20
+        self.sign.side_effect = ["https://assets.example.com/expired", "https://assets.example.com/fresh"]
+        self.requests_get.side_effect = [self._upstream(status_code=403), self._upstream()]
+
+        with self.app.test_request_context("/"):
+            response = report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+        assert response.status_code == 200
+        assert [c[0][0] for c in self.requests_get.call_args_list] == [
+            "https://assets.example.com/expired",
+            "https://assets.example.com/fresh",
+        ]
+
+    def test_proxy_502s_on_upstream_error(self):
+        self.app.config["DM_REPORT_DOWNLOADS_PROXY"] = True
+        self.requests_get.return_value = upstream = self._upstream(status_code=500)
+
+        with self.app.test_request_context("/"):
+            with pytest.raises(BadGateway):
+                report_download_response(self.bucket, "g-cloud-12/reports/report.csv", self.sign)
+
+        assert upstream.close.called is True
@@ -0,0 +1,102 @@
+import mock
+from flask_session.sessions import RedisSession
+
+from app.sessions import SESSION_REFRESHED_AT_KEY, SlidingExpiryRedisSessionInterface
+from .helpers import BaseApplicationTest
+
+
+class TestSessionRefresh(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        # flask_login rewrites anonymous users' sessions on every request to protect them, which would hide whether
+        # refresh_session rewrote them
+        self.app.config["SESSION_PROTECTION"] = None
+
+    def _get(self, path, now):
+        # session cookies are secure, so are only sent back over https
+        with mock.patch("app.sessions.time.time", return_value=now):
+            return self.client.get(path, base_url="https://localhost")
+
+    @staticmethod
+    def _sets_session_cookie(response):
+        return any(cookie.startswith("dm_session=") for cookie in response.headers.getlist("Set-Cookie"))
+
+    def _session_set(self, response):
+        cookie = next(cookie for cookie in response.headers.getlist("Set-Cookie") if cookie.startswith("dm_session="))
+        return self.app.session_interface.get_signing_serializer(self.app).loads(
+            cookie.split(";")[0][len("dm_session="):]
+        )
+
+    def test_session_cookie_is_only_reissued_once_a_fraction_of_its_lifetime_has_passed(self):
+        # PERMANENT_SESSION_LIFETIME is an hour, so a session is refreshed at most every 6 minutes
+        assert self.app.config["DM_SESSION_REFRESH_FRACTION"] == 0.1
+
+        assert self._sets_session_cookie(self._get("/admin", 1000))
+        assert not self._sets_session_cookie(self._get("/admin", 1300))
+        assert not self._sets_session_cookie(self._get("/admin", 1359))
+
+        session = self._session_set(self._get("/admin", 1360))
+        assert session["_permanent"] is True
+        assert session[SESSION_REFRESHED_AT_KEY] == 1360
+
+    def test_refresh_fraction_may_be_set_from_the_environment(self):
+        self.app.config["DM_SESSION_REFRESH_FRACTION"] = "0.5"
+        self._get("/admin", 1000)
+
+        assert not self._sets_session_cookie(self._get("/admin", 2799))
+        assert self._sets_session_cookie(self._get("/admin", 2800))
+
+    def test_status_and_metrics_requests_do_not_start_sessions(self):
+        with mock.patch("app.status.views.data_api_client"):
+            for path in ("/admin/_status?ignore-dependencies", "/admin/_metrics"):
+                assert not self._sets_session_cookie(self._get(path, 1000)), path
+
+    def test_static_requests_do_not_refresh_sessions(self):
+        self._get("/admin", 1000)
+
+        assert not self._sets_session_cookie(self._get("/admin/static/nonexistent.css", 2000))
+
+
+class TestSlidingExpiryRedisSessionInterface:
+    def _save(self, session):
+        redis = mock.Mock()
+        interface = SlidingExpiryRedisSessionInterface(redis, "session:", use_signer=False)
+        app = mock.Mock(
+            config={"SESSION_REFRESH_EACH_REQUEST": False},
+            session_cookie_name="dm_session",
+            permanent_session_lifetime=mock.Mock(days=0, seconds=3600, microseconds=0),
+        )
+        response = mock.Mock()
+        with mock.patch.object(interface, "get_expiration_time"), \
+                mock.patch.object(interface, "get_cookie_domain"), \
+                mock.patch.object(interface, "get_cookie_path"), \
+                mock.patch.object(interface, "get_cookie_httponly"), \
+                mock.patch.object(interface, "get_cookie_secure"):
+            interface.save_session(app, session, response)
+        return redis, response
+
+    def test_unmodified_sessions_are_not_saved(self):
+        session = RedisSession({"_permanent": True, "user_id": 1}, sid="abc")
+
+        redis, response = self._save(session)
+
+        assert redis.setex.called is False
+        assert response.set_cookie.called is False
+
+    def test_modified_sessions_are_saved(self):
+        session = RedisSession({"_permanent": True}, sid="abc")
+        session["user_id"] = 1
+
+        redis, response = self._save(session)
+
+        assert redis.setex.call_args[1]["name"] == "session:abc"
+        assert response.set_cookie.call_args[0] == ("dm_session", "abc")
+
+    def test_emptied_sessions_are_deleted(self):
+        session = RedisSession({"user_id": 1}, sid="abc")
+        session.clear()
+
+        redis, response = self._save(session)
+
+        redis.delete.assert_called_once_with("session:abc")
+        assert response.delete_cookie.called is True
@@ -0,0 +1,199 @@
+from threading import Event
+
+import mock
+
+from app.main.helpers.background_jobs import get_background_job
+from app.main.helpers.supplier_search import (
+    SUPPLIER_SEARCH_INDEX_JOB_KEY,
+    SupplierSearchIndex,
+    find_suppliers_page,
+    get_supplier_search_index,
+    supplier_search_pages_cache,
+)
+from .helpers import BaseApplicationTest
+from .test_metrics import load_prometheus_metrics
+
+
+SUPPLIERS = [
+    {"id": 1, "name": "Kev's Pies", "registeredName": "Kevin Pies Limited", "dunsNumber": "123456789"},
+    {"id": 2, "name": "Pie Shop", "companiesHouseNumber": "SC123456", "dunsNumber": "987654321"},
+    {"id": 3, "name": "Cloud Piemen", "otherCompanyRegistrationNumber": "FR-55555"},
+    {"id": 4, "name": "Pie"},
+]
+
+
+def _ids(suggestions):
+    return [suggestion["id"] for suggestion in suggestions]
+
+
+class TestSupplierSearchIndex:
+    def setup_method(self, method):
+        self.index = SupplierSearchIndex()
+        self.index.add(SUPPLIERS[:2])
+        self.index.add(SUPPLIERS[2:])
+
+    def test_names_are_found_by_the_start_of_any_word(self):
+        assert _ids(self.index.search("pie", 10)) == [4, 2, 3, 1]
+        # followed by near misses
+        assert _ids(self.index.search("PIES", 10)) == [1, 4]
+        assert _ids(self.index.search("kevin pie", 10)) == [1]
+
+    def test_numbers_are_found_by_their_start(self):
+        assert _ids(self.index.search("9876", 10)) == [2]
+        assert _ids(self.index.search("sc12", 10)) == [2]
+        assert _ids(self.index.search("fr-555", 10)) == [3]
+
+    def test_near_misses_are_found_by_trigrams(self):
+        assert _ids(self.index.search("clod piemen", 10)) == [3]
+        assert _ids(self.index.search("xyz", 10)) == []
+
+    def test_number_of_suggestions_is_limited(self):
+        assert _ids(self.index.search("pie", 2)) == [4, 2]
+
+    def test_suggestions_only_include_identifying_details(self):
+        assert self.index.search("kev", 1) == [{
+            "id": 1,
+            "name": "Kev's Pies",
+            "dunsNumber": "123456789",
+            "companiesHouseNumber": None,
+            "otherCompanyRegistrationNumber": None,
+        }]
+
+    def test_completed_index_has_the_same_suggestions(self):
+        suggestions = self.index.search("pie", 10)
+        self.index.mark_complete()
+
+        assert self.index.search("pie", 10) == suggestions
+        assert self.index.complete is True
+
+    def test_blank_queries_have_no_suggestions(self):
+        assert self.index.search("  ", 10) == []
+
+
+class TestGetSupplierSearchIndex(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_SUPPLIER_SEARCH_INDEX_BATCH_SIZE"] = 2
+        self.index_patch = mock.patch("app.main.helpers.supplier_search._index", None)
+        self.index_patch.start()
+        self.client = mock.Mock()
+
+    def teardown_method(self, method):
+        self.index_patch.stop()
+        super().teardown_method(method)
+
+    def _wait_for_build(self):
+        assert get_background_job(SUPPLIER_SEARCH_INDEX_JOB_KEY).wait(5)
+
+    def test_partial_index_is_searchable_while_first_build_runs(self):
+        first_batch_indexed, release = Event(), Event()
+
+        def find_suppliers_iter():
+            yield from SUPPLIERS[:2]
+            # asked for the next batch, so the first has been added
+            first_batch_indexed.set()
+            release.wait(5)
+            yield from SUPPLIERS[2:]
+        self.client.find_suppliers_iter.side_effect = find_suppliers_iter
+
+        with self.app.app_context():
+            index = get_supplier_search_index(self.client)
+            assert first_batch_indexed.wait(5)
+
+            assert _ids(index.search("pie", 10)) == [2, 1]
+            assert index.complete is False
+
+            release.set()
+            self._wait_for_build()
+            index = get_supplier_search_index(self.client)
+
+        assert _ids(index.search("pie", 10)) == [4, 2, 3, 1]
+        assert index.complete is True
+        assert self.client.find_suppliers_iter.call_count == 1
+
+    def test_index_is_rebuilt_in_the_background_once_stale(self):
+        self.client.find_suppliers_iter.return_value = iter(SUPPLIERS[:1])
+
+        with self.app.app_context():
+            with mock.patch("app.main.helpers.supplier_search.monotonic", return_value=1000):
+                get_supplier_search_index(self.client)
+                self._wait_for_build()
+                first_index = get_supplier_search_index(self.client)
+
+            self.client.find_suppliers_iter.return_value = iter(SUPPLIERS)
+            with mock.patch("app.main.helpers.supplier_search.monotonic", return_value=1299):
+                assert get_supplier_search_index(self.client) is first_index
+            assert self.client.find_suppliers_iter.call_count == 1
+
+            with mock.patch("app.main.helpers.supplier_search.monotonic", return_value=1300):
+                # the stale index is served until the new one is complete
+                assert get_supplier_search_index(self.client).complete is True
+                self._wait_for_build()
+                second_index = get_supplier_search_index(self.client)
+
+        assert second_index is not first_index
+        assert len(first_index) == 1
+        assert len(second_index) == 4
+
+
+class TestFindSuppliersPage(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL"] = 60
+        # prefetch synchronously, so the next page is always in the cache by the time it's asked for
+        self.submit_patch = mock.patch(
+            "app.main.helpers.supplier_search.submit", side_effect=lambda func, *args: func(*args)
+        )
+        self.submit_patch.start()
+        self.client = mock.Mock()
+        self.client.find_suppliers.side_effect = lambda page, **search: {
+            "suppliers": [{"id": int(page)}],
+            "links": {"next": f"http://localhost/suppliers?page={int(page) + 1}&name=foo"} if int(page) < 3 else {},
+        }
+
+    def teardown_method(self, method):
+        supplier_search_pages_cache.invalidate()
+        self.submit_patch.stop()
+        super().teardown_method(method)
+
+    def _pages_fetched(self):
+        return [call[1]["page"] for call in self.client.find_suppliers.call_args_list]
+
+    def _prefetch_counts(self):
+        results = load_prometheus_metrics(self.app.test_client().get('/admin/_metrics').data)
+        return {
+            result: int(results.get(f'supplier_search_prefetch_total{{result="{result}"}}'.encode(), 0))
+            for result in ("prefetched", "hit", "miss")
+        }
+
+    def test_next_page_is_prefetched_and_served_from_the_cache(self):
+        counts_before = self._prefetch_counts()
+
+        with self.app.app_context():
+            pages = [find_suppliers_page(self.client, 1, page, name="foo") for page in (1, "2", "3")]
+
+        assert [page["suppliers"] for page in pages] == [[{"id": 1}], [{"id": 2}], [{"id": 3}]]
+        assert self._pages_fetched() == [1, "2", "3"]
+        self.client.find_suppliers.assert_called_with(page="3", name="foo")
+
+        counts_after = self._prefetch_counts()
+        assert {result: counts_after[result] - counts_before[result] for result in counts_after} == {
+            "prefetched": 2, "hit": 2, "miss": 0,
+        }
+
+    def test_pages_are_not_shared_between_users_or_searches(self):
+        with self.app.app_context():
+            find_suppliers_page(self.client, 1, 1, name="foo")
+            find_suppliers_page(self.client, 2, "2", name="foo")
+            find_suppliers_page(self.client, 1, "2", name="bar")
+
+        assert self._pages_fetched() == [1, "2", "2", "3", "2", "3"]
+
+    def test_prefetching_is_turned_off_with_the_cache(self):
+        self.app.config["DM_SUPPLIER_SEARCH_PAGE_CACHE_TTL"] = 0
+
+        with self.app.app_context():
+            find_suppliers_page(self.client, 1, 1, name="foo")
+            find_suppliers_page(self.client, 1, "2", name="foo")
+
+        assert self._pages_fetched() == [1, "2"]
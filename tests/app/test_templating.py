@@ -0,0 +1,56 @@
+import mock
+from jinja2 import FileSystemBytecodeCache
+
+from app.templating import init_bytecode_cache, precompile_templates
+from .helpers import BaseApplicationTest
+
+
+class TestPrecompileTemplates(BaseApplicationTest):
+    def test_compiles_app_templates(self):
+        with self.app.app_context():
+            compiled = precompile_templates(self.app)
+
+        assert "suppliers/view_declaration.html" in compiled
+        assert "view_supplier_draft_services.html" in compiled
+        assert not any(template_name.endswith(".js") for template_name in compiled)
+
+    def test_templates_are_not_compiled_again_when_used(self):
+        with self.app.app_context():
+            precompile_templates(self.app)
+
+            with mock.patch.object(self.app.jinja_env, "compile") as compile_:
+                self.app.jinja_env.get_template("suppliers/view_declaration.html")
+
+        assert compile_.called is False
+
+    def test_logs_compile_time_of_each_template(self):
+        with self.app.app_context():
+            with mock.patch("app.templating.logger", autospec=True) as logger:
+                self.app.jinja_env.get_template("view_supplier_draft_services.html")
+
+        assert "view_supplier_draft_services.html" in [
+            call[1]["extra"]["template_name"] for call in logger.log.call_args_list
+        ]
+
+
+class TestBytecodeCache(BaseApplicationTest):
+    def test_disabled_in_tests(self):
+        assert self.app.jinja_env.bytecode_cache is None
+
+    def test_compiled_templates_are_reused_between_environments(self, tmp_path):
+        self.app.config["DM_JINJA_BYTECODE_CACHE"] = True
+        self.app.config["DM_JINJA_BYTECODE_CACHE_DIR"] = str(tmp_path / "jinja")
+        init_bytecode_cache(self.app)
+
+        assert isinstance(self.app.jinja_env.bytecode_cache, FileSystemBytecodeCache)
+        with self.app.app_context():
+            self.app.jinja_env.get_template("suppliers/view_declaration.html")
+        assert list((tmp_path / "jinja").iterdir())
+
+        # with the environment's own cache emptied (as another worker's would be) it's loaded rather than compiled
+        self.app.jinja_env.cache.clear()
+        with self.app.app_context():
+            with mock.patch.object(self.app.jinja_env, "compile") as compile_:
+                self.app.jinja_env.get_template("suppliers/view_declaration.html")
+
+        assert compile_.called is False
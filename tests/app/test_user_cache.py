@@ -0,0 +1,62 @@
+import mock
+
+from app.main.helpers.users import invalidate_user, load_user
+from .helpers import BaseApplicationTest
+
+
+class TestLoadUser(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_USER_CACHE_TTL"] = 30
+        self.client = mock.Mock()
+        self.client.get_user.return_value = self.load_example_listing("user_response")
+
+    def test_loads_active_user(self):
+        with self.app.app_context():
+            user = load_user(self.client, "123")
+
+        assert user.id == 999
+        self.client.get_user.assert_called_once_with(user_id=123)
+
+    def test_user_is_cached(self):
+        with self.app.app_context():
+            load_user(self.client, "123")
+            user = load_user(self.client, 123)
+
+        assert user.id == 999
+        assert self.client.get_user.call_count == 1
+
+    def test_user_is_reloaded_once_invalidated(self):
+        with self.app.app_context():
+            load_user(self.client, "123")
+            invalidate_user(123)
+            self.client.get_user.return_value["users"]["active"] = False
+
+            assert load_user(self.client, "123") is None
+
+        assert self.client.get_user.call_count == 2
+
+    def test_user_is_reloaded_once_expired(self):
+        with self.app.app_context():
+            with mock.patch("app.main.helpers.caching.monotonic", return_value=1000):
+                load_user(self.client, "123")
+            user_json = self.load_example_listing("user_response")
+            user_json["users"]["role"] = "admin"
+            self.client.get_user.return_value = user_json
+
+            with mock.patch("app.main.helpers.caching.monotonic", return_value=1029):
+                assert load_user(self.client, "123").role == "supplier"
+            with mock.patch("app.main.helpers.caching.monotonic", return_value=1030):
+                assert load_user(self.client, "123").role == "admin"
+
+    def test_locked_users_are_not_loaded(self):
+        self.client.get_user.return_value["users"]["locked"] = True
+
+        with self.app.app_context():
+            assert load_user(self.client, "123") is None
+
+    def test_missing_users_are_not_loaded(self):
+        self.client.get_user.return_value = None
+
+        with self.app.app_context():
+            assert load_user(self.client, "123") is None